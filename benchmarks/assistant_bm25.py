@@ -0,0 +1,67 @@
+# benchmarks/assistant_bm25.py
+# Help-assistant retrieval: the prebuilt BM25 index (utils/assistant.HelpIndex) vs. rebuilding a rank_bm25 model for
+# every question (the previous behaviour), on the shipped corpus and on synthetic corpora of thousands of passages.
+#   python benchmarks/assistant_bm25.py [--sizes 1000 5000] [--queries 200] [--json]
+import argparse
+import json
+import time
+
+import numpy as np
+
+import fixtures  # noqa: F401  (puts the repo root on sys.path)
+from utils.assistant import HelpIndex, _tokens, help_passages
+
+QUERIES = ["how do I add steam", "what is npv", "import xlsx template", "selling price per t", "capex depreciation years",
+           "packaging big bag cost", "ramp up month profile", "transport tariff per t km", "scenario multiplier", "waste disposal"]
+
+def synthetic(passages, size, seed=0):
+    """`size` passages drawn from the shipped corpus' words (same vocabulary, Zipf-like reuse)."""
+    rng = np.random.default_rng(seed)
+    words = [w for t, b in passages for w in (t + " " + b).split()]
+    lengths = rng.integers(15, 80, size)
+    return [(f"Passage {i}", " ".join(words[j] for j in rng.integers(0, len(words), n))) for i, n in enumerate(lengths)]
+
+def per_query(fn, queries):
+    t = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - t) / len(queries)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000])
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--json", action="store_true", help="print results as JSON")
+    args = ap.parse_args()
+    try:
+        from rank_bm25 import BM25Okapi
+    except ImportError:
+        BM25Okapi = None
+    base = help_passages("MAD")
+    queries = (QUERIES * (args.queries // len(QUERIES) + 1))[:args.queries]
+    results = []
+    for size in [len(base)] + args.sizes:
+        passages = base if size == len(base) else synthetic(base, size)
+        t = time.perf_counter()
+        index = HelpIndex(passages)
+        build = time.perf_counter() - t
+        row = {"passages": size, "build_ms": build * 1000, "query_ms": per_query(lambda q: index.top(q, 3), queries) * 1000, "rebuild_query_ms": None, "same_scores": None}
+        if BM25Okapi is not None:
+            def rebuild(q):
+                docs = [_tokens(t + ". " + b) for t, b in passages]
+                return BM25Okapi(docs).get_scores(_tokens(q))
+            legacy_q = queries[:max(1, min(len(queries), 20_000 // size))]
+            row["rebuild_query_ms"] = per_query(rebuild, legacy_q) * 1000
+            row["same_scores"] = all(np.allclose(index.scores(q), rebuild(q)) for q in QUERIES[:3])
+        results.append(row)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'passages':>8s} {'build ms':>9s} {'query ms':>9s} {'rebuild+query ms':>17s} {'speedup':>8s} {'same scores':>11s}")
+    for r in results:
+        legacy = r["rebuild_query_ms"]
+        print(f"{r['passages']:8d} {r['build_ms']:9.1f} {r['query_ms']:9.3f} {legacy if legacy is not None else float('nan'):17.2f} "
+              f"{(legacy / r['query_ms']) if legacy else float('nan'):7.0f}x {str(r['same_scores']):>11s}")
+
+if __name__ == "__main__":
+    main()
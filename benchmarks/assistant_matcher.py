@@ -0,0 +1,68 @@
+# benchmarks/assistant_matcher.py
+# Intent / glossary matching: one Aho–Corasick pass (utils/matcher.PhraseMatcher) vs. the previous behaviour, one
+# re.search per rule with the pattern string assembled per query (as the glossary lookup did; re's own pattern
+# cache holds 512 entries), for the shipped rules and for synthetic rule sets of hundreds of intents.
+#   python benchmarks/assistant_matcher.py [--rules 100 500] [--queries 2000] [--json]
+import argparse
+import json
+import re
+import time
+
+import numpy as np
+
+import fixtures  # noqa: F401  (puts the repo root on sys.path)
+from utils.assistant import GLOSSARY, INTENT_KEYWORDS
+from utils.matcher import PhraseMatcher
+
+QUERIES = ["how do I add steam to the utilities", "what is npv", "upload an xlsx file", "set the selling price please",
+           "show the waste section", "can you explain the discount rate", "ramp up in month 3", "nothing relevant here at all"]
+
+def regex_match(rules, q):
+    q = q.lower()
+    for label, groups in rules:
+        if re.search(r".*".join(r"\b(" + "|".join(re.escape(p.lower()) for p in g) + r")\b" for g in groups), q):
+            return label
+    return None
+
+def synthetic(rules, size, seed=0):
+    """Shipped intent and glossary rules plus made-up two-group rules up to `size` rules (shipped ones keep priority)."""
+    rng = np.random.default_rng(seed)
+    words = [f"term{i}" for i in range(size * 3)]
+    extra = [(f"rule{i}", [list(rng.choice(words, 3)), list(rng.choice(words, 4))]) for i in range(max(0, size - len(rules)))]
+    return list(rules) + extra
+
+def timed(fn, queries, runs=3):
+    best = float("inf")
+    for _ in range(runs):
+        t = time.perf_counter()
+        for q in queries:
+            fn(q)
+        best = min(best, time.perf_counter() - t)
+    return best / len(queries)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rules", type=int, nargs="+", default=[100, 500])
+    ap.add_argument("--queries", type=int, default=2000)
+    ap.add_argument("--json", action="store_true", help="print results as JSON")
+    args = ap.parse_args()
+    shipped = list(INTENT_KEYWORDS) + [(t, [[t] + e.get("aliases", [])]) for t, e in GLOSSARY.items()]
+    queries = (QUERIES * (args.queries // len(QUERIES) + 1))[:args.queries]
+    results = []
+    for size in [len(shipped)] + args.rules:
+        rules = shipped if size == len(shipped) else synthetic(shipped, size)
+        t = time.perf_counter()
+        matcher = PhraseMatcher(rules)
+        build = time.perf_counter() - t
+        same = all(matcher.match(q) == regex_match(rules, q) for q in QUERIES)
+        results.append({"rules": len(rules), "build_ms": build * 1000, "matcher_us": timed(matcher.match, queries) * 1e6,
+                        "regex_us": timed(lambda q: regex_match(rules, q), queries) * 1e6, "same_result": same})
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'rules':>6s} {'build ms':>9s} {'matcher us':>11s} {'regex loop us':>14s} {'speedup':>8s} {'same':>5s}")
+    for r in results:
+        print(f"{r['rules']:6d} {r['build_ms']:9.2f} {r['matcher_us']:11.1f} {r['regex_us']:14.1f} {r['regex_us'] / r['matcher_us']:7.1f}x {str(r['same_result']):>5s}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# benchmarks/details_rerun.py
+# Rerun latency of the Details page on a large project (headless, streamlit.testing AppTest): first run, then the
+# median of further reruns with nothing changed. Compare revisions by pointing --page at an older copy, e.g.
+#   git show <rev>:pages/1_Details.py > /tmp/details_old.py && python benchmarks/details_rerun.py --page /tmp/details_old.py
+import argparse
+import json
+import os
+import statistics
+import time
+
+from fixtures import ROOT, large_state
+from streamlit.testing.v1 import AppTest
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--page", default=os.path.join(ROOT, "pages", "1_Details.py"))
+    ap.add_argument("--rows", type=int, default=5_000)
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--json", action="store_true", help="print results as JSON")
+    args = ap.parse_args()
+    os.chdir(ROOT)
+    at = AppTest.from_file(os.path.abspath(args.page), default_timeout=600)
+    at.session_state["data"] = large_state(args.rows)
+    t = time.perf_counter()
+    at.run()
+    first = time.perf_counter() - t
+    if at.exception:
+        raise SystemExit(f"page raised: {at.exception[0].value}")
+    times = []
+    for _ in range(args.runs):
+        t = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - t)
+    res = {"page": args.page, "rows": args.rows, "first_run_s": first, "rerun_median_s": statistics.median(times), "rerun_min_s": min(times)}
+    if args.json:
+        print(json.dumps(res, indent=2))
+        return
+    print(f"{res['page']} — {res['rows']} rows/table: first run {first:.2f}s, rerun median {res['rerun_median_s']:.2f}s (min {res['rerun_min_s']:.2f}s)")
+
+if __name__ == "__main__":
+    main()
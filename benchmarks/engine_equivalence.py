@@ -0,0 +1,123 @@
+# benchmarks/engine_equivalence.py
+# NumPy vs. loop engine: compute_totals on randomized projects must agree bit for bit (rows, categories, totals),
+# including the cells the typed tables flag — None, "", text, NaN, inf, ints too large for a float — every rubric
+# basis, unit mismatches and unknown or odd scenarios. The multi-scenario table (utils/scenarios.py) is checked against
+# compute_totals(engine="loop") per scenario. Exits 1 on the first mismatch.
+#   python benchmarks/engine_equivalence.py [--cases 300] [--seed 1]
+import argparse
+import copy
+import math
+import random
+import sys
+
+import numpy as np
+
+from fixtures import large_state
+from utils.cache import RESULTS, SECTIONS
+from utils.costing_core import DEFAULT_STATE, compute_totals, compute_totals_for_scenarios
+
+ODD_CELLS = [None, "", " ", "abc", "3.5", " 2 ", "1e400", float("nan"), float("inf"), -float("inf"), True, False, 0, 7, -3, 10**400, -10**400]
+BASES = ["per_t", "per_year", "fixed_project", " PER_T ", "Per_Year", "", None, "per_batch"]
+CATEGORIES = ["Labor", "Logistics", "Materials", "Equipment", "Other", "", None]
+QTY_UNITS = ["t/t", "kg/t", "g/t", "L/t", "m3/t", "Nm3/t", "kWh/t", "MWh/t", "GJ/t", "unit/t", "bbl/t", "", None]
+COST_UNITS = ["MAD/t", "MAD/kg", "MAD/L", "MAD/m3", "MAD/Nm3", "MAD/kWh", "MAD/MWh", "MAD/GJ", "MAD/unit", "MAD/bbl", "MAD", "", None]
+SCENARIO_IDS = ["base", "optimistic", "pessimistic", "missing", None, 0]
+# throughput and multipliers stay finite: the scenario pass factors them out of the row costs (0 * inf = NaN)
+FINITE_ODD = [None, "", "abc", "1.5", True, 0, -1, 1e6]
+
+def finite(rng):
+    return rng.uniform(-1, 3) if rng.random() < 0.7 else rng.choice(FINITE_ODD)
+
+def cell(rng):
+    return rng.uniform(-5, 100) if rng.random() < 0.8 else rng.choice(ODD_CELLS)
+
+def maybe(rng, row, key, value, p=0.9):
+    # some rows leave the key out, so kernel defaults are exercised too
+    if rng.random() < p:
+        row[key] = value
+    return row
+
+def random_state(rng, n):
+    d = copy.deepcopy(DEFAULT_STATE)
+    flag = lambda: rng.choice([True, False, 0, 1, None, "yes"])  # noqa: E731
+    d["recipe"] = [maybe(rng, maybe(rng, {"name": f"r{i}", "kg_per_t": cell(rng), "unit_cost": cell(rng), "taxable": flag()}, "t_per_t", cell(rng), 0.7), "unit", rng.choice(QTY_UNITS))
+                   | {"cost_unit": rng.choice(COST_UNITS)} for i in range(n)]
+    d["process"]["materials"] = [maybe(rng, {"name": f"m{i}", "spec_per_t": cell(rng), "unit_cost": cell(rng), "cost_unit": rng.choice(COST_UNITS), "taxable": flag()}, "unit_spec", rng.choice(QTY_UNITS))
+                                 for i in range(n)]
+    d["process"]["utilities"] = [maybe(rng, {"name": f"u{i}", "intensity_per_t": cell(rng), "tariff_per_unit": cell(rng), "tariff_unit": rng.choice(COST_UNITS)}, "unit_intensity", rng.choice(QTY_UNITS))
+                                 for i in range(n)]
+    d["process"]["byproducts"] = [maybe(rng, {"name": f"b{i}"}, "credit_per_t", cell(rng)) for i in range(n)]
+    d["packaging"] = [maybe(rng, {"name": f"p{i}", "units_per_t": cell(rng)}, "unit_cost", cell(rng)) for i in range(n)]
+    d["logistics"] = [maybe(rng, {"name": f"l{i}", "distance_km": cell(rng), "tariff_per_tkm": cell(rng), "taxable": flag()}, "wet_t_per_t", cell(rng)) for i in range(n)]
+    d["waste"] = [maybe(rng, {"name": f"w{i}", "kg_per_t": cell(rng), "disposal_cost_per_kg": cell(rng)}, "cost_unit", rng.choice(COST_UNITS)) for i in range(n)]
+    d["rubrics"] = [{"name": f"x{i}", "basis": rng.choice(BASES), "quantity": cell(rng), "unit_cost": cell(rng), "map_to_category": rng.choice(CATEGORIES), "taxable": flag()} for i in range(n)]
+    d["lineItems"] = [maybe(rng, {"quantity": cell(rng), "unitCost": cell(rng), "taxable": flag()}, "category", rng.choice(CATEGORIES)) for i in range(n)]
+    d["risks"] = [{"name": f"k{i}", "probability": cell(rng), "impactCost": cell(rng)} for i in range(rng.choice([0, 1, 3]))]
+    d["process"]["throughput_tpy"] = rng.uniform(0, 20_000) if rng.random() < 0.7 else finite(rng)
+    d["scenarios"].append({"id": 0, "name": "Odd", "costMultiplier": finite(rng), "quantityMultiplier": finite(rng), "contingencyPctDelta": finite(rng)})
+    d["activeScenarioId"] = rng.choice(SCENARIO_IDS)
+    return d
+
+def same(a, b, path, rel=0.0):
+    """Recursive equality; floats bit for bit (NaN equals NaN) unless rel > 0, where any two non-finite values also match
+    (inf - inf in another order is NaN). Returns the first differing path."""
+    if isinstance(a, dict) and isinstance(b, dict):
+        if list(a) != list(b):
+            return f"{path}: keys {list(a)} != {list(b)}"
+        return next((d for d in (same(a[k], b[k], f"{path}.{k}", rel) for k in a) if d), None)
+    if isinstance(a, list) and isinstance(b, list):
+        if len(a) != len(b):
+            return f"{path}: length {len(a)} != {len(b)}"
+        return next((d for d in (same(x, y, f"{path}[{i}]", rel) for i, (x, y) in enumerate(zip(a, b))) if d), None)
+    if isinstance(a, float) and isinstance(b, float):
+        if (a != a and b != b) or a == b:
+            return None
+        if rel and (math.isclose(a, b, rel_tol=rel, abs_tol=1e-9) or not (math.isfinite(a) or math.isfinite(b))):
+            return None
+        return f"{path}: {a!r} != {b!r}"
+    if type(a) is not type(b) or a != b:
+        return f"{path}: {a!r} ({type(a).__name__}) != {b!r} ({type(b).__name__})"
+    return None
+
+def totals(d, engine):
+    # an engine that raises where the other returns is a difference too
+    try:
+        return compute_totals(d, engine=engine)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+
+def check(d):
+    RESULTS.clear()
+    SECTIONS.clear()
+    loop, vec = totals(d, "loop"), totals(d, "numpy")
+    diff = same(loop, vec, "totals")
+    if diff:
+        return diff
+    # the broadcasted scenario pass reorders the multiplier products: equal to rounding
+    tab = compute_totals_for_scenarios(d, SCENARIO_IDS)
+    for k, sid in enumerate(SCENARIO_IDS):
+        ref = compute_totals(dict(d, activeScenarioId=sid), engine="loop")
+        for key in ["subtotal", "overhead", "contingency", "tax", "riskEMV", "total", "contingencyPct", "tpy"]:
+            diff = same(float(ref[key]), float(tab[key][k]), f"scenarios[{sid!r}].{key}", rel=1e-9)  # riskEMV of no risks is int 0
+            if diff:
+                return diff
+    return None
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cases", type=int, default=300)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    rng = random.Random(args.seed)
+    states = [("default", copy.deepcopy(DEFAULT_STATE)), ("large_state(2000)", large_state(2000))]
+    states += [(f"random #{i}", random_state(rng, rng.choice([0, 1, 3, 20, 200]))) for i in range(args.cases)]
+    for label, d in states:
+        with np.errstate(invalid="ignore", over="ignore"):  # inf * 0 cells: NaN in both engines
+            diff = check(d)
+        if diff:
+            print(f"{label}: engines differ at {diff}")
+            sys.exit(1)
+    print(f"{len(states)} projects: NumPy and loop engines agree")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# benchmarks/financials_writeback.py
+# Batch financial tools vs. project_financials when categories and rows escalate at their own rates: every tornado
+# case, a grid of sweep points and every goal-seek solution is written back into the state and re-run through
+# project_financials; the monthly scenario pass is checked against monthly_projection per scenario and a zero-spread
+# Monte Carlo against the deterministic NPV. Exits 1 on the first mismatch.
+#   python benchmarks/financials_writeback.py [--rows 20] [--seed 1]
+import argparse
+import copy
+import random
+import sys
+
+import numpy as np
+
+from fixtures import synthetic_state
+from utils.costing_core import SECTION_PATHS, project_financials, section_items
+from utils.goalseek import goal_seek, row_choices
+from utils.montecarlo import simulate
+from utils.monthly import monthly_projection, monthly_scenarios
+from utils.sensitivity import tornado
+from utils.sweep import grid_sweep
+
+ROW_SECTIONS = [name for name in SECTION_PATHS if name != "risks"]
+PATHS = {
+    "throughput_tpy": ("process", "throughput_tpy"),
+    "selling_price_per_t": ("finance", "selling_price_per_t"),
+    "discountRatePct": ("project", "discountRatePct"),
+    "escalationPctPerYear": ("settings", "escalationPctPerYear"),
+}
+
+def escalated(rng, rows, categories, row_share):
+    """synthetic_state(rows) with the given category rates (% per year) and a share of rows on their own rate."""
+    d = synthetic_state(rows, 3, 12, seed=rng.randrange(1000))
+    d["settings"]["escalationPctPerYear"] = 3.0
+    d["settings"]["escalationByCategory"] = categories
+    for name in ROW_SECTIONS:
+        for r in section_items(d, name):
+            if rng.random() < row_share:
+                r["escalation_pct"] = rng.choice([-2.0, 0.0, 5.0, 12.0, "6.5"])
+    return d
+
+def put(d, section, row, field, value):
+    """Copy of d with one input changed: a row cell (row index) or a scalar setting (row None)."""
+    e = copy.deepcopy(d)
+    if row is None:
+        group, key = PATHS[field]
+        e[group][key] = value
+        return e
+    node = e
+    for key in SECTION_PATHS[section]:
+        node = node[key]
+    node[row][field] = value
+    return e
+
+def value_of(d, section, row, field):
+    if row is None:
+        group, key = PATHS[field]
+        return d[group][key]
+    return float(section_items(d, section)[row].get(field, 0.0))
+
+def active(d, **mult):
+    e = copy.deepcopy(d)
+    for s in e["scenarios"]:
+        if s["id"] == e["activeScenarioId"]:
+            s.update(mult)
+    return e
+
+class Check:
+    def __init__(self, d):
+        pf = project_financials(d)
+        self.scale = float(np.abs(pf["years_df"]["FCF"].to_numpy()).sum())
+        self.failures = []
+
+    def npv(self, label, got, state):
+        ref = project_financials(state)["npv"]
+        if abs(got - ref) > 1e-9 * self.scale + 1e-6:
+            self.failures.append(f"{label}: {got!r} != project_financials {ref!r}")
+
+    def value(self, label, got, ref, tol):
+        if not abs(got - ref) <= tol:
+            self.failures.append(f"{label}: {got!r} != {ref!r}")
+
+def check_tornado(c, d, pct=10.0):
+    x = pct / 100.0
+    for r in tornado(d, pct, "npv")["rows"]:
+        v = value_of(d, r["section"], r["row"], r["field"])
+        for side, f in (("npv_low", 1.0 - x), ("npv_high", 1.0 + x)):
+            c.npv(f"tornado {r['driver']} {side}", r[side], put(d, r["section"], r["row"], r["field"], v * f))
+
+def check_sweep(c, d):
+    price, disc = d["finance"]["selling_price_per_t"], d["project"]["discountRatePct"]
+    axes = {"costMultiplier": [0.9, 1.15], "quantityMultiplier": [0.85, 1.1], "price": [price * 0.8, price * 1.2], "discountPct": [disc - 2, disc + 3], "escalationPct": [0.0, 6.0]}
+    npv = grid_sweep(d, axes)["npv"]
+    for idx in np.ndindex(npv.shape):
+        cm, qm, p, r, e = (axes[k][i] for k, i in zip(axes, idx))
+        state = active(d, costMultiplier=cm, quantityMultiplier=qm)
+        state["finance"]["selling_price_per_t"], state["project"]["discountRatePct"], state["settings"]["escalationPctPerYear"] = p, r, e
+        c.npv(f"sweep {idx}", float(npv[idx]), state)
+
+def check_goal_seek(c, d, rng):
+    rows = row_choices(d)
+    own = [r for r in rows if section_items(d, r["section"])[r["row"]].get("escalation_pct") is not None]
+    picks = [("price", None), ("throughput", None), ("discount", None)] + [("row", r) for r in rng.sample(own, min(3, len(own))) + rng.sample(rows, 3)]
+    base_npv = project_financials(d)["npv"]
+    for variable, row in picks:
+        for metric, target in (("npv", 0.0), ("npv", 0.5 * base_npv), ("irr", 12.0)):
+            if variable == "discount" and metric == "irr":
+                continue
+            res = goal_seek(d, variable, metric, target, row)
+            for sid, x, status in zip(res["id"], res["solution"], res["status"]):
+                if status != "ok":
+                    continue
+                state = dict(d, activeScenarioId=sid)
+                if variable == "row":
+                    state = put(state, row["section"], row["row"], row["field"], x)
+                else:
+                    state = put(state, None, None, {"price": "selling_price_per_t", "throughput": "throughput_tpy", "discount": "discountRatePct"}[variable], x)
+                label = f"goal seek {variable}{' ' + row['label'] if row else ''} {metric}={target:,.6g} [{sid}]"
+                if metric == "npv":
+                    c.npv(label, target, state)
+                else:
+                    irr = project_financials(state)["irr"]
+                    c.value(label, target, float("nan") if irr is None else irr * 100.0, 1e-6)
+
+def check_monthly(c, d):
+    tab = monthly_scenarios(d)
+    for sid, npv in zip(tab["id"], tab["npv"]):
+        ref = monthly_projection(dict(d, activeScenarioId=sid))["npv"]
+        c.value(f"monthly_scenarios [{sid}]", npv, ref, 1e-9 * c.scale + 1e-6)
+
+def check_monte_carlo(c, d):
+    # no accuracy band: every draw is the deterministic costing
+    state = copy.deepcopy(d)
+    state["project"]["stage"] = None
+    c.npv("monte carlo p50 (zero spread)", simulate(state, iterations=64, seed=1)["npv"]["p50"], state)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    rng = random.Random(args.seed)
+    states = [
+        ("Formulation 8%/y, Labor 0%/y, general 3%/y", escalated(rng, args.rows, {"Formulation": 8.0, "Labor": 0.0}, 0.0)),
+        ("category and row rates", escalated(rng, args.rows, {"Formulation": 8.0, "Labor": "0", "Utilities": -1.5, "Other": ""}, 0.2)),
+        ("row rates only", escalated(rng, args.rows, {}, 0.3)),
+        ("general rate only", escalated(rng, args.rows, {}, 0.0)),
+    ]
+    for label, d in states:
+        c = Check(d)
+        for step in (check_tornado, check_sweep, check_monthly, check_monte_carlo):
+            step(c, d)
+        check_goal_seek(c, d, rng)
+        if c.failures:
+            print(f"{label}: {len(c.failures)} mismatch(es), first: {c.failures[0]}")
+            sys.exit(1)
+        print(f"{label}: batch tools agree with project_financials")
+
+if __name__ == "__main__":
+    main()
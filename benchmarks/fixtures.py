@@ -0,0 +1,79 @@
+# benchmarks/fixtures.py
+# Deterministic large projects for the benchmarks: the default state with every row table filled to `rows` rows.
+import copy
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from utils.costing_core import DEFAULT_STATE  # noqa: E402
+
+def large_state(rows: int = 10_000, seed: int = 0):
+    """Default state plus `rows` rows in recipe, process tables, packaging, logistics, waste, rubrics and line items."""
+    rng = np.random.default_rng(seed)
+    data = copy.deepcopy(DEFAULT_STATE)
+    cur = data["project"]["currency"]
+    num = lambda lo, hi: rng.uniform(lo, hi, rows).round(4).tolist()  # noqa: E731
+    flag = lambda p: (rng.random(rows) < p).tolist()  # noqa: E731
+    names = lambda prefix: [f"{prefix} {i}" for i in range(rows)]  # noqa: E731
+    t_per_t, cost = num(0.0, 0.002), num(10, 5000)
+    data["recipe"] = [{"name": n, "t_per_t": a, "unit": "t/t", "unit_cost": c, "cost_unit": f"{cur}/t", "price_source": "Benchmark", "taxable": t, "note": ""}
+                      for n, a, c, t in zip(names("Raw material"), t_per_t, cost, flag(0.7))]
+    data["process"]["materials"] = [{"name": n, "spec_per_t": a, "unit_spec": "kg/t", "unit_cost": c, "cost_unit": f"{cur}/kg", "price_source": "Budgetary", "taxable": t, "note": ""}
+                                    for n, a, c, t in zip(names("Reagent"), num(0, 0.05), num(1, 50), flag(0.5))]
+    data["process"]["utilities"] = [{"name": n, "intensity_per_t": a, "unit_intensity": "kWh/t", "tariff_per_unit": c, "tariff_unit": f"{cur}/kWh", "price_source": "Benchmark", "taxable": False, "note": ""}
+                                    for n, a, c in zip(names("Utility"), num(0, 0.01), num(0.5, 2))]
+    data["packaging"] = [{"name": n, "units_per_t": a, "unit_cost": c, "cost_unit": f"{cur}/unit", "price_source": "Firm", "taxable": True, "note": ""}
+                         for n, a, c in zip(names("Pack"), num(0, 0.001), num(5, 50))]
+    data["logistics"] = [{"name": n, "wet_t_per_t": 1.0, "distance_km": d, "tariff_per_tkm": c, "cost_unit": f"{cur}/(t*km)", "price_source": "Benchmark", "taxable": True, "note": ""}
+                         for n, d, c in zip(names("Lane"), num(0, 0.5), num(0.3, 1.0))]
+    data["waste"] = [{"name": n, "kg_per_t": a, "disposal_cost_per_kg": c, "cost_unit": f"{cur}/kg", "price_source": "Benchmark", "taxable": False, "note": ""}
+                     for n, a, c in zip(names("Waste"), num(0, 0.01), num(0.1, 2))]
+    data["rubrics"] = [{"name": n, "basis": b, "quantity": q, "unit_cost": c, "cost_unit": f"{cur}/unit", "map_to_category": "Other", "price_source": "Estimate", "taxable": False, "note": ""}
+                       for n, b, q, c in zip(names("Rubric"), rng.choice(["per_t", "per_year", "per_batch"], rows).tolist(), num(0, 0.01), num(1, 100))]
+    data["lineItems"] = [{"id": f"li{i}", "category": k, "description": f"Item {i}", "unit": "u", "quantity": q, "unitCost": c, "taxable": t, "accountCode": "", "driver": ""}
+                         for i, (k, q, c, t) in enumerate(zip(rng.choice(["Labor", "Materials", "Equipment", "Other"], rows).tolist(), num(0, 10), num(1, 500), flag(0.3)))]
+    return data
+
+def synthetic_state(rows: int = 1000, scenarios: int = 3, horizon: int = 10, seed: int = 0):
+    """large_state(rows) with `scenarios` scenarios (random multipliers around 1), a `horizon`-year finance model,
+    a selling price above unit cost (so NPV / IRR are meaningful) and a few CAPEX items."""
+    from utils.costing_core import compute_totals
+    rng = np.random.default_rng(seed)
+    data = large_state(rows, seed)
+    data["scenarios"] = [{"id": f"s{i}", "name": f"Scenario {i}", "costMultiplier": round(float(c), 3), "quantityMultiplier": round(float(q), 3), "contingencyPctDelta": round(float(d), 1)}
+                         for i, (c, q, d) in enumerate(zip(rng.uniform(0.8, 1.25, scenarios), rng.uniform(0.8, 1.2, scenarios), rng.uniform(-5, 5, scenarios)))]
+    data["activeScenarioId"] = "s0"
+    totals = compute_totals(data)
+    unit = totals["total"] / totals["tpy"] if totals["tpy"] else 100.0
+    data["finance"]["horizon_years"] = horizon
+    data["finance"]["selling_price_per_t"] = round(unit * 1.3, 2)
+    data["finance"]["capex_items"] = [{"name": f"Package {i}", "amount": round(float(a), 0), "year": 0, "depr_years": int(y), "category": "Equipment"}
+                                      for i, (a, y) in enumerate(zip(rng.uniform(0.5, 2.0, 5) * totals["total"], rng.integers(5, 25, 5)))]
+    return data
+
+def formulation_state(candidates: int = 300, components: int = 12, seed: int = 0):
+    """Default state plus a least-cost formulation problem: `candidates` offers (4 in 5 recipe raw materials in t/t,
+    the rest reagents in kg/t) over `components` oxides, with a mass balance and min/max blend-share constraints."""
+    rng = np.random.default_rng(seed)
+    data = copy.deepcopy(DEFAULT_STATE)
+    cur = data["project"]["currency"]
+    comps = [f"C{j}" for j in range(components)]
+    cands = []
+    for i in range(candidates):
+        recipe = i % 5 != 0
+        frac = rng.dirichlet(np.ones(components)) * rng.uniform(0.6, 1.0)
+        cands.append({"name": f"Offer {i}", "section": "recipe" if recipe else "materials", "unit": "t/t" if recipe else "kg/t",
+                      "min_qty": 0.0, "max_qty": 0.4 if recipe else 200.0,
+                      "unit_cost": round(float(rng.uniform(100, 900) if recipe else rng.uniform(0.1, 1.0)), 2), "cost_unit": f"{cur}/t" if recipe else f"{cur}/kg",
+                      "price_source": "Firm", "composition": "; ".join(f"{c}: {f * 100:.3f}%" for c, f in zip(comps, frac)), "taxable": True, "note": ""})
+    cons = [{"name": "Mass balance", "component": "total", "section": "recipe", "basis": "per_t", "sense": "=", "value": 1.05}]
+    for c in comps:
+        cons.append({"name": f"{c} min", "component": c, "section": "all", "basis": "pct_of_blend", "sense": ">=", "value": round(40.0 / components, 2)})
+        cons.append({"name": f"{c} max", "component": c, "section": "all", "basis": "pct_of_blend", "sense": "<=", "value": round(140.0 / components, 2)})
+    data["formulation"] = {"candidates": cands, "constraints": cons}
+    return data
@@ -0,0 +1,51 @@
+# benchmarks/import_time.py
+# Cold-start cost of the costing modules: each target is imported in a fresh interpreter, N times, median reported.
+#   python benchmarks/import_time.py [--runs 7]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    "python (baseline)": "pass",
+    "utils.costing_core": "import utils.costing_core",
+    "utils.state": "import utils.state",
+    "utils.assistant": "import utils.assistant",
+    "costing_core + DEFAULT_STATE": "from utils.costing_core import DEFAULT_STATE",
+    "compute_totals (first call)": "import copy; from utils.costing_core import DEFAULT_STATE, compute_totals; compute_totals(copy.deepcopy(DEFAULT_STATE))",
+    "project_financials (first call)": "import copy; from utils.costing_core import DEFAULT_STATE, project_financials; project_financials(copy.deepcopy(DEFAULT_STATE))",
+    "pandas (reference)": "import pandas",
+}
+
+PROBE = "import sys, time; t = time.perf_counter(); {code}; print(time.perf_counter() - t, 'pandas' in sys.modules)"
+
+def measure(code: str, runs: int):
+    times, pandas_loaded = [], False
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", PROBE.format(code=code)], cwd=ROOT, capture_output=True, text=True, check=True).stdout.split()
+        times.append(float(out[0]))
+        pandas_loaded = out[1] == "True"
+    return statistics.median(times), pandas_loaded
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=7)
+    ap.add_argument("--json", action="store_true", help="print results as JSON")
+    args = ap.parse_args()
+    results = {}
+    for name, code in TARGETS.items():
+        median, pandas_loaded = measure(code, args.runs)
+        results[name] = {"median_ms": median * 1000.0, "pandas_loaded": pandas_loaded}
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'target':36s} {'median ms':>10s}  pandas")
+    for name, r in results.items():
+        print(f"{name:36s} {r['median_ms']:10.1f}  {'yes' if r['pandas_loaded'] else 'no'}")
+
+if __name__ == "__main__":
+    main()
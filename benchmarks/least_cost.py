@@ -0,0 +1,38 @@
+# benchmarks/least_cost.py
+# Least-cost formulation (utils/optimizer.py): LP build + NumPy simplex time for growing candidate lists.
+#   python benchmarks/least_cost.py [--candidates 100 300 600] [--components 12] [--runs 5] [--json]
+import argparse
+import json
+import statistics
+import time
+
+from fixtures import formulation_state
+from utils.optimizer import build_problem, optimize
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--candidates", type=int, nargs="+", default=[100, 300, 600])
+    ap.add_argument("--components", type=int, default=12)
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--json", action="store_true", help="print results as JSON")
+    args = ap.parse_args()
+    results = []
+    for n in args.candidates:
+        data = formulation_state(n, args.components)
+        p = build_problem(data)
+        times, res = [], None
+        for _ in range(args.runs):
+            t = time.perf_counter()
+            res = optimize(data)
+            times.append(time.perf_counter() - t)
+        results.append({"candidates": n, "constraints": len(p["constraints"]), "status": res["status"], "iterations": res["iterations"],
+                        "chosen": len(res["rows"]), "cost_per_t": res["cost_per_t"], "ms": statistics.median(times) * 1000})
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'candidates':>10s} {'constraints':>11s} {'status':>8s} {'pivots':>7s} {'chosen':>6s} {'cost/t':>10s} {'ms':>8s}")
+    for r in results:
+        print(f"{r['candidates']:10d} {r['constraints']:11d} {r['status']:>8s} {r['iterations']:7d} {r['chosen']:6d} {r['cost_per_t'] or 0:10.2f} {r['ms']:8.1f}")
+
+if __name__ == "__main__":
+    main()
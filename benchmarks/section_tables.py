@@ -0,0 +1,68 @@
+# benchmarks/section_tables.py
+# Typed section tables (utils/tables.py) vs. the dict rows they are parsed from: memory per 10k rows and section
+# kernel time — per-row kernels reading dicts vs. NumPy kernels on a cold (parse included) and warm (memoized) table.
+#   python benchmarks/section_tables.py [--rows 10000] [--runs 5] [--json]
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+
+from fixtures import large_state
+from utils.cache import SECTIONS
+from utils.costing_core import section_items, section_kernels
+from utils.frozen import snapshot
+from utils.tables import NUMERIC_FIELDS, build_table
+
+def timed(fn, runs, before=None):
+    times = []
+    for _ in range(runs):
+        if before:
+            before()
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    return statistics.median(times)
+
+def traced(fn):
+    tracemalloc.start()
+    out = fn()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return out, size
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=10_000)
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--json", action="store_true", help="print results as JSON")
+    args = ap.parse_args()
+    data = large_state(args.rows)
+    snapshot(data)  # tables frozen as in the app (fingerprints memoized)
+    loop, numpy_k = section_kernels("loop"), section_kernels("numpy")
+    per_10k = 10_000 / args.rows
+    results = []
+    for name in NUMERIC_FIELDS:
+        items = section_items(data, name)
+        if not items:
+            continue
+        _, dict_bytes = traced(lambda: [dict(r) for r in items])
+        table, table_bytes = traced(lambda: build_table(name, items))
+        call = (lambda k: (lambda: k[name](items, 1.0, 1.0))) if name == "lineItems" else (lambda k: (lambda: k[name](items, 10_000.0, 1.0, "MAD")))
+        results.append({
+            "section": name, "rows": len(items),
+            "dict_mb_per_10k": dict_bytes * per_10k / 1e6, "table_mb_per_10k": table_bytes * per_10k / 1e6,
+            "loop_ms": timed(call(loop), args.runs) * 1000,
+            "numpy_cold_ms": timed(call(numpy_k), args.runs, SECTIONS.clear) * 1000,
+            "numpy_warm_ms": timed(call(numpy_k), args.runs) * 1000,
+            "issues": len(table.issues),
+        })
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'section':11s} {'dict MB/10k':>11s} {'table MB/10k':>12s} {'loop ms':>8s} {'cold ms':>8s} {'warm ms':>8s} {'speedup':>8s}")
+    for r in results:
+        print(f"{r['section']:11s} {r['dict_mb_per_10k']:11.2f} {r['table_mb_per_10k']:12.3f} {r['loop_ms']:8.1f} {r['numpy_cold_ms']:8.1f} {r['numpy_warm_ms']:8.1f} {r['loop_ms'] / r['numpy_warm_ms']:7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# benchmarks/snapshot_format.py
+# Native snapshot (utils/snapshot.py) vs. the xlsx snapshot of the Details page: save/load time, size, round-trip.
+#   python benchmarks/snapshot_format.py [--rows 1000 10000 50000] [--runs 3] [--json]
+import argparse
+import copy
+import io
+import json
+import statistics
+import time
+
+import pandas as pd
+
+from fixtures import large_state
+from utils.snapshot import write_snapshot, read_snapshot
+from utils.workbook import read_workbook, apply_import
+from utils.costing_core import DEFAULT_STATE
+
+def xlsx_snapshot(data):
+    # same sheets as the "Download snapshot (xlsx)" export in pages/1_Details.py
+    bio = io.BytesIO()
+    with pd.ExcelWriter(bio, engine="openpyxl") as xw:
+        for sheet, rows in [("recipe", data.get("recipe", [])), ("materials", data["process"].get("materials", [])), ("utilities", data["process"].get("utilities", [])),
+                            ("byproducts", data["process"].get("byproducts", [])), ("packaging", data.get("packaging", [])), ("logistics", data.get("logistics", [])),
+                            ("waste", data.get("waste", [])), ("rubrics", data.get("rubrics", [])), ("capex", data["finance"].get("capex_items", []))]:
+            pd.DataFrame(rows).to_excel(xw, sheet_name=sheet, index=False)
+    return bio.getvalue()
+
+def xlsx_load(raw):
+    return apply_import(copy.deepcopy(DEFAULT_STATE), read_workbook(raw)["sections"])
+
+def timed(fn, runs):
+    times, out = [], None
+    for _ in range(runs):
+        t = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t)
+    return statistics.median(times), out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--json", action="store_true", help="print results as JSON")
+    args = ap.parse_args()
+    results = []
+    for rows in args.rows:
+        data = large_state(rows)
+        for fmt, save, load in [("native", write_snapshot, read_snapshot), ("xlsx", xlsx_snapshot, xlsx_load)]:
+            t_save, raw = timed(lambda: save(data), args.runs)
+            t_load, back = timed(lambda: load(raw), args.runs)
+            lost = sorted(k for k in data if back.get(k) != data[k])
+            results.append({"rows": rows, "format": fmt, "save_s": t_save, "load_s": t_load, "size_mb": len(raw) / 1e6, "lossless": not lost, "differs": lost})
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'rows':>7s} {'format':7s} {'save s':>8s} {'load s':>8s} {'size MB':>8s}  round-trip")
+    for r in results:
+        print(f"{r['rows']:7d} {r['format']:7s} {r['save_s']:8.3f} {r['load_s']:8.3f} {r['size_mb']:8.2f}  {'lossless' if r['lossless'] else 'differs: ' + ', '.join(r['differs'])}")
+
+if __name__ == "__main__":
+    main()
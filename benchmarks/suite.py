@@ -0,0 +1,151 @@
+# benchmarks/suite.py
+# Benchmark suite: times the costing, ramp-up, financial, IRR, workbook and assistant entry points on synthetic
+# projects (fixtures.synthetic_state) across row counts, scenario counts and horizons, and writes machine-readable
+# JSON. "cold" clears the result caches before every run; "warm" repeats the call on the cached state.
+#   python benchmarks/suite.py [--rows 10 1000 10000 100000] [--scenarios 3 20 200] [--horizons 10 25 50] [--runs 3]
+#                              [--out results.json] [--compare baseline.json] [--threshold 1.25] [--json]
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from fixtures import ROOT, synthetic_state
+from utils import costing_core
+from utils.assistant import answer
+from utils.cache import RESULTS, SECTIONS
+from utils.costing_core import compute_ramp_monthly, compute_totals, compute_totals_for_scenarios, project_financials
+from utils.financials import evaluate_financials, financial_inputs, own_opex
+from utils.frozen import snapshot
+from utils.irr import irr_batch
+from utils.scenarios import scenario_multipliers
+from utils.workbook import apply_import, export_workbook, read_upload
+
+QUERIES = ["how do I add steam", "what is IRR", "upload an xlsx file", "where do I set the discount rate", "ramp up profile for month 3"]
+
+def clear_caches():
+    RESULTS.clear()
+    SECTIONS.clear()
+
+def timed(fn, runs, before=None):
+    times = []
+    for _ in range(runs):
+        if before:
+            before()
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    return statistics.median(times)
+
+def scenario_cashflows(data):
+    """Yearly free cash flows of every scenario (input of the IRR search)."""
+    tab = compute_totals_for_scenarios(data)
+    opex = np.array(tab["subtotal"]) + np.array(tab["overhead"]) + np.array(tab["tax"])
+    fi = financial_inputs(data)
+    mult = scenario_multipliers(data, tab["id"])
+    return evaluate_financials(fi, opex, np.array(tab["tpy"]), opex_own=own_opex(fi["own"], mult["qm"], mult["cm"]))["fcf"]
+
+def cases(data, workbook):
+    """name -> (callable, cached): cached calls get a warm timing too."""
+    out = {
+        "compute_totals": (lambda: compute_totals(data), True),
+        "compute_totals_for_scenarios": (lambda: compute_totals_for_scenarios(data), False),
+        "compute_ramp_monthly": (lambda: compute_ramp_monthly(data), True),
+        "project_financials": (lambda: project_financials(data), True),
+        "assistant_answer": (lambda: [answer(q, data) for q in QUERIES], False),
+    }
+    fcf = scenario_cashflows(data)
+    out["irr_search"] = (lambda: irr_batch(fcf), False)
+    if workbook:
+        xlsx = export_workbook(data)
+        cur = data["project"]["currency"]
+        out["xlsx_export"] = (lambda: export_workbook(data), False)
+        out["xlsx_import"] = (lambda: apply_import(dict(data, process=dict(data["process"])), read_upload("project.xlsx", xlsx, None, cur)["sections"]), False)
+    return out
+
+def profiles(args):
+    """(rows, scenarios, horizon): a row-count sweep, then scenario and horizon sweeps at --sweep-rows rows."""
+    seen, out = set(), []
+    for p in [(r, args.scenarios[0], args.horizons[0]) for r in args.rows] + [(args.sweep_rows, s, args.horizons[0]) for s in args.scenarios] + [(args.sweep_rows, args.scenarios[0], h) for h in args.horizons]:
+        if p not in seen:
+            seen.add(p)
+            out.append(p)
+    return out
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(args):
+    results = []
+    for rows, scenarios, horizon in profiles(args):
+        data = snapshot(synthetic_state(rows, scenarios, horizon))  # frozen as in the app
+        runs = args.runs if rows <= 10_000 else 1
+        for name, (fn, warm) in cases(data, rows <= args.workbook_max_rows).items():
+            r = {"case": name, "rows": rows, "scenarios": scenarios, "horizon": horizon, "runs": runs, "cold_ms": timed(fn, runs, clear_caches) * 1000}
+            if warm:
+                fn()
+                r["warm_ms"] = timed(fn, runs) * 1000
+            results.append(r)
+            if not args.json:
+                print(f"{name:30s} rows={rows:<7d} scen={scenarios:<4d} h={horizon:<3d} cold {r['cold_ms']:10.2f} ms" + (f"  warm {r['warm_ms']:8.3f} ms" if warm else ""), flush=True)
+    return {
+        "meta": {"revision": git_revision(), "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                 "python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__, "platform": platform.platform(),
+                 "engine": costing_core.ENGINE, "cpus": os.cpu_count()},
+        "results": results,
+    }
+
+def compare(report, baseline, threshold):
+    """Cold-time ratios against a previous report; returns the regressions (ratio above threshold)."""
+    key = lambda r: (r["case"], r["rows"], r["scenarios"], r["horizon"])  # noqa: E731
+    base = {key(r): r for r in baseline["results"]}
+    regressions = []
+    print(f"\nvs. {baseline['meta'].get('revision')} ({baseline['meta'].get('timestamp')}), threshold {threshold:.2f}x")
+    for r in report["results"]:
+        b = base.get(key(r))
+        if b is None or not b["cold_ms"]:
+            continue
+        ratio = r["cold_ms"] / b["cold_ms"]
+        flag = "REGRESSION" if ratio > threshold else ""
+        if flag:
+            regressions.append({**r, "baseline_ms": b["cold_ms"], "ratio": ratio})
+        print(f"{r['case']:30s} rows={r['rows']:<7d} scen={r['scenarios']:<4d} h={r['horizon']:<3d} {b['cold_ms']:10.2f} -> {r['cold_ms']:10.2f} ms  {ratio:5.2f}x {flag}")
+    return regressions
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[10, 1_000, 10_000, 100_000], help="rows per section")
+    ap.add_argument("--scenarios", type=int, nargs="+", default=[3, 20, 200])
+    ap.add_argument("--horizons", type=int, nargs="+", default=[10, 25, 50])
+    ap.add_argument("--sweep-rows", type=int, default=1_000, help="rows per section for the scenario / horizon sweeps")
+    ap.add_argument("--workbook-max-rows", type=int, default=10_000, help="skip xlsx import/export above this size")
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--out", help="write the JSON report to this file")
+    ap.add_argument("--compare", help="previous JSON report: print ratios, exit 1 on regressions")
+    ap.add_argument("--threshold", type=float, default=1.25, help="cold-time ratio counted as a regression")
+    ap.add_argument("--json", action="store_true", help="print the JSON report instead of the progress table")
+    args = ap.parse_args()
+    report = run(args)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,37 @@
 import streamlit as st
 import pandas as pd
-from io import BytesIO
 
-from utils.state import ensure_state, stage_sections
+from utils.state import ensure_state, commit_state, stage_sections
+from utils.tables import table_issues
+from utils.units import cost_unit_options
 from utils.costing_core import ACCURACY_BANDS
+from utils.workbook import IMPORT_SECTIONS, read_upload, apply_import, export_workbook, template_workbook
+from utils.snapshot import SNAPSHOT_EXT, write_snapshot, read_snapshot
+from utils.cache import cached
+from utils.optimizer import SENSES, CONSTRAINT_BASES, TARGET_SECTIONS, optimize, write_back
+from utils.profiling import begin_run, end_run, span
 
 st.set_page_config(page_title="Details — Inputs & Calculations", layout="wide")
 
 PRICE_SOURCES = ["Benchmark", "Budgetary", "Firm", "Contract", "Estimate"]
+COST_CATEGORIES = ["Labor","Formulation","Materials","Utilities","Logistics","Equipment","Subcontract","Travel","Capex","Opex","Other"]
 
 def unit_options(cur: str):
-    return {
-        "recipe": [f"{cur}/t"],
-        "materials": [f"{cur}/kg", f"{cur}/t", f"{cur}/L", f"{cur}/m3", f"{cur}/unit"],
-        "utilities": [f"{cur}/kWh", f"{cur}/MWh", f"{cur}/Nm3", f"{cur}/m3", f"{cur}/GJ", f"{cur}/t", f"{cur}/unit"],
-        "packaging": [f"{cur}/unit", f"{cur}/bag", f"{cur}/pallet", f"{cur}/drum"],
-        "logistics": [f"{cur}/(t*km)", f"{cur}/t"],
-        "waste": [f"{cur}/kg", f"{cur}/t"],
-        "byproducts": [f"{cur}/t"],
-        "rubrics": [f"{cur}/unit", f"{cur}/t", f"{cur}/y"],
-    }
+    return cost_unit_options(cur)
+
+def run_import(upload, section):
+    with span("import", detail=upload.name.rsplit(".", 1)[-1].lower()) as sp:
+        res = read_upload(upload.name, upload.getvalue(), section, data["project"]["currency"])
+        apply_import(data, res["sections"])
+        sp.rows(sum(r["rows"] for r in res["report"]))
+    return res
+
+def import_summary(res):
+    parts = [f"{r['section']}: {r['rows']} rows" + (f" ({r['coerced_errors']} unreadable cells defaulted)" if r["coerced_errors"] else "") for r in res["report"]]
+    return f"Imported in {res['seconds']:.2f}s — " + ("; ".join(parts) or "no known sheets") + (f". Ignored sheets: {', '.join(res['ignored'])}" if res["ignored"] else "")
 
 data = ensure_state(st)
+begin_run(st, "Details")
 
 with st.sidebar:
     st.title("Costing — Details")
@@ -52,37 +62,10 @@ with st.sidebar:
     # Quick Import in sidebar
     st.subheader("Import (quick)")
     up_sb = st.file_uploader("CSV/XLSX", type=["csv","xlsx"], key="sb_upl")
-    tgt_sb = st.selectbox("Section", ["recipe","materials","utilities","byproducts","packaging","logistics","waste","rubrics","scenarios","capex","rampup"], key="sb_tgt")
+    tgt_sb = st.selectbox("Section", IMPORT_SECTIONS, key="sb_tgt")
     if st.button("Import (sidebar)") and up_sb is not None:
         try:
-            if up_sb.name.lower().endswith(".csv"):
-                df = pd.read_csv(up_sb)
-                if tgt_sb == "recipe": data["recipe"] = df.to_dict("records")
-                elif tgt_sb == "materials": data["process"]["materials"] = df.to_dict("records")
-                elif tgt_sb == "utilities": data["process"]["utilities"] = df.to_dict("records")
-                elif tgt_sb == "byproducts": data["process"]["byproducts"] = df.to_dict("records")
-                elif tgt_sb == "packaging": data["packaging"] = df.to_dict("records")
-                elif tgt_sb == "logistics": data["logistics"] = df.to_dict("records")
-                elif tgt_sb == "waste": data["waste"] = df.to_dict("records")
-                elif tgt_sb == "rubrics": data["rubrics"] = df.to_dict("records")
-                elif tgt_sb == "scenarios": data["scenarios"] = df.to_dict("records")
-                elif tgt_sb == "capex": data["finance"]["capex_items"] = df.to_dict("records")
-                elif tgt_sb == "rampup": data["rampup"] = df.to_dict("list")
-                st.success(f"Imported CSV into {tgt_sb}.")
-            else:
-                xls = pd.ExcelFile(up_sb)
-                if "recipe" in xls.sheet_names: data["recipe"] = pd.read_excel(up_sb, sheet_name="recipe").to_dict("records")
-                if "materials" in xls.sheet_names: data["process"]["materials"] = pd.read_excel(up_sb, sheet_name="materials").to_dict("records")
-                if "utilities" in xls.sheet_names: data["process"]["utilities"] = pd.read_excel(up_sb, sheet_name="utilities").to_dict("records")
-                if "byproducts" in xls.sheet_names: data["process"]["byproducts"] = pd.read_excel(up_sb, sheet_name="byproducts").to_dict("records")
-                if "packaging" in xls.sheet_names: data["packaging"] = pd.read_excel(up_sb, sheet_name="packaging").to_dict("records")
-                if "logistics" in xls.sheet_names: data["logistics"] = pd.read_excel(up_sb, sheet_name="logistics").to_dict("records")
-                if "waste" in xls.sheet_names: data["waste"] = pd.read_excel(up_sb, sheet_name="waste").to_dict("records")
-                if "rubrics" in xls.sheet_names: data["rubrics"] = pd.read_excel(up_sb, sheet_name="rubrics").to_dict("records")
-                if "scenarios" in xls.sheet_names: data["scenarios"] = pd.read_excel(up_sb, sheet_name="scenarios").to_dict("records")
-                if "capex" in xls.sheet_names: data["finance"]["capex_items"] = pd.read_excel(up_sb, sheet_name="capex").to_dict("records")
-                if "rampup" in xls.sheet_names: data["rampup"] = pd.read_excel(up_sb, sheet_name="rampup").to_dict("list")
-                st.success("Imported XLSX in sidebar.")
+            st.success(import_summary(run_import(up_sb, tgt_sb)))
         except Exception as e:
             st.error(f"Import error: {e}")
 
@@ -177,6 +160,42 @@ if sec.get("materials", True):
                                            "price_source": st.column_config.SelectboxColumn(options=PRICE_SOURCES)})
     data["process"]["materials"] = mat_df.to_dict(orient="records")
 
+if sec.get("recipe", True) or sec.get("materials", True):
+    with st.expander("Least-cost formulation (optimizer)"):
+        st.caption("Candidate raw materials / supplier offers with their composition (e.g. \"CaO: 52%; SiO2: 3%\"), and the constraints the blend must meet. "
+                   "Quantities are per t of product in the candidate's unit; constraints count mass (t). 'total' is the summed mass; pct_of_blend is a share of the blend's mass.")
+        form = data.get("formulation", {}) or {}
+        cand_df = pd.DataFrame(form.get("candidates", []))
+        if cand_df.empty:
+            cand_df = pd.DataFrame([{"name":"","section":"recipe","unit":"t/t","min_qty":0.0,"max_qty":None,"unit_cost":0.0,"cost_unit":f"{cur}/t","price_source":"Benchmark","composition":"","taxable":True,"note":""}])
+        cand_df = st.data_editor(cand_df, num_rows="dynamic", use_container_width=True, hide_index=True,
+                                 column_config={"section": st.column_config.SelectboxColumn(options=TARGET_SECTIONS),
+                                                "cost_unit": st.column_config.SelectboxColumn(options=sorted(set(uopt["recipe"] + uopt["materials"]))),
+                                                "price_source": st.column_config.SelectboxColumn(options=PRICE_SOURCES)})
+        cons_df = pd.DataFrame(form.get("constraints", []))
+        if cons_df.empty:
+            cons_df = pd.DataFrame([{"name":"Mass balance","component":"total","section":"recipe","basis":"per_t","sense":"=","value":1.0}])
+        cons_df = st.data_editor(cons_df, num_rows="dynamic", use_container_width=True, hide_index=True,
+                                 column_config={"section": st.column_config.SelectboxColumn(options=["all"] + TARGET_SECTIONS),
+                                                "basis": st.column_config.SelectboxColumn(options=CONSTRAINT_BASES),
+                                                "sense": st.column_config.SelectboxColumn(options=SENSES)})
+        data["formulation"] = {"candidates": cand_df.to_dict(orient="records"), "constraints": cons_df.to_dict(orient="records")}
+        opt = cached("optimizer", data["formulation"], lambda: optimize(data), cur, data["process"].get("throughput_tpy", 0.0))
+        for msg in opt["issues"]:
+            st.warning(msg)
+        if opt["status"] == "optimal":
+            st.write(f"Least cost: **{opt['cost_per_t']:,.2f} {cur}/t** ({opt['annual_cost']:,.0f} {cur}/y) — {len(opt['rows'])} candidate(s) chosen, "
+                     f"{opt['iterations']} pivots in {opt['seconds'] * 1000:.0f} ms")
+            st.dataframe(pd.DataFrame(opt["rows"]), use_container_width=True, hide_index=True)
+            if opt["constraints"]:
+                st.dataframe(pd.DataFrame(opt["constraints"]), use_container_width=True, hide_index=True)
+            if st.button("Write chosen rows to Process model / Consumables", key="opt_write"):
+                written = write_back(data, opt)
+                st.success(f"Wrote {written['recipe']} formulation row(s) and {written['materials']} consumable row(s).")
+                st.rerun()
+        elif opt["status"] != "empty":
+            st.error(f"No formulation: the problem is {opt['status']}.")
+
 if sec.get("utilities", False):
     st.write("**Utilities (incl. Steam)**")
     ut_df = pd.DataFrame(data["process"].get("utilities", []))
@@ -240,7 +259,7 @@ if sec.get("rubrics", False):
                         column_config={
                             "basis": st.column_config.SelectboxColumn(options=["per_t","per_year","fixed_project"]),
                             "cost_unit": st.column_config.SelectboxColumn(options=[f"{cur}/unit", f"{cur}/t", f"{cur}/y"]),
-                            "map_to_category": st.column_config.SelectboxColumn(options=["Labor","Formulation","Materials","Utilities","Logistics","Equipment","Subcontract","Travel","Capex","Opex","Other"]),
+                            "map_to_category": st.column_config.SelectboxColumn(options=COST_CATEGORIES),
                             "price_source": st.column_config.SelectboxColumn(options=PRICE_SOURCES),
                         })
     data["rubrics"] = rb.to_dict(orient="records")
@@ -290,6 +309,18 @@ if sec.get("finance", True):
     fin["horizon_years"] = int(c_f1.number_input("Horizon (years)", value=int(fin.get("horizon_years", 10)), min_value=1, max_value=40, step=1))
     fin["include_depreciation"] = bool(c_f2.checkbox("Include depreciation", value=bool(fin.get("include_depreciation", True))))
 
+    st.markdown("**OPEX escalation (% per year)**")
+    settings = data.setdefault("settings", {})
+    c_e0, c_e1 = st.columns([1, 2])
+    settings["escalationPctPerYear"] = c_e0.number_input("General escalation (%/y)", value=float(settings.get("escalationPctPerYear", 0.0)), step=0.1,
+                                                         help="Selling price, and OPEX of categories / rows without their own rate.")
+    esc_df = pd.DataFrame([{"category": k, "pct_per_year": v} for k, v in (settings.get("escalationByCategory") or {}).items()], columns=["category", "pct_per_year"])
+    esc_df = c_e1.data_editor(esc_df, num_rows="dynamic", use_container_width=True, hide_index=True,
+                              column_config={"category": st.column_config.SelectboxColumn(options=COST_CATEGORIES), "pct_per_year": st.column_config.NumberColumn("% per year", format="%.2f")})
+    settings["escalationByCategory"] = {r["category"]: float(r["pct_per_year"]) for r in esc_df.to_dict(orient="records") if r["category"] and pd.notna(r["pct_per_year"])}
+    c_e1.caption("A row escalates at its own rate when it has an escalation_pct value (% per year; a column of the section tables and import sheets).")
+    data["settings"] = settings
+
     st.markdown("**CAPEX items**")
     capex_df = pd.DataFrame(fin.get("capex_items", []))
     if capex_df.empty:
@@ -316,69 +347,50 @@ if sec.get("finance", True):
 # -------- Import data (full) --------
 with st.expander("Import data (CSV/XLSX)"):
     up = st.file_uploader("Upload a workbook (.xlsx) with named sheets, or a CSV for a single section", type=["xlsx","csv"], key="full_import")
-    section = st.selectbox("Target section (for CSV only)", ["recipe","materials","utilities","byproducts","packaging","logistics","waste","rubrics","scenarios","capex","rampup"], key="full_import_section")
-    st.caption("XLSX supported sheets: recipe, materials, utilities, byproducts, packaging, logistics, waste, rubrics, scenarios, capex, rampup")
+    section = st.selectbox("Target section (for CSV only)", IMPORT_SECTIONS, key="full_import_section")
+    st.caption("XLSX supported sheets: " + ", ".join(IMPORT_SECTIONS))
     do = st.button("Import", key="do_full_import")
     if st.button("Download XLSX template", key="dl_template"):
-        bio_t = BytesIO()
-        with pd.ExcelWriter(bio_t, engine="openpyxl") as xw:
-            pd.DataFrame([{"name":"", "t_per_t":0.0, "unit":"t/t", "unit_cost":0.0, "cost_unit":f"{cur}/t", "price_source":"Benchmark", "taxable":True, "note":""}]).to_excel(xw, "recipe", index=False)
-            pd.DataFrame([{"name":"", "spec_per_t":0.0, "unit_spec":"kg/t", "unit_cost":0.0, "cost_unit":f"{cur}/kg", "price_source":"Benchmark", "taxable":False, "note":""}]).to_excel(xw, "materials", index=False)
-            pd.DataFrame([{"name":"Electricity","intensity_per_t":0.0,"unit_intensity":"kWh/t","tariff_per_unit":0.0,"tariff_unit":f"{cur}/kWh","price_source":"Benchmark","taxable":False,"note":""}]).to_excel(xw, "utilities", index=False)
-            pd.DataFrame([{"name":"", "credit_per_t":0.0, "unit":f"{cur}/t", "note":""}]).to_excel(xw, "byproducts", index=False)
-            pd.DataFrame([{"name":"", "units_per_t":0.0, "unit_cost":0.0, "cost_unit":f"{cur}/unit", "price_source":"Benchmark","taxable":True, "note":""}]).to_excel(xw, "packaging", index=False)
-            pd.DataFrame([{"name":"", "wet_t_per_t":1.0, "distance_km":0.0, "tariff_per_tkm":0.0, "cost_unit":f"{cur}/(t*km)","price_source":"Benchmark","taxable":True,"note":""}]).to_excel(xw, "logistics", index=False)
-            pd.DataFrame([{"name":"", "kg_per_t":0.0, "disposal_cost_per_kg":0.0, "cost_unit":f"{cur}/kg","price_source":"Benchmark","taxable":False,"note":""}]).to_excel(xw, "waste", index=False)
-            pd.DataFrame([{"name":"", "basis":"per_t", "quantity":0.0, "unit_cost":0.0, "cost_unit":f"{cur}/unit", "map_to_category":"Other","price_source":"Benchmark","taxable":False,"note":""}]).to_excel(xw, "rubrics", index=False)
-            pd.DataFrame([{"id":"base","name":"Base","costMultiplier":1.0,"quantityMultiplier":1.0,"contingencyPctDelta":0.0}]).to_excel(xw, "scenarios", index=False)
-            pd.DataFrame([{"name":"Equipment","amount":0.0,"year":0,"depr_years":10,"category":"Equipment"}]).to_excel(xw, "capex", index=False)
-            pd.DataFrame({"utilities_pct":[60,70,80,85,90,95,95,97,98,99,100,100],"logistics_packaging_pct":[40,55,70,80,85,90,95,97,98,99,100,100],"logistics_transport_pct":[30,45,65,75,85,90,95,97,98,99,100,100],"other_pct":[40,50,60,70,80,90,95,97,98,99,100,100],"price_pct":[100]*12}).to_excel(xw, "rampup", index=False)
-        st.download_button("Download template (xlsx)", data=bio_t.getvalue(), file_name="costing_import_template.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        with span("export", detail="template"):
+            template = template_workbook(cur)
+        st.download_button("Download template (xlsx)", data=template, file_name="costing_import_template.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
     if do and up is not None:
         try:
-            if up.name.lower().endswith(".csv"):
-                df = pd.read_csv(up)
-                tgt = section
-                if tgt == "recipe": data["recipe"] = df.to_dict("records")
-                elif tgt == "materials": data["process"]["materials"] = df.to_dict("records")
-                elif tgt == "utilities": data["process"]["utilities"] = df.to_dict("records")
-                elif tgt == "byproducts": data["process"]["byproducts"] = df.to_dict("records")
-                elif tgt == "packaging": data["packaging"] = df.to_dict("records")
-                elif tgt == "logistics": data["logistics"] = df.to_dict("records")
-                elif tgt == "waste": data["waste"] = df.to_dict("records")
-                elif tgt == "rubrics": data["rubrics"] = df.to_dict("records")
-                elif tgt == "scenarios": data["scenarios"] = df.to_dict("records")
-                elif tgt == "capex": data["finance"]["capex_items"] = df.to_dict("records")
-                elif tgt == "rampup": data["rampup"] = df.to_dict("list")
-                st.success(f"Imported CSV into {tgt}.")
-            else:
-                xls = pd.ExcelFile(up)
-                if "recipe" in xls.sheet_names: data["recipe"] = pd.read_excel(up, sheet_name="recipe").to_dict("records")
-                if "materials" in xls.sheet_names: data["process"]["materials"] = pd.read_excel(up, sheet_name="materials").to_dict("records")
-                if "utilities" in xls.sheet_names: data["process"]["utilities"] = pd.read_excel(up, sheet_name="utilities").to_dict("records")
-                if "byproducts" in xls.sheet_names: data["process"]["byproducts"] = pd.read_excel(up, sheet_name="byproducts").to_dict("records")
-                if "packaging" in xls.sheet_names: data["packaging"] = pd.read_excel(up, sheet_name="packaging").to_dict("records")
-                if "logistics" in xls.sheet_names: data["logistics"] = pd.read_excel(up, sheet_name="logistics").to_dict("records")
-                if "waste" in xls.sheet_names: data["waste"] = pd.read_excel(up, sheet_name="waste").to_dict("records")
-                if "rubrics" in xls.sheet_names: data["rubrics"] = pd.read_excel(up, sheet_name="rubrics").to_dict("records")
-                if "scenarios" in xls.sheet_names: data["scenarios"] = pd.read_excel(up, sheet_name="scenarios").to_dict("records")
-                if "capex" in xls.sheet_names: data["finance"]["capex_items"] = pd.read_excel(up, sheet_name="capex").to_dict("records")
-                if "rampup" in xls.sheet_names: data["rampup"] = pd.read_excel(up, sheet_name="rampup").to_dict("list")
-                st.success("Imported XLSX. Sheets found: " + ", ".join(xls.sheet_names))
+            st.success(import_summary(run_import(up, section)))
         except Exception as e:
             st.error(f"Import error: {e}")
 
-# Export snapshot
-st.subheader("Export data snapshot")
-bio = BytesIO()
-with pd.ExcelWriter(bio, engine="openpyxl") as xw:
-    pd.DataFrame(data.get("recipe", [])).to_excel(xw, sheet_name="recipe", index=False)
-    pd.DataFrame(data.get("process", {}).get("materials", [])).to_excel(xw, sheet_name="materials", index=False)
-    pd.DataFrame(data.get("process", {}).get("utilities", [])).to_excel(xw, sheet_name="utilities", index=False)
-    pd.DataFrame(data.get("process", {}).get("byproducts", [])).to_excel(xw, sheet_name="byproducts", index=False)
-    pd.DataFrame(data.get("packaging", [])).to_excel(xw, sheet_name="packaging", index=False)
-    pd.DataFrame(data.get("logistics", [])).to_excel(xw, sheet_name="logistics", index=False)
-    pd.DataFrame(data.get("waste", [])).to_excel(xw, sheet_name="waste", index=False)
-    pd.DataFrame(data.get("rubrics", [])).to_excel(xw, sheet_name="rubrics", index=False)
-    pd.DataFrame(data.get("finance", {}).get("capex_items", [])).to_excel(xw, sheet_name="capex", index=False)
-st.download_button("Download snapshot (xlsx)", data=bio.getvalue(), file_name="costing_snapshot.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+# -------- Project file (native snapshot: every section, lossless) --------
+st.subheader("Project file")
+pc1, pc2 = st.columns(2)
+with pc1:
+    if st.button("Prepare project file", key="prep_project"):
+        with span("export", detail="project file"):
+            project_file = cached("snapshot", data, lambda: write_snapshot(data))
+        st.download_button("Save project (" + SNAPSHOT_EXT + ")", data=project_file,
+                           file_name=(data["project"].get("name") or "project").strip().replace(" ", "_") + SNAPSHOT_EXT, mime="application/zip")
+with pc2:
+    up_proj = st.file_uploader("Open project", type=[SNAPSHOT_EXT.lstrip(".")], key="open_project")
+    if up_proj is not None and st.button("Open", key="do_open_project"):
+        try:
+            with span("import", detail="project file"):
+                st.session_state["data"] = read_snapshot(up_proj.getvalue())
+            st.rerun()
+        except Exception as e:
+            st.error(f"Open error: {e}")
+
+# Export snapshot (built on request only, cached by state fingerprint)
+st.subheader("Export data snapshot (xlsx)")
+if st.button("Prepare xlsx export", key="prep_xlsx"):
+    with span("export", detail="xlsx"):
+        xlsx = cached("xlsx_export", data, lambda: export_workbook(data))
+    st.download_button("Download snapshot (xlsx)", data=xlsx, file_name="costing_snapshot.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
+# Cells that could not be read as numbers, or cost units that do not match the quantity unit (costed as 0 until fixed)
+issues = table_issues(data)
+if issues:
+    st.warning(f"{len(issues)} cell(s) cannot be costed and count as 0: " + "; ".join(f"{i['section']} row {i['row'] + 1} {i['field']}={i['value']!r} ({i['problem']})" for i in issues[:10]) + (" …" if len(issues) > 10 else ""))
+
+# Freeze this run's edits: unchanged sections keep sharing the previous tables (and their cached fingerprints)
+commit_state(st)
+end_run()
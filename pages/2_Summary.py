@@ -2,10 +2,12 @@ import streamlit as st
 import pandas as pd
 import altair as alt
 from utils.state import ensure_state
-from utils.costing_core import compute_totals, ACCURACY_BANDS, compute_ramp_monthly
+from utils.costing_core import compute_totals, compute_totals_for_scenarios, ACCURACY_BANDS, compute_ramp_monthly
+from utils.profiling import begin_run, end_run, span
 
 st.set_page_config(page_title="Summary — Totals & Graphs", layout="wide")
 data = ensure_state(st)
+begin_run(st, "Summary")
 
 stage = data["project"]["stage"]
 cur = data["project"]["currency"]
@@ -99,24 +101,18 @@ with st.expander("Logistics / Waste / Custom / Additional costs"):
 st.subheader("Cost by Category")
 bycat = pd.DataFrame([{"Category":k, "Cost":v} for k,v in totals["byCategory"].items()])
 if not bycat.empty:
-    bar = alt.Chart(bycat).mark_bar().encode(
-        x=alt.X("Cost:Q", title=f"Cost ({cur})"),
-        y=alt.Y("Category:N", sort="-x"),
-        tooltip=[alt.Tooltip("Category:N"), alt.Tooltip("Cost:Q", format=",.2f")]
-    ).properties(height=350)
-    st.altair_chart(bar, use_container_width=True)
+    with span("chart", len(bycat), "cost by category"):
+        bar = alt.Chart(bycat).mark_bar().encode(
+            x=alt.X("Cost:Q", title=f"Cost ({cur})"),
+            y=alt.Y("Category:N", sort="-x"),
+            tooltip=[alt.Tooltip("Category:N"), alt.Tooltip("Cost:Q", format=",.2f")]
+        ).properties(height=350)
+        st.altair_chart(bar, use_container_width=True)
 
 st.subheader("Scenario Compare — Total & Unit Costs")
-rows = []
-original_active = data.get("activeScenarioId")
-for srow in data.get("scenarios", []):
-    data["activeScenarioId"] = srow["id"]
-    tt = compute_totals(data)
-    unit = (tt["total"]/tt["tpy"]) if tt["tpy"] else 0.0
-    rows.append({"Scenario": srow.get("name", srow["id"]), "Total": tt["total"], "Unit": unit,
-                 "Subtotal": tt["subtotal"], "Overhead": tt["overhead"], "Contingency": tt["contingency"], "Tax": tt["tax"], "RiskEMV": tt["riskEMV"]})
-data["activeScenarioId"] = original_active
-scen_df = pd.DataFrame(rows)
+tbl_s = compute_totals_for_scenarios(data)
+scen_df = pd.DataFrame({"Scenario": tbl_s["name"], "Total": tbl_s["total"], "Unit": tbl_s["unit"],
+                        "Subtotal": tbl_s["subtotal"], "Overhead": tbl_s["overhead"], "Contingency": tbl_s["contingency"], "Tax": tbl_s["tax"], "RiskEMV": tbl_s["riskEMV"]})
 if not scen_df.empty:
     show = scen_df.copy()
     def get_scale(total):
@@ -129,30 +125,32 @@ if not scen_df.empty:
         show[col] = show[col].apply(lambda x: x/sc)
     st.dataframe(show.style.format({"Total":"{:,.2f}","Unit":"{:,.2f}","Subtotal":"{:,.2f}","Overhead":"{:,.2f}","Contingency":"{:,.2f}","Tax":"{:,.2f}","RiskEMV":"{:,.2f}"}), use_container_width=True)
 
-    unit_chart = alt.Chart(scen_df).mark_bar().encode(
-        x=alt.X("Scenario:N", sort=None),
-        y=alt.Y("Unit:Q", title=f"Unit Cost ({cur}/t)"),
-        tooltip=["Scenario", alt.Tooltip("Unit:Q", format=",.2f")]
-    ).properties(height=280, title="Unit Cost by Scenario")
-    total_chart = alt.Chart(show).mark_bar().encode(
-        x=alt.X("Scenario:N", sort=None),
-        y=alt.Y("Total:Q", title=f"Total Cost ({cur})"),
-        tooltip=["Scenario", alt.Tooltip("Total:Q", format=",.2f")]
-    ).properties(height=280, title="Total Cost by Scenario")
-    st.altair_chart(unit_chart, use_container_width=True)
-    st.altair_chart(total_chart, use_container_width=True)
+    with span("chart", len(scen_df), "scenario compare"):
+        unit_chart = alt.Chart(scen_df).mark_bar().encode(
+            x=alt.X("Scenario:N", sort=None),
+            y=alt.Y("Unit:Q", title=f"Unit Cost ({cur}/t)"),
+            tooltip=["Scenario", alt.Tooltip("Unit:Q", format=",.2f")]
+        ).properties(height=280, title="Unit Cost by Scenario")
+        total_chart = alt.Chart(show).mark_bar().encode(
+            x=alt.X("Scenario:N", sort=None),
+            y=alt.Y("Total:Q", title=f"Total Cost ({cur})"),
+            tooltip=["Scenario", alt.Tooltip("Total:Q", format=",.2f")]
+        ).properties(height=280, title="Total Cost by Scenario")
+        st.altair_chart(unit_chart, use_container_width=True)
+        st.altair_chart(total_chart, use_container_width=True)
 
 st.subheader("Ramp-up — Utilities & Logistics subrubrics")
 ramp_df = compute_ramp_monthly(data)
 if not ramp_df.empty:
-    melted = ramp_df.melt(id_vars=["Month"], value_vars=["Utilities","Logistics - Packaging","Logistics - Transport","Other"], var_name="Bucket", value_name="Cost")
-    area = alt.Chart(melted).mark_area(opacity=0.7).encode(
-        x=alt.X("Month:O"),
-        y=alt.Y("Cost:Q", title=f"Monthly Cost ({cur})"),
-        color="Bucket:N",
-        tooltip=["Month","Bucket", alt.Tooltip("Cost:Q", format=",.2f")]
-    ).properties(height=300)
-    st.altair_chart(area, use_container_width=True)
+    with span("chart", len(ramp_df), "ramp-up"):
+        melted = ramp_df.melt(id_vars=["Month"], value_vars=["Utilities","Logistics - Packaging","Logistics - Transport","Other"], var_name="Bucket", value_name="Cost")
+        area = alt.Chart(melted).mark_area(opacity=0.7).encode(
+            x=alt.X("Month:O"),
+            y=alt.Y("Cost:Q", title=f"Monthly Cost ({cur})"),
+            color="Bucket:N",
+            tooltip=["Month","Bucket", alt.Tooltip("Cost:Q", format=",.2f")]
+        ).properties(height=300)
+        st.altair_chart(area, use_container_width=True)
 
     st.subheader("Ramp-up — tables (Year 1)")
     def _pad12(arr, fill=100):
@@ -171,3 +169,5 @@ if not ramp_df.empty:
     st.dataframe(tbl, use_container_width=True)
 else:
     st.info("Ramp-up data not available.")
+
+end_run()
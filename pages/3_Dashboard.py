@@ -1,12 +1,22 @@
+import os
 import streamlit as st
+import numpy as np
 import pandas as pd
 import altair as alt
 
 from utils.state import ensure_state
-from utils.costing_core import compute_totals, project_financials, ACCURACY_BANDS, compute_ramp_monthly
+from utils.costing_core import compute_totals, compute_totals_for_scenarios, project_financials, ACCURACY_BANDS, compute_ramp_monthly
+from utils.montecarlo import simulate
+from utils.sensitivity import tornado
+from utils.monthly import monthly_projection
+from utils.sweep import SWEEP_AXES, base_values, grid_sweep, surface
+from utils.goalseek import GOAL_VARIABLES, GOAL_METRICS, goal_seek, row_choices, current_metric
+from utils.cache import cached
+from utils.profiling import begin_run, end_run, span
 
 st.set_page_config(page_title="Dashboard — Finance & Custom Charts", layout="wide")
 data = ensure_state(st)
+begin_run(st, "Dashboard")
 
 st.header(f"Dashboard — {data['project']['name']}")
 
@@ -38,7 +48,7 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-irr_txt = "n/a" if proj["irr"] is None else f"{proj['irr']*100:,.2f}%"
+irr_txt = "n/a" if proj["irr"] is None else f"{proj['irr']*100:,.2f}%" + (" *" if proj.get("irr_status") == "multiple" else "")
 def _scale_fmt(cur, x):
     x = float(x)
     if abs(x) >= 1e9: return f"{cur} {x/1e9:,.2f} B"
@@ -59,40 +69,168 @@ with k5: kpi("Peak OPEX (annual)", _scale_fmt(cur, proj["peak_opex"]))
 with k6: kpi("Peak Revenue (annual)", _scale_fmt(cur, proj["peak_revenue"]))
 st.markdown('</div>', unsafe_allow_html=True)
 
-st.caption(f"{acc_label} — Currency: {cur} — Discount rate: {data['project']['discountRatePct']:.2f}% — Tax: {data['settings']['taxPct']:.2f}% — Escalation: {data['settings']['escalationPctPerYear']:.2f}%/y")
+if proj.get("irr_status") == "multiple":
+    st.caption("* Cash flows change sign more than once: several IRRs exist, the one closest to 0% is shown.")
+st.caption(f"{acc_label} — Currency: {cur} — Discount rate: {data['project']['discountRatePct']:.2f}% — Tax: {data['settings']['taxPct']:.2f}% — Escalation: {data['settings']['escalationPctPerYear']:.2f}%/y" + (" (+ category / row rates)" if len(proj["opex_series"]["cost"]) > 1 else ""))
 
 df = proj["years_df"].copy()
 df["Cum_FCF"] = df["FCF"].cumsum()
 
-left, right = st.columns([2,1])
-with left:
-    area = alt.Chart(df.melt(id_vars=["Year"], value_vars=["Revenue","OPEX","CAPEX","Tax","Depreciation"], var_name="Bucket", value_name="Amount")).mark_area(opacity=0.7).encode(
-        x="Year:O",
-        y=alt.Y("Amount:Q", title=f"Amount ({cur})"),
-        color="Bucket:N",
-        tooltip=["Year","Bucket", alt.Tooltip("Amount:Q", format=",.2f")]
-    ).properties(height=320, title="Annual Buckets")
-    st.altair_chart(area, use_container_width=True)
-
-    line = alt.Chart(df).mark_line(point=True).encode(
-        x="Year:O",
-        y=alt.Y("FCF:Q", title=f"Free Cash Flow ({cur})"),
-        tooltip=["Year", alt.Tooltip("FCF:Q", format=",.2f")]
-    ).properties(height=280, title="Free Cash Flow")
-    st.altair_chart(line, use_container_width=True)
-
-with right:
-    cum = alt.Chart(df).mark_line(point=True).encode(
-        x="Year:O",
-        y=alt.Y("Cum_FCF:Q", title=f" Cumulative FCF ({cur})"),
-        tooltip=["Year", alt.Tooltip("Cum_FCF:Q", format=",.2f")]
-    ).properties(height=320, title="Cumulative FCF")
-    st.altair_chart(cum, use_container_width=True)
+with span("chart", len(df), "projection"):
+    left, right = st.columns([2,1])
+    with left:
+        area = alt.Chart(df.melt(id_vars=["Year"], value_vars=["Revenue","OPEX","CAPEX","Tax","Depreciation"], var_name="Bucket", value_name="Amount")).mark_area(opacity=0.7).encode(
+            x="Year:O",
+            y=alt.Y("Amount:Q", title=f"Amount ({cur})"),
+            color="Bucket:N",
+            tooltip=["Year","Bucket", alt.Tooltip("Amount:Q", format=",.2f")]
+        ).properties(height=320, title="Annual Buckets")
+        st.altair_chart(area, use_container_width=True)
+
+        line = alt.Chart(df).mark_line(point=True).encode(
+            x="Year:O",
+            y=alt.Y("FCF:Q", title=f"Free Cash Flow ({cur})"),
+            tooltip=["Year", alt.Tooltip("FCF:Q", format=",.2f")]
+        ).properties(height=280, title="Free Cash Flow")
+        st.altair_chart(line, use_container_width=True)
+
+    with right:
+        cum = alt.Chart(df).mark_line(point=True).encode(
+            x="Year:O",
+            y=alt.Y("Cum_FCF:Q", title=f" Cumulative FCF ({cur})"),
+            tooltip=["Year", alt.Tooltip("Cum_FCF:Q", format=",.2f")]
+        ).properties(height=320, title="Cumulative FCF")
+        st.altair_chart(cum, use_container_width=True)
 
 st.subheader("Table — Projection")
 show = df.copy()
 st.dataframe(show.style.format({"CAPEX":"{:,.2f}","Revenue":"{:,.2f}","OPEX":"{:,.2f}","Depreciation":"{:,.2f}","Tax":"{:,.2f}","OCF":"{:,.2f}","FCF":"{:,.2f}","PV_FCF":"{:,.2f}","Cum_FCF":"{:,.2f}"}), use_container_width=True)
 
+ser = proj["opex_series"]
+if len(ser["cost"]) > 1:
+    with st.expander("OPEX escalation — by category / row"):
+        last = int(df["Year"].max())
+        esc_df = pd.DataFrame({"Series": ser["label"], "Escalation (%/y)": [r * 100.0 for r in ser["rate"]], "Year 0 OPEX": ser["cost"],
+                               f"Year {last} OPEX": [c * (1.0 + r) ** last for c, r in zip(ser["cost"], ser["rate"])]})
+        st.caption("Base-year OPEX (with its overhead and tax) per escalation rate. Rows with their own rate are split out of their category.")
+        st.dataframe(esc_df.style.format({"Escalation (%/y)": "{:,.2f}", "Year 0 OPEX": "{:,.2f}", f"Year {last} OPEX": "{:,.2f}"}), use_container_width=True, hide_index=True)
+
+with st.expander("Monthly projection — ramp-up, working capital, construction phasing"):
+    with span("analysis", detail="monthly projection"):
+        mp = monthly_projection(data)
+    c_m1, c_m2, c_m3 = st.columns(3)
+    c_m1.metric("NPV (monthly)", _scale_fmt(cur, mp["npv"]))
+    c_m2.metric("IRR (annualised)", "n/a" if mp["irr"] is None else f"{mp['irr']*100:,.2f}%")
+    c_m3.metric("Payback (month)", mp["payback_month"] if mp["payback_month"] is not None else "n/a")
+    st.caption(f"Construction: {data['project'].get('durationMonths', 12)} months before start-up (month 0); working capital {fin.get('working_capital_pct_of_opex', 0.0)}% of OPEX. Depreciation is non-cash here (tax effect only).")
+    mdf = mp["months_df"].copy()
+    mdf["Cum_FCF"] = mdf["FCF"].cumsum()
+    with span("chart", len(mdf), "monthly cash flow"):
+        st.altair_chart(alt.Chart(mdf).mark_line().encode(
+            x=alt.X("Month:Q"), y=alt.Y("Cum_FCF:Q", title=f"Cumulative FCF ({cur})"),
+            tooltip=["Month", alt.Tooltip("FCF:Q", format=",.2f"), alt.Tooltip("Cum_FCF:Q", format=",.2f")]
+        ).properties(height=260), use_container_width=True)
+    st.dataframe(mp["years_df"].style.format({c: "{:,.2f}" for c in ["CAPEX","Revenue","OPEX","Depreciation","Tax","OCF","FCF","PV_FCF"]}), use_container_width=True, hide_index=True)
+
+with st.expander("Monte Carlo — cost & NPV uncertainty"):
+    st.caption("Samples each row's price (range by price_source within the stage accuracy band) and quantity, plus risk occurrences.")
+    c_mc1, c_mc2 = st.columns(2)
+    mc_iter = c_mc1.select_slider("Iterations", options=[10_000, 100_000, 1_000_000], value=10_000, key="mc_iter")
+    mc_seed = int(c_mc2.number_input("Seed", value=42, step=1, key="mc_seed"))
+    if st.button("Run simulation", key="mc_run"):
+        mc = simulate(data, iterations=mc_iter, seed=mc_seed, n_jobs=(os.cpu_count() or 1) if mc_iter >= 1_000_000 else 1)
+        mc_df = pd.DataFrame([{"Metric": label, "P10": mc[k]["p10"], "P50": mc[k]["p50"], "P90": mc[k]["p90"], "Mean": mc[k]["mean"]}
+                              for k, label in [("total", f"Total cost ({cur})"), ("unit", f"Unit cost ({cur}/t)"), ("npv", f"NPV ({cur})")]])
+        st.dataframe(mc_df.style.format({"P10":"{:,.2f}","P50":"{:,.2f}","P90":"{:,.2f}","Mean":"{:,.2f}"}), use_container_width=True, hide_index=True)
+
+with st.expander("Sensitivity — tornado"):
+    c_t1, c_t2, c_t3 = st.columns(3)
+    tor_pct = c_t1.slider("Swing ±%", 1, 50, 10, key="tor_pct")
+    tor_metric = c_t2.selectbox("Metric", ["Unit cost", "NPV"], key="tor_metric")
+    tor_top = int(c_t3.number_input("Top drivers", min_value=3, max_value=50, value=12, step=1, key="tor_top"))
+    m = "unit" if tor_metric == "Unit cost" else "npv"
+    with span("analysis", detail="tornado"):
+        tor = tornado(data, pct=float(tor_pct), metric=m)
+    base_val = tor["base_unit"] if m == "unit" else tor["base_npv"]
+    top = [r for r in tor["rows"] if r[m + "_swing"] > 0][:tor_top]
+    if top:
+        tor_df = pd.DataFrame([{"Driver": r["driver"], "Case": case, "Delta": r[f"{m}_{side}"] - base_val}
+                               for r in top for case, side in ((f"-{tor_pct}%", "low"), (f"+{tor_pct}%", "high"))])
+        with span("chart", len(tor_df), "tornado"):
+            chart = alt.Chart(tor_df).mark_bar().encode(
+                y=alt.Y("Driver:N", sort=[r["driver"] for r in top], title=None),
+                x=alt.X("Delta:Q", title=f"Change in {tor_metric.lower()} ({cur}{'/t' if m == 'unit' else ''}) vs base {base_val:,.2f}"),
+                color=alt.Color("Case:N"),
+                tooltip=["Driver", "Case", alt.Tooltip("Delta:Q", format=",.2f")]
+            ).properties(height=max(160, 28 * len(top)))
+            st.altair_chart(chart, use_container_width=True)
+    else:
+        st.info("No driver moves this metric.")
+
+with st.expander("Scenario grid sweep — NPV / unit cost surfaces"):
+    st.caption("Every combination of the ranges below (the active scenario's contingency delta is kept). Unit cost only depends on the two multipliers.")
+    sw_base = base_values(data)
+    if sw_base["price"] <= 0:
+        sw_base["price"] = totals_now["total"] / totals_now["tpy"] if totals_now["tpy"] else 0.0
+    sw_defaults = {"costMultiplier": (0.8, 1.2, 11), "quantityMultiplier": (0.8, 1.2, 11), "price": (round(sw_base["price"] * 0.7, 2), round(sw_base["price"] * 1.3, 2), 11),
+                   "discountPct": (max(0.0, sw_base["discountPct"] - 6.0), sw_base["discountPct"] + 6.0, 7), "escalationPct": (0.0, max(6.0, sw_base["escalationPct"] * 2), 7)}
+    sw_ranges = {}
+    for k, label in SWEEP_AXES.items():
+        c_s1, c_s2, c_s3 = st.columns(3)
+        lo, hi, n = sw_defaults[k]
+        lo = c_s1.number_input(f"{label} — from", value=float(lo), key=f"sw_{k}_lo")
+        hi = c_s2.number_input(f"{label} — to", value=float(hi), key=f"sw_{k}_hi")
+        n = int(c_s3.number_input(f"{label} — steps", min_value=1, max_value=101, value=n, step=1, key=f"sw_{k}_n"))
+        sw_ranges[k] = (lo, hi, n)
+    sw_axes = {k: np.linspace(lo, hi, n) for k, (lo, hi, n) in sw_ranges.items()}
+    with span("analysis", detail="grid sweep"):
+        sw = cached("sweep", data, lambda: grid_sweep(data, sw_axes), tuple(sw_ranges.items()))
+    st.write(f"{sw['points']:,} grid points evaluated in {sw['seconds']:.2f}s")
+    c_h1, c_h2, c_h3 = st.columns(3)
+    sw_metric = c_h1.selectbox("Metric", ["NPV", "Unit cost"], key="sw_metric")
+    sw_x = c_h2.selectbox("X axis", list(SWEEP_AXES), index=2, format_func=SWEEP_AXES.get, key="sw_x")
+    sw_y = c_h3.selectbox("Y axis", [k for k in SWEEP_AXES if k != sw_x], format_func=SWEEP_AXES.get, key="sw_y")
+    sw_at = {}
+    for k in SWEEP_AXES:
+        if k not in (sw_x, sw_y) and len(sw["axes"][k]) > 1:
+            opts = sw["axes"][k].tolist()
+            near = min(range(len(opts)), key=lambda i: abs(opts[i] - sw["base"][k]))
+            sw_at[k] = opts.index(st.select_slider(f"{SWEEP_AXES[k]} held at", options=opts, value=opts[near], format_func=lambda v: f"{v:,.3g}", key=f"sw_at_{k}"))
+    with span("chart", detail="sweep heatmap") as sp:
+        sw_df = pd.DataFrame(surface(sw, sw_x, sw_y, "npv" if sw_metric == "NPV" else "unit", sw_at))
+        sp.rows(len(sw_df))
+        st.altair_chart(alt.Chart(sw_df).mark_rect().encode(
+            x=alt.X("x:O", title=SWEEP_AXES[sw_x], axis=alt.Axis(format=",.3g")),
+            y=alt.Y("y:O", title=SWEEP_AXES[sw_y], sort="descending", axis=alt.Axis(format=",.3g")),
+            color=alt.Color("value:Q", title=f"{sw_metric} ({cur}{'/t' if sw_metric == 'Unit cost' else ''})", scale=alt.Scale(scheme="redyellowgreen", reverse=sw_metric == "Unit cost")),
+            tooltip=[alt.Tooltip("x:Q", title=SWEEP_AXES[sw_x], format=",.4g"), alt.Tooltip("y:Q", title=SWEEP_AXES[sw_y], format=",.4g"), alt.Tooltip("value:Q", title=sw_metric, format=",.2f")]
+        ).properties(height=360), use_container_width=True)
+
+with st.expander("Breakeven / goal seek"):
+    st.caption("Solves for one input so that the chosen metric hits the target, in every scenario at once. Other inputs stay as entered.")
+    c_g1, c_g2, c_g3 = st.columns(3)
+    gs_metric = c_g1.selectbox("Metric", list(GOAL_METRICS), format_func=GOAL_METRICS.get, key="gs_metric")
+    gs_default = {"npv": 0.0, "irr": float(data["project"].get("discountRatePct", 10.0)), "unit": round(current_metric(data, "unit"), 2)}[gs_metric]
+    gs_target = c_g2.number_input(f"Target {GOAL_METRICS[gs_metric]}", value=gs_default, key=f"gs_target_{gs_metric}")
+    gs_var = c_g3.selectbox("Solve for", list(GOAL_VARIABLES), format_func=GOAL_VARIABLES.get, key="gs_var")
+    gs_row = None
+    if gs_var == "row":
+        gs_rows = row_choices(data)
+        if gs_rows:
+            gs_idx = st.selectbox("Row", range(len(gs_rows)), format_func=lambda i: gs_rows[i]["label"], key="gs_row")
+            gs_row = gs_rows[gs_idx]
+        else:
+            st.info("No costed rows yet.")
+    if gs_var != "row" or gs_row is not None:
+        gs_key = (gs_row["section"], gs_row["row"], gs_row["field"]) if gs_row else None
+        with span("analysis", detail="goal seek"):
+            gs = cached("goalseek", data, lambda: goal_seek(data, gs_var, gs_metric, float(gs_target), gs_row), gs_var, gs_metric, float(gs_target), gs_key)
+        gs_df = pd.DataFrame(gs).drop(columns=["id"]).rename(columns={"name": "Scenario", "current": "Current", "solution": "Solution", "change": "Change", "achieved": f"Achieved {GOAL_METRICS[gs_metric]}", "status": "Status"})
+        st.dataframe(gs_df.style.format({c: "{:,.4g}" for c in ["Current", "Solution", "Change"]} | {f"Achieved {GOAL_METRICS[gs_metric]}": "{:,.2f}"}, na_rep="—"), use_container_width=True, hide_index=True)
+        active = next((i for i, sid in enumerate(gs["id"]) if sid == data.get("activeScenarioId")), 0)
+        if gs["status"][active] == "ok":
+            st.write(f"Active scenario: **{GOAL_VARIABLES[gs_var] if gs_var != 'row' else gs_row['label']} = {gs['solution'][active]:,.4g}** gives {GOAL_METRICS[gs_metric]} = {gs_target:,.2f}")
+
 st.subheader("Custom Chart Builder")
 st.caption("Build your own charts from available datasets.")
 totals_now = compute_totals(data)
@@ -102,16 +240,9 @@ datasets = {
     "Ramp-up (monthly cost)": None,
     "Finance (projection)": df.copy(),
 }
-rows = []
-original_active = data.get("activeScenarioId")
-for srow in data.get("scenarios", []):
-    data["activeScenarioId"] = srow["id"]
-    tt = compute_totals(data)
-    unit = (tt["total"]/tt["tpy"]) if tt["tpy"] else 0.0
-    rows.append({"Scenario": srow.get("name", srow["id"]), "Total": tt["total"], "Unit": unit,
-                 "Subtotal": tt["subtotal"], "Overhead": tt["overhead"], "Contingency": tt["contingency"], "Tax": tt["tax"], "RiskEMV": tt["riskEMV"]})
-data["activeScenarioId"] = original_active
-datasets["Scenarios (summary)"] = pd.DataFrame(rows)
+tbl_s = compute_totals_for_scenarios(data)
+datasets["Scenarios (summary)"] = pd.DataFrame({"Scenario": tbl_s["name"], "Total": tbl_s["total"], "Unit": tbl_s["unit"],
+                                               "Subtotal": tbl_s["subtotal"], "Overhead": tbl_s["overhead"], "Contingency": tbl_s["contingency"], "Tax": tbl_s["tax"], "RiskEMV": tbl_s["riskEMV"]})
 ramp_df = compute_ramp_monthly(data)
 if not ramp_df.empty:
     datasets["Ramp-up (monthly cost)"] = ramp_df.melt(id_vars=["Month"], var_name="Bucket", value_name="Cost")
@@ -125,26 +256,29 @@ else:
     y = st.selectbox("Y", cols, key="cust_y")
     series = st.multiselect("Series (optional)", [c for c in cols if c not in [x, y]], key="cust_series")
     chart_type = st.selectbox("Chart type", ["bar","line","area","point"])
-    base = alt.Chart(ds)
-    if chart_type == "bar":
-        enc = base.mark_bar()
-    elif chart_type == "line":
-        enc = base.mark_line(point=True)
-    elif chart_type == "area":
-        enc = base.mark_area(opacity=0.7)
-    else:
-        enc = base.mark_point()
-    if series:
-        chart = enc.encode(
-            x=f"{x}:O" if ds[x].dtype.kind in "biu" else f"{x}:N",
-            y=f"{y}:Q",
-            color=series[0]+":N",
-            tooltip=[x, y] + series[:1]
-        ).properties(height=320, title=f"{ds_name}")
-    else:
-        chart = enc.encode(
-            x=f"{x}:O" if ds[x].dtype.kind in "biu" else f"{x}:N",
-            y=f"{y}:Q",
-            tooltip=[x, y]
-        ).properties(height=320, title=f"{ds_name}")
-    st.altair_chart(chart, use_container_width=True)
+    with span("chart", len(ds), "custom"):
+        base = alt.Chart(ds)
+        if chart_type == "bar":
+            enc = base.mark_bar()
+        elif chart_type == "line":
+            enc = base.mark_line(point=True)
+        elif chart_type == "area":
+            enc = base.mark_area(opacity=0.7)
+        else:
+            enc = base.mark_point()
+        if series:
+            chart = enc.encode(
+                x=f"{x}:O" if ds[x].dtype.kind in "biu" else f"{x}:N",
+                y=f"{y}:Q",
+                color=series[0]+":N",
+                tooltip=[x, y] + series[:1]
+            ).properties(height=320, title=f"{ds_name}")
+        else:
+            chart = enc.encode(
+                x=f"{x}:O" if ds[x].dtype.kind in "biu" else f"{x}:N",
+                y=f"{y}:Q",
+                tooltip=[x, y]
+            ).properties(height=320, title=f"{ds_name}")
+        st.altair_chart(chart, use_container_width=True)
+
+end_run()
@@ -2,9 +2,11 @@
 import streamlit as st
 from utils.state import ensure_state
 from utils.assistant import answer, render_quick_help_sidebar
+from utils.profiling import begin_run, end_run, span
 
 st.set_page_config(page_title="Help & Chat", layout="wide")
 data = ensure_state(st)
+begin_run(st, "Help & Chat")
 render_quick_help_sidebar(st, data)
 
 st.title("Help & Chat")
@@ -31,7 +33,8 @@ if clicked:
     st.session_state["help_chat"].append({"role":"user","content":clicked})
     with st.chat_message("user"):
         st.markdown(clicked)
-    reply = answer(clicked, data)
+    with span("assistant"):
+        reply = answer(clicked, data)
     st.session_state["help_chat"].append({"role":"assistant","content":reply})
     with st.chat_message("assistant"):
         st.markdown(reply)
@@ -41,7 +44,10 @@ if prompt:
     st.session_state["help_chat"].append({"role":"user","content":prompt})
     with st.chat_message("user"):
         st.markdown(prompt)
-    reply = answer(prompt, data)
+    with span("assistant"):
+        reply = answer(prompt, data)
     st.session_state["help_chat"].append({"role":"assistant","content":reply})
     with st.chat_message("assistant"):
         st.markdown(reply)
+
+end_run()
@@ -0,0 +1,53 @@
+import streamlit as st
+import pandas as pd
+import altair as alt
+
+from utils.cache import RESULTS, SECTIONS
+from utils.costing_core import ENGINE
+from utils.profiling import ENABLED_KEY, MAX_RUNS, begin_run, recorded_runs, clear_runs, run_table, stage_table
+
+st.set_page_config(page_title="Performance — Timings", layout="wide")
+begin_run(st, "Performance", record=False)  # this page only reads the buffer
+st.header("Performance — rerun timings")
+st.caption(f"Times the costing sections, compute functions, imports/exports and charts of this session's page reruns (last {MAX_RUNS}). "
+           "Recording is per session and off by default; turn it on, use the other pages, then come back here.")
+
+c1, c2 = st.columns([3, 1])
+c1.toggle("Record timings for this session", key=ENABLED_KEY)
+if c2.button("Clear recorded runs", key="perf_clear"):
+    clear_runs(st)
+
+st.subheader("Result caches (process-wide)")
+k1, k2, k3 = st.columns(3)
+for col, label, cache in ((k1, "Whole-state results", RESULTS), (k2, "Section results", SECTIONS)):
+    s = cache.stats()
+    calls = s["hits"] + s["misses"]
+    col.metric(label, f"{s['size']} / {s['maxsize']} entries", f"{s['hits'] / calls:.0%} hit rate ({calls:,} calls)" if calls else "no calls yet", delta_color="off")
+k3.metric("Costing engine", ENGINE)
+
+runs = recorded_runs(st)
+if not runs:
+    st.info("No reruns recorded yet." if st.session_state.get(ENABLED_KEY) else "Recording is off.")
+    st.stop()
+
+st.subheader("Reruns")
+runs_df = pd.DataFrame(run_table(runs))
+st.altair_chart(alt.Chart(runs_df).mark_bar().encode(
+    x=alt.X("run:O", title="Rerun"), y=alt.Y("ms:Q", title="Time (ms)"), color="page:N",
+    tooltip=["run", "page", "started", alt.Tooltip("ms:Q", format=",.1f"), "slowest", alt.Tooltip("slowest_ms:Q", format=",.1f")]
+).properties(height=260), use_container_width=True)
+st.dataframe(runs_df.iloc[::-1].style.format({"ms": "{:,.1f}", "slowest_ms": "{:,.1f}"}), use_container_width=True, hide_index=True)
+
+st.subheader("Slowest stages (all recorded reruns)")
+st.caption("Nested stages are counted inside their parents too (a section inside compute_totals). Cache hits show up as near-zero times.")
+stages_df = pd.DataFrame(stage_table(runs), columns=["stage", "calls", "total_ms", "mean_ms", "max_ms", "max_rows"])
+st.dataframe(stages_df.style.format({"total_ms": "{:,.1f}", "mean_ms": "{:,.2f}", "max_ms": "{:,.1f}", "max_rows": "{:,.0f}"}, na_rep="—"), use_container_width=True, hide_index=True)
+
+st.subheader("Rerun detail")
+pick = st.selectbox("Rerun", list(range(len(runs)))[::-1], format_func=lambda i: f"#{i + 1} {runs[i]['page']} — {runs[i]['ms']:,.1f} ms", key="perf_pick")
+spans_df = pd.DataFrame(sorted(runs[pick]["spans"], key=lambda s: (s["start_ms"], s["depth"])), columns=["stage", "start_ms", "ms", "rows", "depth", "error"])
+if spans_df.empty:
+    st.info("No spans in this rerun.")
+else:
+    spans_df["stage"] = ["    " * d + name for d, name in zip(spans_df["depth"], spans_df["stage"])]
+    st.dataframe(spans_df.drop(columns=["depth"]).style.format({"start_ms": "{:,.1f}", "ms": "{:,.2f}", "rows": "{:,.0f}"}, na_rep="—"), use_container_width=True, hide_index=True)
@@ -0,0 +1,73 @@
+import os
+import streamlit as st
+import pandas as pd
+
+from utils.portfolio import project_files, run_portfolio, within_root
+from utils.profiling import begin_run, end_run, span
+
+st.set_page_config(page_title="Portfolio — Rank Snapshots", layout="wide")
+begin_run(st, "Portfolio")
+st.header("Portfolio — rank project snapshots")
+st.caption("Evaluates every scenario of every project file (.csnap from Details → Save project, or an xlsx snapshot) in a process pool. Results are cached and shared between sessions, so a run only happens once per set of files.")
+
+# Server-side projects are read only under this directory (env var or Streamlit secret); unset = uploads only.
+ROOT_KEY = "COSTING_PORTFOLIO_ROOT"
+
+# Where Streamlit reads secrets.toml; st.secrets is only touched when one exists, since it draws an error box otherwise.
+SECRETS_FILES = [os.path.join(os.path.expanduser("~"), ".streamlit", "secrets.toml"), os.path.join(os.getcwd(), ".streamlit", "secrets.toml")]
+
+def portfolio_root():
+    root = os.environ.get(ROOT_KEY)
+    if not root and any(os.path.isfile(f) for f in SECRETS_FILES):
+        try:
+            root = st.secrets.get(ROOT_KEY)
+        except Exception:  # unreadable secrets file
+            root = None
+    return root if root and os.path.isdir(root) else None
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _run_dir(files: tuple, signature: tuple):
+    return run_portfolio(list(files))
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _run_uploads(files: tuple):
+    return run_portfolio(list(files))
+
+root = portfolio_root()
+src = st.radio("Source", ["Upload snapshots", "Server directory"] if root else ["Upload snapshots"], horizontal=True, key="pf_src")
+if src == "Upload snapshots":
+    if not root:
+        st.caption(f"Server directories are available when {ROOT_KEY} (environment variable or secret) names the directory they are read from.")
+    ups = st.file_uploader("Project files (.csnap / .xlsx)", type=["csnap", "xlsx"], accept_multiple_files=True, key="pf_up")
+    if ups and st.button("Evaluate", key="pf_run_up"):
+        with st.spinner(f"Evaluating {len(ups)} snapshots..."), span("portfolio", len(ups)):
+            st.session_state["pf_result"] = _run_uploads(tuple((u.name, u.getvalue()) for u in ups))
+else:
+    directory = st.text_input(f"Directory (under {root})", key="pf_dir")
+    if st.button("Evaluate", key="pf_run_dir"):
+        target = within_root(root, directory)
+        if target is None:
+            st.error(f"Only directories under {root} can be read.")
+        elif not target.is_dir():
+            st.error("Directory not found.")
+        else:
+            files = tuple(project_files(target, root))
+            # mtime/size signature: edited or added files invalidate the cached run.
+            sig = tuple((name, os.stat(path).st_mtime_ns, os.stat(path).st_size) for name, path in files)
+            with st.spinner(f"Evaluating {len(files)} snapshots..."), span("portfolio", len(files)):
+                st.session_state["pf_result"] = _run_dir(files, sig)
+
+res = st.session_state.get("pf_result")
+if res is not None:
+    df, stats = res
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Projects", stats["projects"])
+    c2.metric("Rows (project × scenario)", stats["rows"])
+    c3.metric("Errors", stats["errors"])
+    c4.metric("Throughput", f"{stats['projects_per_sec']:,.1f} projects/s")
+    rank_by = st.selectbox("Rank by", ["npv", "irr", "unit_cost"], key="pf_rank")
+    show = df.sort_values(rank_by, ascending=(rank_by == "unit_cost"), na_position="last", kind="stable").reset_index(drop=True)
+    st.dataframe(show.style.format({"total":"{:,.2f}","unit_cost":"{:,.2f}","npv":"{:,.2f}","irr":"{:.2%}"}, na_rep="n/a"), use_container_width=True)
+    st.download_button("Download results (CSV)", data=show.to_csv(index=False).encode("utf-8"), file_name="portfolio_results.csv", mime="text/csv")
+
+end_run()
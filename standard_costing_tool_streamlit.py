@@ -6,3 +6,5 @@ st.title("Standard Costing Tool — Process Products")
 st.page_link("pages/1_Details.py", label="Details — Inputs & Calculations")
 st.page_link("pages/2_Summary.py", label="Summary — Totals & Graphs")
 st.page_link("pages/3_Dashboard.py", label="Dashboard — Finance & Custom Charts")
+st.page_link("pages/6_Portfolio.py", label="Portfolio — Rank Project Snapshots")
+st.page_link("pages/5_Performance.py", label="Performance — Rerun Timings")
@@ -2,7 +2,12 @@
 # Precise, no-API assistant: intents (recipes) + Glossary + BM25 retrieval + guided mode.
 import re
 import textwrap
-from typing import Dict, Any, List
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple
+import numpy as np
+
+from .matcher import PhraseMatcher
 
 # ---------- Glossary (definitions) ----------
 GLOSSARY: Dict[str, Dict[str, Any]] = {
@@ -255,76 +260,125 @@ INTENT_RECIPES = {
     "add_byproduct": _steps_add_byproduct,
 }
 
-INTENT_PATTERNS = [
-    ("add_utility", r"\b(add|create|new)\b.*\b(utility|utilities|steam|electricity|water|fuel)\b"),
-    ("set_price", r"\b(set|enter|change)\b.*\b(price|selling price|sell price)\b"),
-    ("add_capex", r"\b(add|enter|record)\b.*\b(capex|capital)\b"),
-    ("import_quick", r"\b(import|upload)\b.*\b(csv|xlsx|file)\b"),
-    ("import_full", r"\b(full|template)\b.*\b(import)\b"),
-    ("export_snapshot", r"\b(export|download)\b.*\b(snapshot|xlsx|file)\b"),
-    ("add_scenario", r"\b(add|create)\b.*\b(scenario)\b"),
-    ("change_currency", r"\b(change|set)\b.*\b(currency)\b"),
-    ("toggle_rubric", r"\b(show|hide|toggle|display)\b.*\b(rubric|section)\b"),
-    ("adjust_rampup", r"\b(ramp|ramp-up|ramp up|month)\b"),
-    ("add_packaging", r"\b(add|create)\b.*\b(packaging|bag|big bag|sack|pallet)\b"),
-    ("add_transport", r"\b(add|create)\b.*\b(transport|logistics|shipping|truck|km)\b"),
-    ("add_waste", r"\b(add|create)\b.*\b(waste|disposal)\b"),
-    ("add_byproduct", r"\b(add|create)\b.*\b(byproduct|credit)\b"),
+# intent -> phrase groups that must appear in this order as whole words (first intent that matches wins)
+INTENT_KEYWORDS: List[Tuple[str, List[List[str]]]] = [
+    ("add_utility", [["add", "create", "new"], ["utility", "utilities", "steam", "electricity", "water", "fuel"]]),
+    ("set_price", [["set", "enter", "change"], ["price", "selling price", "sell price"]]),
+    ("add_capex", [["add", "enter", "record"], ["capex", "capital"]]),
+    ("import_quick", [["import", "upload"], ["csv", "xlsx", "file"]]),
+    ("import_full", [["full", "template"], ["import"]]),
+    ("export_snapshot", [["export", "download"], ["snapshot", "xlsx", "file"]]),
+    ("add_scenario", [["add", "create"], ["scenario"]]),
+    ("change_currency", [["change", "set"], ["currency"]]),
+    ("toggle_rubric", [["show", "hide", "toggle", "display"], ["rubric", "section"]]),
+    ("adjust_rampup", [["ramp", "ramp-up", "ramp up", "month"]]),
+    ("add_packaging", [["add", "create"], ["packaging", "bag", "big bag", "sack", "pallet"]]),
+    ("add_transport", [["add", "create"], ["transport", "logistics", "shipping", "truck", "km"]]),
+    ("add_waste", [["add", "create"], ["waste", "disposal"]]),
+    ("add_byproduct", [["add", "create"], ["byproduct", "credit"]]),
 ]
 
 # ---------- Retrieval (BM25) ----------
-try:
-    from rank_bm25 import BM25Okapi
-    _HAS_BM25 = True
-except Exception:
-    _HAS_BM25 = False
-
-def _bm25_answer(query: str, currency: str) -> str:
-    docs = [(sec["title"] + ". " + sec["content"].replace("{CUR}", currency)) for sec in GUIDE_SECTIONS]
-    if not _HAS_BM25:
-        return _keyword_answer(query, currency)
-    tokenized = [re.findall(r"[a-z0-9]+", d.lower()) for d in docs]
-    bm25 = BM25Okapi(tokenized)
-    qtok = re.findall(r"[a-z0-9]+", query.lower())
-    scores = bm25.get_scores(qtok)
-    idxs = sorted(range(len(docs)), key=lambda i: scores[i], reverse=True)[:3]
-    bullets = []
-    for i in idxs:
-        title = GUIDE_SECTIONS[i]["title"]
-        body = GUIDE_SECTIONS[i]["content"].replace("{CUR}", currency)
-        bullets.append("**" + title + "**\n- " + "\n- ".join(textwrap.wrap(body, width=110)))
-    return "\n\n".join(bullets)
-
-def _keyword_answer(query: str, currency: str) -> str:
-    scored = []
-    for sec in GUIDE_SECTIONS:
-        body = sec["content"].replace("{CUR}", currency)
-        q = query.lower()
-        score = sum(1 for w in re.findall(r"[a-z0-9]+", q) if w in (sec["title"] + " " + body).lower())
-        scored.append((score, sec["title"], body))
-    scored.sort(key=lambda x: x[0], reverse=True)
-    chunks = []
-    for _, title, body in scored[:3]:
-        chunks.append("**" + title + "**\n- " + "\n- ".join(textwrap.wrap(body, width=110)))
-    return "\n\n".join(chunks) if chunks else "Try: enable **Rubrics to display**, fill the relevant table(s), then check **Summary** and **Dashboard**."
+# Okapi BM25 (same scores as rank_bm25.BM25Okapi: k1=1.5, b=0.75, negative IDFs floored at 0.25 × mean IDF) over
+# the guide sections, glossary entries and in-app playbooks, indexed once per process and currency: postings per
+# term (CSR) carrying idf × saturated tf, so a query is one bincount over the postings of its terms.
+_TOKEN = re.compile(r"[a-z0-9]+")
+BM25_K1, BM25_B, BM25_EPSILON = 1.5, 0.75, 0.25
+# question words and fillers: with glossary and playbooks in the corpus they would outrank the actual subject
+_STOPWORDS = frozenset("a an and are as at be by can do does for from how i in is it me my of on or should the this to what when where which why with you your".split())
+
+def _tokens(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS]
+
+class HelpIndex:
+    __slots__ = ("titles", "bodies", "vocab", "idf", "indptr", "docs", "weights")
+
+    def __init__(self, passages: List[Tuple[str, str]]):
+        self.titles = [t for t, _ in passages]
+        self.bodies = [b for _, b in passages]
+        counts = [Counter(_tokens(t + ". " + b)) for t, b in passages]
+        n = len(counts)
+        lengths = np.array([sum(c.values()) for c in counts], dtype=float)
+        self.vocab: Dict[str, int] = {}
+        term_ids, doc_ids, tfs = [], [], []
+        for d, c in enumerate(counts):
+            for tok, tf in c.items():
+                term_ids.append(self.vocab.setdefault(tok, len(self.vocab)))
+                doc_ids.append(d)
+                tfs.append(tf)
+        term_ids = np.array(term_ids, dtype=np.intp)
+        order = np.argsort(term_ids, kind="stable")
+        df = np.bincount(term_ids, minlength=len(self.vocab)).astype(float)
+        idf = np.log(n - df + 0.5) - np.log(df + 0.5)
+        self.idf = np.where(idf < 0, BM25_EPSILON * idf.mean(), idf) if idf.size else idf
+        self.indptr = np.concatenate([[0], np.cumsum(df)]).astype(np.intp)
+        self.docs = np.array(doc_ids, dtype=np.intp)[order]
+        tf = np.array(tfs, dtype=float)[order]
+        norm = 1.0 - BM25_B + BM25_B * lengths[self.docs] / (lengths.mean() if n else 1.0)
+        self.weights = self.idf[term_ids[order]] * tf * (BM25_K1 + 1.0) / (tf + BM25_K1 * norm)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def scores(self, query: str) -> np.ndarray:
+        ids = [self.vocab[t] for t in _tokens(query) if t in self.vocab]  # repeated query terms count again
+        if not ids:
+            return np.zeros(len(self))
+        sl = [slice(self.indptr[i], self.indptr[i + 1]) for i in ids]
+        return np.bincount(np.concatenate([self.docs[s] for s in sl]), weights=np.concatenate([self.weights[s] for s in sl]), minlength=len(self))
+
+    def top(self, query: str, k: int = 3, exclude: range = range(0)) -> List[int]:
+        """Best k passages outside `exclude`; ties keep corpus order (scores rounded, so summation order cannot break a tie)."""
+        order = np.argsort(-np.round(self.scores(query), 12), kind="stable")
+        return [int(i) for i in order if i not in exclude][:k]
+
+def help_passages(currency: str) -> List[Tuple[str, str]]:
+    """(title, body) for every retrievable passage, {CUR} filled in: guide sections, glossary entries, then the
+    intent playbooks (PLAYBOOK_PASSAGES)."""
+    out = [(sec["title"], sec["content"].replace("{CUR}", currency)) for sec in GUIDE_SECTIONS]
+    for term, e in GLOSSARY.items():
+        parts = [e.get("definition", "")] + [f"{label}: {e[key]}" for key, label in (("formula", "Formula"), ("example", "Example"), ("in_app", "In this app")) if e.get(key)]
+        if e.get("aliases"):
+            parts.append("Also called: " + ", ".join(e["aliases"]))
+        out.append((f"Glossary — {term}", " ".join(parts)))
+    for name, steps in INTENT_RECIPES.items():
+        out.append(("How to: " + name.replace("_", " "), " ".join(steps(currency))))
+    return out
+
+# positions of the playbooks in help_passages: an intent answer already shows its steps, so its "More details" skips them
+PLAYBOOK_PASSAGES = range(len(GUIDE_SECTIONS) + len(GLOSSARY), len(GUIDE_SECTIONS) + len(GLOSSARY) + len(INTENT_RECIPES))
+
+@lru_cache(maxsize=16)
+def help_index(currency: str) -> HelpIndex:
+    return HelpIndex(help_passages(currency))
+
+@lru_cache(maxsize=16)
+def _rendered(currency: str) -> Tuple[str, ...]:
+    idx = help_index(currency)
+    return tuple("**" + t + "**\n- " + "\n- ".join(textwrap.wrap(b, width=110)) for t, b in zip(idx.titles, idx.bodies))
+
+def _bm25_answer(query: str, currency: str, exclude: range = range(0)) -> str:
+    rendered = _rendered(currency)
+    return "\n\n".join(rendered[i] for i in help_index(currency).top(query, 3, exclude))
 
 # ---------- Glossary match ----------
+# built once at import: one automaton each for the intent phrases and for every glossary name / alias
+_INTENT_MATCHER = PhraseMatcher(INTENT_KEYWORDS)
+_GLOSSARY_MATCHER = PhraseMatcher([(term, [[term] + e.get("aliases", [])]) for term, e in GLOSSARY.items()])
+_GLOSSARY_NAMES: Dict[str, str] = {}
+for _term, _entry in GLOSSARY.items():
+    for _name in [_term] + _entry.get("aliases", []):
+        _GLOSSARY_NAMES.setdefault(_name.lower(), _term)
 def _find_glossary_entry(query: str):
-    t = query.lower()
-    for term, entry in GLOSSARY.items():
-        names = [term] + entry.get("aliases", [])
-        for n in names:
-            pattern = r"\b" + re.escape(n.lower()) + r"\b"
-            if re.search(pattern, t):
-                return term, entry
+    term = _GLOSSARY_MATCHER.match(query)
+    if term:
+        return term, GLOSSARY[term]
     # also if user writes "what is X" without match, try single word last token
-    m = re.search(r"(?:what\s+is|define|meaning\s+of)\s+([a-z0-9 \-]+)\??", t)
+    m = re.search(r"(?:what\s+is|define|meaning\s+of)\s+([a-z0-9 \-]+)\??", query.lower())
     if m:
-        guess = m.group(1).strip()
-        for term, entry in GLOSSARY.items():
-            names = [term] + entry.get("aliases", [])
-            if any(guess == n.lower() for n in names):
-                return term, entry
+        term = _GLOSSARY_NAMES.get(m.group(1).strip())
+        if term:
+            return term, GLOSSARY[term]
     return "", None
 
 def _format_glossary_answer(term: str, entry: Dict[str, Any]) -> str:
@@ -344,12 +398,12 @@ def answer(query: str, data: Dict[str, Any]) -> str:
     currency = (data.get("project", {}) or {}).get("currency", "MAD")
 
     # 1) Intent recipes (exact steps)
-    for name, pattern in INTENT_PATTERNS:
-        if re.search(pattern, query.lower()):
-            steps = INTENT_RECIPES[name](currency)
-            body = _as_numbered(steps)
-            details = _bm25_answer(query, currency)
-            return body + "\n\n<details><summary>More details</summary>\n\n" + details + "\n\n</details>"
+    name = _INTENT_MATCHER.match(query)
+    if name:
+        steps = INTENT_RECIPES[name](currency)
+        body = _as_numbered(steps)
+        details = _bm25_answer(query, currency, PLAYBOOK_PASSAGES)
+        return body + "\n\n<details><summary>More details</summary>\n\n" + details + "\n\n</details>"
 
     # 2) Glossary (definitions)
     term, entry = _find_glossary_entry(query)
@@ -0,0 +1,86 @@
+# utils/cache.py
+# Process-wide LRU caches of costing results keyed by a content fingerprint of the state
+# (RESULTS, whole state) or of one section (SECTIONS, so an edit only recomputes its own section).
+# Cached values are shared between callers (and Streamlit sessions): treat them as read-only.
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Hashable
+import hashlib
+import json
+import pickle
+import threading
+
+from .frozen import FrozenList, FrozenDict
+
+def _digest(obj: Any) -> bytes:
+    # pickle is ~10x faster than JSON on large tables. Equal content can occasionally pickle
+    # differently (shared vs. copied strings), which only costs a cache miss, never a wrong hit.
+    try:
+        raw = pickle.dumps(obj, protocol=5)
+    except Exception:
+        raw = json.dumps(obj, separators=(",", ":"), default=str).encode("utf-8")
+    return hashlib.blake2b(raw, digest_size=16).digest()
+
+def _fp(obj: Any) -> bytes:
+    # frozen tables (utils/frozen.py) never change, so their digest is memoized on the object; plain dicts are
+    # hashed from their children's digests so a state sharing frozen sections only hashes what was edited
+    if isinstance(obj, (FrozenList, FrozenDict)):
+        try:
+            return obj._fp
+        except AttributeError:
+            # digest the plain equivalent: same fingerprint as an equal unfrozen table, and no per-row __reduce__
+            obj._fp = _digest([dict(r) if type(r) is FrozenDict else r for r in obj] if isinstance(obj, FrozenList) else dict(obj))
+            return obj._fp
+    if type(obj) is dict:
+        h = hashlib.blake2b(b"d", digest_size=16)
+        for k, v in obj.items():
+            h.update(_digest(k))
+            h.update(_fp(v))
+        return h.digest()
+    return _digest(obj)
+
+def fingerprint(obj: Any) -> str:
+    return _fp(obj).hex()
+
+class ResultCache:
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+        value = fn()
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"size": len(self._items), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+RESULTS = ResultCache(maxsize=64)
+SECTIONS = ResultCache(maxsize=512)
+
+def cached(kind: str, data: Dict[str, Any], fn: Callable[[], Any], *extra: Hashable) -> Any:
+    """Return fn() for this state, computing it at most once per distinct (kind, active scenario, state)."""
+    key = (kind, data.get("activeScenarioId"), fingerprint(data)) + tuple(extra)
+    return RESULTS.get_or_compute(key, fn)
+
+def section_cached(name: str, items: Any, fn: Callable[[], Any], *extra: Hashable) -> Any:
+    """Return fn() for this section content, recomputing only when the section itself changed."""
+    return SECTIONS.get_or_compute((name, fingerprint(items)) + tuple(extra), fn)
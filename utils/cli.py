@@ -0,0 +1,130 @@
+# utils/cli.py
+# Headless batch runner: totals, ramp-up and financials for JSON states / xlsx snapshots, written as JSON or CSV.
+# Imports only the computation modules (no Streamlit).
+#   python -m utils.cli project.json other.xlsx --scenarios base,pessimistic --out results.json
+#   python -m utils.costing_core snapshots/*.xlsx --out results.csv --jobs 4
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+import argparse
+import json
+import os
+import sys
+import time
+
+_LOADED = time.time()  # fallback origin of the cold-start time when the process start time is not available
+
+TOTAL_KEYS = ["subtotal", "overhead", "contingency", "tax", "riskEMV", "total", "contingencyPct", "tpy"]
+FIN_KEYS = ["npv", "irr", "irr_status", "payback_year", "year0_capex", "peak_opex", "peak_revenue"]
+
+def load_state(path: str) -> Dict[str, Any]:
+    """JSON state (missing top-level keys taken from DEFAULT_STATE), a project file (.csnap) or an xlsx snapshot."""
+    from .costing_core import DEFAULT_STATE
+    from .frozen import snapshot
+    if path.lower().endswith((".xlsx", ".xlsm", ".csnap")):
+        from .portfolio import load_snapshot
+        return load_snapshot(path)
+    with open(path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    return dict(snapshot(DEFAULT_STATE), **state)
+
+def evaluate_state(name: str, data: Dict[str, Any], scenario_ids: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
+    from .costing_core import compute_totals, compute_ramp_monthly, project_financials
+    scenarios = {s.get("id"): s for s in reversed(data.get("scenarios", []) or [])}
+    ids = scenario_ids if scenario_ids else (list(dict.fromkeys(s.get("id") for s in data.get("scenarios", []) or [])) or [data.get("activeScenarioId")])
+    out = []
+    for sid in ids:
+        scen = dict(data, activeScenarioId=sid)
+        totals = compute_totals(scen)
+        fin = project_financials(scen)
+        res = {"project": name, "scenario_id": sid, "scenario": scenarios.get(sid, {}).get("name", sid)}
+        res["totals"] = {k: float(totals[k]) for k in TOTAL_KEYS}
+        res["totals"]["unit"] = res["totals"]["total"] / res["totals"]["tpy"] if res["totals"]["tpy"] else 0.0
+        res["totals"]["byCategory"] = {k: float(v) for k, v in totals["byCategory"].items()}
+        res["ramp"] = compute_ramp_monthly(scen).to_dict("records")
+        res["financials"] = {k: (float(fin[k]) if isinstance(fin[k], float) else fin[k]) for k in FIN_KEYS}
+        res["financials"]["years"] = fin["years_df"].to_dict("records")
+        out.append(res)
+    return out
+
+def _evaluate_path(path: str, scenario_ids: Optional[List[Any]]) -> List[Dict[str, Any]]:
+    try:
+        return evaluate_state(Path(path).stem, load_state(path), scenario_ids)
+    except Exception as e:
+        return [{"project": Path(path).stem, "error": str(e)}]
+
+def _flat(res: Dict[str, Any]) -> Dict[str, Any]:
+    if "error" in res:
+        return {"project": res["project"], "error": res["error"]}
+    row = {"project": res["project"], "scenario_id": res["scenario_id"], "scenario": res["scenario"]}
+    row.update({k: v for k, v in res["totals"].items() if k != "byCategory"})
+    row.update({k: v for k, v in res["financials"].items() if k != "years"})
+    return row
+
+def write_results(results: List[Dict[str, Any]], out: str, meta: Dict[str, Any]) -> None:
+    """JSON: everything. CSV: one row per project × scenario, plus <out>_years.csv and <out>_ramp.csv in long form."""
+    import pandas as pd
+    if not out.lower().endswith(".csv"):
+        text = json.dumps({"meta": meta, "results": results}, indent=2, default=float)
+        if out == "-":
+            sys.stdout.write(text + "\n")
+        else:
+            Path(out).write_text(text, encoding="utf-8")
+        return
+    ok = [r for r in results if "error" not in r]
+    flat = pd.DataFrame([_flat(r) for r in results])
+    flat[[c for c in flat.columns if c != "error"] + [c for c in flat.columns if c == "error"]].to_csv(out, index=False)
+    stem = out[:-4]
+    pd.DataFrame([dict(project=r["project"], scenario_id=r["scenario_id"], **y) for r in ok for y in r["financials"]["years"]]).to_csv(stem + "_years.csv", index=False)
+    pd.DataFrame([dict(project=r["project"], scenario_id=r["scenario_id"], **m) for r in ok for m in r["ramp"]]).to_csv(stem + "_ramp.csv", index=False)
+
+def process_start() -> Tuple[float, str]:
+    """Wall-clock time (time.time() scale) at which this process started, and where it was read from."""
+    try:
+        import psutil  # optional
+        return psutil.Process().create_time(), "psutil"
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/stat", encoding="utf-8") as f:
+            ticks = int(f.read().rsplit(")", 1)[1].split()[19])  # field 22, starttime (clock ticks after boot)
+        with open("/proc/uptime", encoding="utf-8") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - uptime + ticks / os.sysconf("SC_CLK_TCK"), "/proc"
+    except (OSError, ValueError, IndexError, AttributeError):
+        return _LOADED, "utils.cli import"
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m utils.cli", description="Run totals, ramp-up and financials without the UI.")
+    ap.add_argument("inputs", nargs="+", help="JSON state files, project files (.csnap) and/or xlsx snapshots")
+    ap.add_argument("--scenarios", default="", help="comma-separated scenario ids (default: every scenario of each input)")
+    ap.add_argument("--out", default="-", help="output path: .json, .csv, or - for JSON on stdout")
+    ap.add_argument("--jobs", type=int, default=1, help="worker processes for many inputs")
+    args = ap.parse_args(argv)
+    scenario_ids = [s.strip() for s in args.scenarios.split(",") if s.strip()] or None
+
+    t_import = time.perf_counter()
+    from . import costing_core  # noqa: F401  (cold import of the core, timed)
+    t_run = time.perf_counter()
+    started, started_from = process_start()
+    cold_start, cold_start_cpu = time.time() - started, time.process_time()
+    if args.jobs > 1 and len(args.inputs) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            parts = list(pool.map(_evaluate_path, args.inputs, [scenario_ids] * len(args.inputs), chunksize=max(1, len(args.inputs) // (args.jobs * 4))))
+    else:
+        parts = [_evaluate_path(p, scenario_ids) for p in args.inputs]
+    results = [r for part in parts for r in part]
+    t_done = time.perf_counter()
+    meta = {"inputs": len(args.inputs), "results": len(results), "errors": sum("error" in r for r in results),
+            # cold_start: wall time from process start to the first project (boot + imports, whichever entry point was
+            # used, I/O waits included); cold_start_cpu: the CPU time spent in it
+            "timings_s": {"cold_start": cold_start, "cold_start_cpu": cold_start_cpu, "core_import": t_run - t_import, "compute": t_done - t_run},
+            "cold_start_from": started_from,
+            "streamlit_loaded": "streamlit" in sys.modules}
+    write_results(results, args.out, meta)
+    t = meta["timings_s"]
+    print(f"{meta['inputs']} inputs, {meta['results']} results, {meta['errors']} errors — cold start {t['cold_start']*1000:.0f} ms ({t['cold_start_cpu']*1000:.0f} ms CPU), compute {t['compute']:.2f} s", file=sys.stderr)
+    return 1 if meta["errors"] else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,141 @@
+# utils/columnar.py
+# NumPy section kernels: numeric columns come from the typed section tables (utils/tables.py, parsed once per
+# section content) and are costed in bulk. Same signatures and results as the per-row kernels in utils/costing_core.py.
+from typing import Dict, Any, List, Tuple, Callable
+import numpy as np
+
+from .costing_core import SectionResult
+from .tables import section_table
+
+# ---------- Column extraction ----------
+def _col(items: List[Dict[str, Any]], key: str, default: Any) -> List[Any]:
+    return [r.get(key, default) for r in items]
+
+def _sum(arr: np.ndarray) -> float:
+    # Sequential sum, so totals match the per-row kernels bit for bit.
+    return sum(arr.tolist(), 0.0)
+
+def _rows(module: str, category: Any, names, qty, qty_unit, unit_cost, cost_unit, price_source, cost, taxable, notes) -> List[Dict[str, Any]]:
+    n = len(names)
+    cats = category if isinstance(category, list) else [category] * n
+    qty_units = qty_unit if isinstance(qty_unit, list) else [qty_unit] * n
+    sources = price_source if isinstance(price_source, list) else [price_source] * n
+    return [
+        {"module": module, "name": nm, "annual_qty": q, "qty_unit": qu, "unit_cost": uc, "cost_unit": cu, "price_source": ps, "annual_cost": c, "category": cat, "taxable": tx, "note": nt}
+        for nm, q, qu, uc, cu, ps, c, cat, tx, nt in zip(names, qty.tolist(), qty_units, unit_cost.tolist(), cost_unit, sources, cost.tolist(), cats, taxable.tolist(), notes)
+    ]
+
+def _result(rows: List[Dict[str, Any]], cost: np.ndarray, taxable: np.ndarray) -> SectionResult:
+    return rows, _sum(cost), _sum(cost[taxable])
+
+# ---------- Section kernels: (items, tpy, cm, cur) -> (rows, cost, taxable cost) ----------
+def recipe_section(items: List[Dict[str, Any]], tpy: float, cm: float, cur: str) -> SectionResult:
+    t = section_table("recipe", items)
+    no_t = t.missing["t_per_t"]
+    t_per_t = np.where(no_t, t.num["kg_per_t"] / 1000.0, t.num["t_per_t"]) if no_t.any() else t.num["t_per_t"]
+    annual_qty = t_per_t * tpy
+    unit_cost = t.num["unit_cost"] * cm
+    cost = annual_qty * unit_cost * t.factor
+    taxable = t.flags["taxable"]
+    rows = _rows("Formulation (t/t)", "Formulation", _col(items, "name", ""), annual_qty, "t/y", unit_cost, _col(items, "cost_unit", f"{cur}/t"), _col(items, "price_source", "Benchmark"), cost, taxable, _col(items, "note", ""))
+    return _result(rows, cost, taxable)
+
+def materials_section(items: List[Dict[str, Any]], tpy: float, cm: float, cur: str) -> SectionResult:
+    t = section_table("materials", items)
+    annual_qty = t.num["spec_per_t"] * tpy
+    unit_cost = t.num["unit_cost"] * cm
+    cost = annual_qty * unit_cost * t.factor
+    taxable = t.flags["taxable"]
+    qty_unit = [(u or "kg/t").split("/")[0] + "/y" for u in _col(items, "unit_spec", "kg/t")]
+    rows = _rows("Process Consumable", "Materials", _col(items, "name", ""), annual_qty, qty_unit, unit_cost, _col(items, "cost_unit", f"{cur}/unit"), _col(items, "price_source", "Benchmark"), cost, taxable, _col(items, "note", ""))
+    return _result(rows, cost, taxable)
+
+def utilities_section(items: List[Dict[str, Any]], tpy: float, cm: float, cur: str) -> SectionResult:
+    t = section_table("utilities", items)
+    annual_qty = t.num["intensity_per_t"] * tpy
+    tariff = t.num["tariff_per_unit"] * cm
+    cost = annual_qty * tariff * t.factor
+    taxable = t.flags["taxable"]
+    qty_unit = [(u or "unit/t").split("/")[0] + "/y" for u in _col(items, "unit_intensity", "unit/t")]
+    rows = _rows("Utility", "Utilities", _col(items, "name", ""), annual_qty, qty_unit, tariff, _col(items, "tariff_unit", f"{cur}/unit"), _col(items, "price_source", "Benchmark"), cost, taxable, _col(items, "note", ""))
+    return _result(rows, cost, taxable)
+
+def byproducts_section(items: List[Dict[str, Any]], tpy: float, cm: float, cur: str) -> SectionResult:
+    credit_per_t = section_table("byproducts", items).num["credit_per_t"] * cm
+    credit = credit_per_t * tpy
+    taxable = np.zeros(len(items), dtype=bool)
+    rows = _rows("Byproduct", "Other", _col(items, "name", ""), np.full(len(items), tpy), "t/y", credit_per_t, _col(items, "unit", f"{cur}/t"), "N/A", credit, taxable, _col(items, "note", ""))
+    return rows, _sum(credit), 0.0
+
+def packaging_section(items: List[Dict[str, Any]], tpy: float, cm: float, cur: str) -> SectionResult:
+    t = section_table("packaging", items)
+    units = t.num["units_per_t"] * tpy
+    unit_cost = t.num["unit_cost"] * cm
+    cost = units * unit_cost
+    taxable = t.flags["taxable"]
+    rows = _rows("Packaging", "Logistics", _col(items, "name", ""), units, "units/y", unit_cost, _col(items, "cost_unit", f"{cur}/unit"), _col(items, "price_source", "Benchmark"), cost, taxable, _col(items, "note", ""))
+    return _result(rows, cost, taxable)
+
+def logistics_section(items: List[Dict[str, Any]], tpy: float, cm: float, cur: str) -> SectionResult:
+    t = section_table("logistics", items)
+    ton_km = t.num["wet_t_per_t"] * t.num["distance_km"] * tpy
+    tariff = t.num["tariff_per_tkm"] * cm
+    cost = ton_km * tariff
+    taxable = t.flags["taxable"]
+    rows = _rows("Transport", "Logistics", _col(items, "name", ""), ton_km, "t*km/y", tariff, _col(items, "cost_unit", f"{cur}/(t*km)"), _col(items, "price_source", "Benchmark"), cost, taxable, _col(items, "note", ""))
+    return _result(rows, cost, taxable)
+
+def waste_section(items: List[Dict[str, Any]], tpy: float, cm: float, cur: str) -> SectionResult:
+    t = section_table("waste", items)
+    qty = t.num["kg_per_t"] * tpy
+    unit_cost = t.num["disposal_cost_per_kg"] * cm
+    cost = qty * unit_cost * t.factor
+    taxable = t.flags["taxable"]
+    rows = _rows("Waste", "Other", _col(items, "name", ""), qty, "kg/y", unit_cost, _col(items, "cost_unit", f"{cur}/kg"), _col(items, "price_source", "Benchmark"), cost, taxable, _col(items, "note", ""))
+    return _result(rows, cost, taxable)
+
+def rubrics_section(items: List[Dict[str, Any]], tpy: float, cm: float, cur: str) -> SectionResult:
+    basis = [(r.get("basis") or "per_t").strip().lower() for r in items]
+    per_t = np.array([b == "per_t" for b in basis], dtype=bool)
+    fixed = np.array([b == "fixed_project" for b in basis], dtype=bool)
+    t = section_table("rubrics", items)
+    qty = t.num["quantity"]
+    annual_qty = np.where(per_t, qty * tpy, np.where(fixed, 1.0, qty * 1.0))
+    unit_cost = np.where(fixed, qty * cm, t.num["unit_cost"] * cm)
+    cost = annual_qty * unit_cost
+    taxable = t.flags["taxable"]
+    cats = [r.get("map_to_category", "Other") or "Other" for r in items]
+    rows = [
+        {"module": "Rubric", "name": nm, "basis": b, "annual_qty": q, "qty_unit": "basis-dependent", "unit_cost": uc, "cost_unit": cu, "price_source": ps, "annual_cost": c, "category": cat, "taxable": tx, "note": nt}
+        for nm, b, q, uc, cu, ps, c, cat, tx, nt in zip(_col(items, "name", ""), basis, annual_qty.tolist(), unit_cost.tolist(), _col(items, "cost_unit", f"{cur}/unit"), _col(items, "price_source", "Benchmark"), cost.tolist(), cats, taxable.tolist(), _col(items, "note", ""))
+    ]
+    return _result(rows, cost, taxable)
+
+def line_items_section(items: List[Dict[str, Any]], qm: float, cm: float) -> Tuple[Dict[str, float], float, float]:
+    t = section_table("lineItems", items)
+    cost = t.num["quantity"] * qm * t.num["unitCost"] * cm
+    taxable = t.flags["taxable"]
+    index: Dict[Any, int] = {}
+    codes = [index.setdefault(li.get("category", "Other"), len(index)) for li in items]
+    by_cat: Dict[str, float] = dict.fromkeys(index, 0.0)
+    for cat, c in zip(index, _group_sums(codes, cost, len(index))):
+        by_cat[cat] = c
+    return by_cat, _sum(cost), _sum(cost[taxable])
+
+def _group_sums(codes: List[int], values: np.ndarray, n: int) -> List[float]:
+    sums = [0.0] * n
+    for k, v in zip(codes, values.tolist()):
+        sums[k] += v
+    return sums
+
+SECTION_KERNELS: Dict[str, Callable] = {
+    "recipe": recipe_section,
+    "materials": materials_section,
+    "utilities": utilities_section,
+    "byproducts": byproducts_section,
+    "packaging": packaging_section,
+    "logistics": logistics_section,
+    "waste": waste_section,
+    "rubrics": rubrics_section,
+    "lineItems": line_items_section,
+}
@@ -1,6 +1,15 @@
-from typing import Dict, Any, List
-import json
-import pandas as pd
+from typing import Dict, Any, List, Tuple, Callable, Optional, TYPE_CHECKING
+from itertools import accumulate
+import importlib.util
+
+from .cache import cached, section_cached
+from .frames import frame
+from .frozen import snapshot, freeze
+from .profiling import span
+from .units import row_factor
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 ACCURACY_BANDS: Dict[str, tuple] = {
     "Feasibility": (-30, +50),
@@ -16,15 +25,14 @@ STAGE_PROFILE: Dict[str, Dict[str, Any]] = {
     "Commissioning": {"contingency": 7, "sections": {"recipe": True,"materials": True,"utilities": True,"byproducts": True,"log_packaging": True,"log_transport": True,"waste": True,"rubrics": True,"lineItems": True}},
 }
 
-def deep(d: Any) -> Any:
-    return json.loads(json.dumps(d))
-
 def fnum(x: Any) -> float:
     try:
         return float(x)
     except Exception:
         return 0.0
 
+SectionResult = Tuple[List[Dict[str, Any]], float, float]
+
 def current_scenario(data: Dict[str, Any]) -> Dict[str, Any]:
     sid = data.get("activeScenarioId")
     for s in data.get("scenarios", []):
@@ -93,49 +101,75 @@ DEFAULT_PRESETS: Dict[str, Any] = {
     }
 }
 
-DEFAULT_STATE: Dict[str, Any] = {
-    "project": {"name": "New Project","type": "Process","stage": "Feasibility","currency": "MAD","discountRatePct": 10.0,"durationMonths": 12,"info": ""},
-    "lineItems": [{"id": "li1","category": "Labor","description": "Process engineer (200 h)","unit": "h","quantity": 200.0,"unitCost": 350.0,"taxable": False,"accountCode": "","driver": ""}],
-    "rates": [{"name": "Process Engineer", "hourly": 350.0},{"name": "Lab Technician", "hourly": 150.0},{"name": "Project Manager", "hourly": 400.0}],
-    "risks": [{"id": "r1","name": "Delay in reagent delivery","probability": 0.3,"impactCost": 120000.0}],
-    "scenarios": [
-        {"id":"base","name":"Base","costMultiplier":1.0,"quantityMultiplier":1.0,"contingencyPctDelta":0.0},
-        {"id":"optimistic","name":"Optimistic","costMultiplier":0.95,"quantityMultiplier":0.95,"contingencyPctDelta":-2.0},
-        {"id":"pessimistic","name":"Pessimistic","costMultiplier":1.10,"quantityMultiplier":1.05,"contingencyPctDelta":3.0},
-    ],
-    "settings": {"taxPct": 20.0,"contingencyPct": 25.0,"overheadPct": 25.0,"overheadBase": ["Labor","Logistics"],"escalationPctPerYear": 3.0,"discountNominal": True},
-    "activeScenarioId": "base",
-    "presetName": "Generic Process",
-    "process": deep(DEFAULT_PRESETS["Generic Process"]["process"]),
-    "logistics": deep(DEFAULT_PRESETS["Generic Process"]["logistics"]),
-    "packaging": deep(DEFAULT_PRESETS["Generic Process"]["packaging"]),
-    "waste": deep(DEFAULT_PRESETS["Generic Process"]["waste"]),
-    "rampup": deep(DEFAULT_PRESETS["Generic Process"]["rampup"]),
-    "rubrics": deep(DEFAULT_PRESETS["Generic Process"]["rubrics"]),
-    "recipe": [],
-    "finance": {
-        "horizon_years": 10,
-        "start_year": 0,
-        "selling_price_per_t": 0.0,
-        "capex_items": deep(DEFAULT_PRESETS["Generic Process"]["capex_items"]),
-        "capex_curve_pct": deep(DEFAULT_PRESETS["Generic Process"]["capex_curve_pct"]),
-        "include_depreciation": True,
-        "working_capital_pct_of_opex": 0.0,
-        "wc_recovery_end": True,
+def _default_state() -> Dict[str, Any]:
+    return {
+        "project": {"name": "New Project","type": "Process","stage": "Feasibility","currency": "MAD","discountRatePct": 10.0,"durationMonths": 12,"info": ""},
+        "lineItems": [{"id": "li1","category": "Labor","description": "Process engineer (200 h)","unit": "h","quantity": 200.0,"unitCost": 350.0,"taxable": False,"accountCode": "","driver": ""}],
+        "rates": [{"name": "Process Engineer", "hourly": 350.0},{"name": "Lab Technician", "hourly": 150.0},{"name": "Project Manager", "hourly": 400.0}],
+        "risks": [{"id": "r1","name": "Delay in reagent delivery","probability": 0.3,"impactCost": 120000.0}],
+        "scenarios": [
+            {"id":"base","name":"Base","costMultiplier":1.0,"quantityMultiplier":1.0,"contingencyPctDelta":0.0},
+            {"id":"optimistic","name":"Optimistic","costMultiplier":0.95,"quantityMultiplier":0.95,"contingencyPctDelta":-2.0},
+            {"id":"pessimistic","name":"Pessimistic","costMultiplier":1.10,"quantityMultiplier":1.05,"contingencyPctDelta":3.0},
+        ],
+        "settings": {"taxPct": 20.0,"contingencyPct": 25.0,"overheadPct": 25.0,"overheadBase": ["Labor","Logistics"],"escalationPctPerYear": 3.0,"escalationByCategory": {},"discountNominal": True},
+        "activeScenarioId": "base",
+        "presetName": "Generic Process",
+        "process": snapshot(DEFAULT_PRESETS["Generic Process"]["process"]),
+        "logistics": freeze(DEFAULT_PRESETS["Generic Process"]["logistics"]),
+        "packaging": freeze(DEFAULT_PRESETS["Generic Process"]["packaging"]),
+        "waste": freeze(DEFAULT_PRESETS["Generic Process"]["waste"]),
+        "rampup": snapshot(DEFAULT_PRESETS["Generic Process"]["rampup"]),
+        "rubrics": freeze(DEFAULT_PRESETS["Generic Process"]["rubrics"]),
+        "recipe": [],
+        "formulation": {"candidates": [], "constraints": []},
+        "finance": {
+            "horizon_years": 10,
+            "start_year": 0,
+            "selling_price_per_t": 0.0,
+            "capex_items": freeze(DEFAULT_PRESETS["Generic Process"]["capex_items"]),
+            "capex_curve_pct": freeze(DEFAULT_PRESETS["Generic Process"]["capex_curve_pct"]),
+            "include_depreciation": True,
+            "working_capital_pct_of_opex": 0.0,
+            "wc_recovery_end": True,
+        }
     }
+
+def __getattr__(name: str) -> Any:
+    # DEFAULT_STATE is built on first access (PEP 562), not at import. Its tables are frozen (utils/frozen.py):
+    # sessions start from snapshot(DEFAULT_STATE) and share them until a section is edited.
+    if name == "DEFAULT_STATE":
+        globals()["DEFAULT_STATE"] = state = _default_state()
+        return state
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+SECTION_PATHS: Dict[str, tuple] = {
+    "recipe": ("recipe",),
+    "materials": ("process", "materials"),
+    "utilities": ("process", "utilities"),
+    "byproducts": ("process", "byproducts"),
+    "packaging": ("packaging",),
+    "logistics": ("logistics",),
+    "waste": ("waste",),
+    "rubrics": ("rubrics",),
+    "lineItems": ("lineItems",),
+    "risks": ("risks",),
 }
 
-def compute_process_costs(data: Dict[str, Any]) -> Dict[str, Any]:
-    scen = current_scenario(data)
-    qm = fnum(scen.get("quantityMultiplier", 1.0))
-    cm = fnum(scen.get("costMultiplier", 1.0))
-    p = data.get("process", {}) or {}
-    tpy = fnum(p.get("throughput_tpy", 0.0)) * qm
-    rows: List[Dict[str, Any]] = []
-    totals = {"Materials": 0.0, "Utilities": 0.0, "ByproductCredits": 0.0, "Formulation": 0.0, "TaxableBase": 0.0}
-    cur = data.get("project", {}).get("currency", "MAD")
+# "numpy" uses the columnar kernels in utils/columnar.py, "loop" the per-row kernels below.
+ENGINE = "numpy" if importlib.util.find_spec("numpy") is not None else "loop"
+
+def section_items(data: Dict[str, Any], name: str) -> List[Dict[str, Any]]:
+    node: Any = data
+    for key in SECTION_PATHS[name]:
+        node = node.get(key) if isinstance(node, dict) else None
+    return node or []
 
-    for r in data.get("recipe", []) or []:
+# ---------- Per-row kernels: (items, tpy, cm, cur) -> (rows, cost, taxable cost) ----------
+def _recipe_section(items: List[Dict[str, Any]], tpy: float, cm: float, cur: str) -> SectionResult:
+    rows: List[Dict[str, Any]] = []
+    total = taxable = 0.0
+    for r in items:
         t_per_t_val = r.get("t_per_t")
         if t_per_t_val is None:
             t_per_t = fnum(r.get("kg_per_t", 0.0)) / 1000.0
@@ -143,90 +177,96 @@ def compute_process_costs(data: Dict[str, Any]) -> Dict[str, Any]:
             t_per_t = fnum(t_per_t_val)
         annual_qty = t_per_t * tpy
         unit_cost = fnum(r.get("unit_cost", 0.0)) * cm
-        cost = annual_qty * unit_cost
+        cost = annual_qty * unit_cost * row_factor("recipe", r)
         rows.append({"module":"Formulation (t/t)","name":r.get("name",""),"annual_qty":annual_qty,"qty_unit":"t/y","unit_cost":unit_cost,"cost_unit":r.get("cost_unit", f"{cur}/t"),"price_source":r.get("price_source","Benchmark"),"annual_cost":cost,"category":"Formulation","taxable":bool(r.get("taxable",True)),"note":r.get("note","")})
-        totals["Formulation"] += cost
+        total += cost
         if r.get("taxable", True):
-            totals["TaxableBase"] += cost
+            taxable += cost
+    return rows, total, taxable
 
-    for m in p.get("materials", []) or []:
+def _materials_section(items: List[Dict[str, Any]], tpy: float, cm: float, cur: str) -> SectionResult:
+    rows: List[Dict[str, Any]] = []
+    total = taxable = 0.0
+    for m in items:
         spec = fnum(m.get("spec_per_t", 0.0))
         unit_cost = fnum(m.get("unit_cost", 0.0)) * cm
         annual_qty = spec * tpy
-        cost = annual_qty * unit_cost
+        cost = annual_qty * unit_cost * row_factor("materials", m)
         unit_spec = (m.get("unit_spec", "kg/t") or "kg/t").split("/")[0] + "/y"
         rows.append({"module":"Process Consumable","name":m.get("name",""),"annual_qty":annual_qty,"qty_unit":unit_spec,"unit_cost":unit_cost,"cost_unit":m.get("cost_unit", f"{cur}/unit"),"price_source":m.get("price_source","Benchmark"),"annual_cost":cost,"category":"Materials","taxable":bool(m.get("taxable",False)),"note":m.get("note","")})
-        totals["Materials"] += cost
+        total += cost
         if m.get("taxable", False):
-            totals["TaxableBase"] += cost
+            taxable += cost
+    return rows, total, taxable
 
-    for u in p.get("utilities", []) or []:
+def _utilities_section(items: List[Dict[str, Any]], tpy: float, cm: float, cur: str) -> SectionResult:
+    rows: List[Dict[str, Any]] = []
+    total = taxable = 0.0
+    for u in items:
         intensity = fnum(u.get("intensity_per_t", 0.0))
         tariff = fnum(u.get("tariff_per_unit", 0.0)) * cm
         annual_qty = intensity * tpy
-        cost = annual_qty * tariff
+        cost = annual_qty * tariff * row_factor("utilities", u)
         qty_unit = (u.get("unit_intensity", "unit/t") or "unit/t").split("/")[0] + "/y"
         rows.append({"module":"Utility","name":u.get("name",""),"annual_qty":annual_qty,"qty_unit":qty_unit,"unit_cost":tariff,"cost_unit":u.get("tariff_unit", f"{cur}/unit"),"price_source":u.get("price_source","Benchmark"),"annual_cost":cost,"category":"Utilities","taxable":bool(u.get("taxable",False)),"note":u.get("note","")})
-        totals["Utilities"] += cost
+        total += cost
         if u.get("taxable", False):
-            totals["TaxableBase"] += cost
+            taxable += cost
+    return rows, total, taxable
 
-    for b in p.get("byproducts", []) or []:
+def _byproducts_section(items: List[Dict[str, Any]], tpy: float, cm: float, cur: str) -> SectionResult:
+    rows: List[Dict[str, Any]] = []
+    total = 0.0
+    for b in items:
         credit_per_t = fnum(b.get("credit_per_t", 0.0)) * cm
         credit = credit_per_t * tpy
         rows.append({"module":"Byproduct","name":b.get("name",""),"annual_qty":tpy,"qty_unit":"t/y","unit_cost":credit_per_t,"cost_unit":b.get("unit", f"{cur}/t"),"price_source":"N/A","annual_cost":credit,"category":"Other","taxable":False,"note":b.get("note","")})
-        totals["ByproductCredits"] += credit
-
-    return {"rows": rows, "totals": totals, "tpy": tpy}
+        total += credit
+    return rows, total, 0.0
 
-def compute_extra_modules_costs(data: Dict[str, Any]) -> Dict[str, Any]:
-    scen = current_scenario(data)
-    qm = fnum(scen.get("quantityMultiplier", 1.0))
-    cm = fnum(scen.get("costMultiplier", 1.0))
-    tpy = fnum(data.get("process", {}).get("throughput_tpy", 0.0)) * qm
+def _packaging_section(items: List[Dict[str, Any]], tpy: float, cm: float, cur: str) -> SectionResult:
     rows: List[Dict[str, Any]] = []
-    totals = {"Packaging": 0.0, "Transport": 0.0, "Waste": 0.0, "TaxableBase": 0.0}
-    cur = data.get("project", {}).get("currency", "MAD")
-
-    for p in data.get("packaging", []) or []:
+    total = taxable = 0.0
+    for p in items:
         units = fnum(p.get("units_per_t", 0.0)) * tpy
         unit_cost = fnum(p.get("unit_cost", 0.0)) * cm
         cost = units * unit_cost
         rows.append({"module":"Packaging","name":p.get("name",""),"annual_qty":units,"qty_unit":"units/y","unit_cost":unit_cost,"cost_unit":p.get("cost_unit", f"{cur}/unit"),"price_source":p.get("price_source","Benchmark"),"annual_cost":cost,"category":"Logistics","taxable":bool(p.get("taxable",True)),"note":p.get("note","")})
-        totals["Packaging"] += cost
+        total += cost
         if p.get("taxable", True):
-            totals["TaxableBase"] += cost
+            taxable += cost
+    return rows, total, taxable
 
-    for l in data.get("logistics", []) or []:
+def _logistics_section(items: List[Dict[str, Any]], tpy: float, cm: float, cur: str) -> SectionResult:
+    rows: List[Dict[str, Any]] = []
+    total = taxable = 0.0
+    for l in items:
         ton_km = fnum(l.get("wet_t_per_t", 1.0)) * fnum(l.get("distance_km", 0.0)) * tpy
         tariff = fnum(l.get("tariff_per_tkm", 0.0)) * cm
         cost = ton_km * tariff
         rows.append({"module":"Transport","name":l.get("name",""),"annual_qty":ton_km,"qty_unit":"t*km/y","unit_cost":tariff,"cost_unit":l.get("cost_unit", f"{cur}/(t*km)"),"price_source":l.get("price_source","Benchmark"),"annual_cost":cost,"category":"Logistics","taxable":bool(l.get("taxable",True)),"note":l.get("note","")})
-        totals["Transport"] += cost
+        total += cost
         if l.get("taxable", True):
-            totals["TaxableBase"] += cost
+            taxable += cost
+    return rows, total, taxable
 
-    for w in data.get("waste", []) or []:
+def _waste_section(items: List[Dict[str, Any]], tpy: float, cm: float, cur: str) -> SectionResult:
+    rows: List[Dict[str, Any]] = []
+    total = taxable = 0.0
+    for w in items:
         qty = fnum(w.get("kg_per_t", 0.0)) * tpy
         unit_cost = fnum(w.get("disposal_cost_per_kg", 0.0)) * cm
-        cost = qty * unit_cost
+        cost = qty * unit_cost * row_factor("waste", w)
         rows.append({"module":"Waste","name":w.get("name",""),"annual_qty":qty,"qty_unit":"kg/y","unit_cost":unit_cost,"cost_unit":w.get("cost_unit", f"{cur}/kg"),"price_source":w.get("price_source","Benchmark"),"annual_cost":cost,"category":"Other","taxable":bool(w.get("taxable",False)),"note":w.get("note","")})
-        totals["Waste"] += cost
+        total += cost
         if w.get("taxable", False):
-            totals["TaxableBase"] += cost
-
-    return {"rows": rows, "totals": totals, "tpy": tpy}
+            taxable += cost
+    return rows, total, taxable
 
-def compute_rubrics_costs(data: Dict[str, Any]) -> Dict[str, Any]:
-    scen = current_scenario(data)
-    qm = fnum(scen.get("quantityMultiplier", 1.0))
-    cm = fnum(scen.get("costMultiplier", 1.0))
-    tpy = fnum(data.get("process", {}).get("throughput_tpy", 0.0)) * qm
+def _rubrics_section(items: List[Dict[str, Any]], tpy: float, cm: float, cur: str) -> SectionResult:
     rows: List[Dict[str, Any]] = []
-    totals = {"Rubrics": 0.0, "TaxableBase": 0.0}
-    cur = data.get("project", {}).get("currency", "MAD")
-
-    for r in data.get("rubrics", []) or []:
+    total = taxable = 0.0
+    for r in items:
         basis = (r.get("basis") or "per_t").strip().lower()
         qty = fnum(r.get("quantity", 0.0))
         unit_cost = fnum(r.get("unit_cost", 0.0)) * cm
@@ -242,42 +282,99 @@ def compute_rubrics_costs(data: Dict[str, Any]) -> Dict[str, Any]:
             annual_qty = qty * 1.0
         cost = annual_qty * unit_cost
         rows.append({"module":"Rubric","name":r.get("name",""),"basis":basis,"annual_qty":annual_qty,"qty_unit":"basis-dependent","unit_cost":unit_cost,"cost_unit":r.get("cost_unit", f"{cur}/unit"),"price_source":r.get("price_source","Benchmark"),"annual_cost":cost,"category":map_cat,"taxable":bool(r.get("taxable",False)),"note":r.get("note","")})
-        totals["Rubrics"] += cost
+        total += cost
         if r.get("taxable", False):
-            totals["TaxableBase"] += cost
+            taxable += cost
+    return rows, total, taxable
+
+def _line_items_section(items: List[Dict[str, Any]], qm: float, cm: float) -> Tuple[Dict[str, float], float, float]:
+    by_cat: Dict[str, float] = {}
+    total = taxable = 0.0
+    for li in items:
+        cost = fnum(li.get("quantity", 0.0)) * qm * fnum(li.get("unitCost", 0.0)) * cm
+        total += cost
+        cat = li.get("category", "Other")
+        by_cat[cat] = by_cat.get(cat, 0.0) + cost
+        if li.get("taxable", False):
+            taxable += cost
+    return by_cat, total, taxable
+
+_LOOP_KERNELS: Dict[str, Callable] = {
+    "recipe": _recipe_section,
+    "materials": _materials_section,
+    "utilities": _utilities_section,
+    "byproducts": _byproducts_section,
+    "packaging": _packaging_section,
+    "logistics": _logistics_section,
+    "waste": _waste_section,
+    "rubrics": _rubrics_section,
+    "lineItems": _line_items_section,
+}
+
+def section_kernels(engine: Optional[str] = None) -> Dict[str, Callable]:
+    if (engine or ENGINE) == "numpy":
+        from .columnar import SECTION_KERNELS
+        return SECTION_KERNELS
+    return _LOOP_KERNELS
+
+def _run_sections(data: Dict[str, Any], names: List[tuple], totals: Dict[str, float], engine: Optional[str]) -> Dict[str, Any]:
+    scen = current_scenario(data)
+    qm = fnum(scen.get("quantityMultiplier", 1.0))
+    cm = fnum(scen.get("costMultiplier", 1.0))
+    tpy = fnum((data.get("process", {}) or {}).get("throughput_tpy", 0.0)) * qm
+    cur = data.get("project", {}).get("currency", "MAD")
+    engine = engine or ENGINE
+    kernels = section_kernels(engine)
+    rows: List[Dict[str, Any]] = []
+    for name, key in names:
+        items = section_items(data, name)
+        with span("section", len(items), name):
+            sec_rows, cost, taxable = section_cached(name, items, lambda: kernels[name](items, tpy, cm, cur), engine, tpy, cm, cur)
+        rows.extend(sec_rows)
+        totals[key] += cost
+        totals["TaxableBase"] += taxable
     return {"rows": rows, "totals": totals, "tpy": tpy}
 
-def compute_totals(data: Dict[str, Any]) -> Dict[str, Any]:
+def compute_process_costs(data: Dict[str, Any], engine: Optional[str] = None) -> Dict[str, Any]:
+    totals = {"Materials": 0.0, "Utilities": 0.0, "ByproductCredits": 0.0, "Formulation": 0.0, "TaxableBase": 0.0}
+    return _run_sections(data, [("recipe", "Formulation"), ("materials", "Materials"), ("utilities", "Utilities"), ("byproducts", "ByproductCredits")], totals, engine)
+
+def compute_extra_modules_costs(data: Dict[str, Any], engine: Optional[str] = None) -> Dict[str, Any]:
+    totals = {"Packaging": 0.0, "Transport": 0.0, "Waste": 0.0, "TaxableBase": 0.0}
+    return _run_sections(data, [("packaging", "Packaging"), ("logistics", "Transport"), ("waste", "Waste")], totals, engine)
+
+def compute_rubrics_costs(data: Dict[str, Any], engine: Optional[str] = None) -> Dict[str, Any]:
+    totals = {"Rubrics": 0.0, "TaxableBase": 0.0}
+    return _run_sections(data, [("rubrics", "Rubrics")], totals, engine)
+
+def compute_totals(data: Dict[str, Any], engine: Optional[str] = None) -> Dict[str, Any]:
+    with span("compute_totals"):
+        return cached("totals", data, lambda: _compute_totals(data, engine), engine or ENGINE)
+
+def _compute_totals(data: Dict[str, Any], engine: Optional[str] = None) -> Dict[str, Any]:
     scen = current_scenario(data)
     contingency_pct = fnum(data.get("settings", {}).get("contingencyPct", 0.0)) + fnum(scen.get("contingencyPctDelta", 0.0))
 
-    by_cat: Dict[str, float] = {}
-    taxable_manual = 0.0
-    subtotal_manual = 0.0
     qm = fnum(scen.get("quantityMultiplier", 1.0))
     cm = fnum(scen.get("costMultiplier", 1.0))
+    items = section_items(data, "lineItems")
+    with span("section", len(items), "lineItems"):
+        by_cat, subtotal_manual, taxable_manual = section_cached("lineItems", items, lambda: section_kernels(engine)["lineItems"](items, qm, cm), engine or ENGINE, qm, cm)
+    by_cat = dict(by_cat)
 
-    for li in (data.get("lineItems", []) or []):
-        cost = fnum(li.get("quantity", 0.0)) * qm * fnum(li.get("unitCost", 0.0)) * cm
-        subtotal_manual += cost
-        cat = li.get("category", "Other")
-        by_cat[cat] = by_cat.get(cat, 0.0) + cost
-        if li.get("taxable", False):
-            taxable_manual += cost
-
-    proc = compute_process_costs(data)
+    proc = compute_process_costs(data, engine)
     by_cat["Formulation"] = by_cat.get("Formulation", 0.0) + proc["totals"]["Formulation"]
     by_cat["Materials"] = by_cat.get("Materials", 0.0) + proc["totals"]["Materials"]
     by_cat["Utilities"] = by_cat.get("Utilities", 0.0) + proc["totals"]["Utilities"]
     by_cat["Other"] = by_cat.get("Other", 0.0) + proc["totals"]["ByproductCredits"]
     taxable_base = taxable_manual + proc["totals"]["TaxableBase"]
 
-    extra = compute_extra_modules_costs(data)
+    extra = compute_extra_modules_costs(data, engine)
     by_cat["Logistics"] = by_cat.get("Logistics", 0.0) + extra["totals"]["Packaging"] + extra["totals"]["Transport"]
     by_cat["Other"] = by_cat.get("Other", 0.0) + extra["totals"]["Waste"]
     taxable_base += extra["totals"]["TaxableBase"]
 
-    rub = compute_rubrics_costs(data) if data.get("rubrics") else {"rows": [], "totals": {"Rubrics": 0.0, "TaxableBase": 0.0}}
+    rub = compute_rubrics_costs(data, engine) if data.get("rubrics") else {"rows": [], "totals": {"Rubrics": 0.0, "TaxableBase": 0.0}}
     for r in rub["rows"]:
         cat = r.get("category", "Other")
         by_cat[cat] = by_cat.get(cat, 0.0) + r["annual_cost"]
@@ -292,14 +389,47 @@ def compute_totals(data: Dict[str, Any]) -> Dict[str, Any]:
     pre_tax = subtotal + overhead
     contingency = pre_tax * contingency_pct / 100.0
     tax = taxable_base * fnum(settings.get("taxPct", 0.0)) / 100.0
-    risk_emv = sum(fnum(r.get("probability", 0.0)) * fnum(r.get("impactCost", 0.0)) for r in (data.get("risks", []) or []))
+    risks = section_items(data, "risks")
+    with span("section", len(risks), "risks"):
+        risk_emv = section_cached("risks", risks, lambda: sum(fnum(r.get("probability", 0.0)) * fnum(r.get("impactCost", 0.0)) for r in risks))
     total = pre_tax + contingency + tax + risk_emv
 
     breakdown = {"utilities_total": proc["totals"]["Utilities"], "log_packaging_total": extra["totals"]["Packaging"], "log_transport_total": extra["totals"]["Transport"]}
 
     return {"byCategory": by_cat,"subtotal": subtotal,"overhead": overhead,"contingency": contingency,"tax": tax,"riskEMV": risk_emv,"total": total,"contingencyPct": contingency_pct,"process": proc,"extra": extra,"rubrics": rub,"breakdown": breakdown,"tpy": proc["tpy"]}
 
-def compute_ramp_monthly(data: Dict[str, Any]) -> pd.DataFrame:
+def compute_totals_for_scenarios(data: Dict[str, Any], scenario_ids: Optional[List[Any]] = None) -> Dict[str, List[Any]]:
+    """Scenario-by-metric table (columns: id, name, subtotal, overhead, contingency, tax, riskEMV, total, contingencyPct, tpy, unit).
+
+    The multiplier-independent base is costed once; data["activeScenarioId"] is never touched.
+    """
+    with span("compute_totals_for_scenarios", len(data.get("scenarios", []) or []) if scenario_ids is None else len(scenario_ids)):
+        return _compute_totals_for_scenarios(data, scenario_ids)
+
+def _compute_totals_for_scenarios(data: Dict[str, Any], scenario_ids: Optional[List[Any]]) -> Dict[str, List[Any]]:
+    if ENGINE == "numpy":
+        from .scenarios import scenario_table
+        return scenario_table(data, scenario_ids)
+    if scenario_ids is None:
+        scenario_ids = [s.get("id") for s in data.get("scenarios", []) or []]
+    names = {}
+    for s in data.get("scenarios", []) or []:
+        names.setdefault(s.get("id"), s.get("name", s.get("id")))
+    table: Dict[str, List[Any]] = {k: [] for k in ["id", "name", "subtotal", "overhead", "contingency", "tax", "riskEMV", "total", "contingencyPct", "tpy", "unit"]}
+    for sid in scenario_ids:
+        tt = compute_totals(dict(data, activeScenarioId=sid))
+        table["id"].append(sid)
+        table["name"].append(names.get(sid, sid))
+        for k in ["subtotal", "overhead", "contingency", "tax", "riskEMV", "total", "contingencyPct", "tpy"]:
+            table[k].append(tt[k])
+        table["unit"].append((tt["total"] / tt["tpy"]) if tt["tpy"] else 0.0)
+    return table
+
+def compute_ramp_monthly(data: Dict[str, Any]) -> "pd.DataFrame":
+    with span("compute_ramp_monthly"):
+        return cached("ramp", data, lambda: _compute_ramp_monthly(data))
+
+def _compute_ramp_monthly(data: Dict[str, Any]) -> "pd.DataFrame":
     totals = compute_totals(data)
     b = totals["breakdown"]
     util_annual = b.get("utilities_total", 0.0)
@@ -318,7 +448,7 @@ def compute_ramp_monthly(data: Dict[str, Any]) -> pd.DataFrame:
     rows = []
     for i in range(12):
         rows.append({"Month": i + 1, "Utilities": util_annual / 12.0 * (up[i] / 100.0), "Logistics - Packaging": log_pack_annual / 12.0 * (lp[i] / 100.0), "Logistics - Transport": log_trans_annual / 12.0 * (lt[i] / 100.0), "Other": other_annual / 12.0 * (op[i] / 100.0)})
-    return pd.DataFrame(rows)
+    return frame(rows)
 
 def capex_spend_by_year(fin: Dict[str, Any]) -> Dict[int, float]:
     items = fin.get("capex_items", []) or []
@@ -332,7 +462,31 @@ def capex_spend_by_year(fin: Dict[str, Any]) -> Dict[int, float]:
         spend[off] = total * pct / 100.0
     return spend
 
+def depreciation_schedule(fin: Dict[str, Any], horizon: int) -> Dict[int, float]:
+    dep = {y: 0.0 for y in range(0, horizon+1)}
+    for it in fin.get("capex_items", []) or []:
+        amt = fnum(it.get("amount", 0.0))
+        years_it = max(1, int(fnum(it.get("depr_years", 10))))
+        annual = amt / years_it
+        for y in range(0, min(horizon, years_it)):
+            dep[y] += annual
+    return dep
+
+def finance_schedules(fin: Dict[str, Any], horizon: int) -> Tuple[Dict[int, float], Dict[int, float]]:
+    return section_cached("finance", fin, lambda: (capex_spend_by_year(fin), depreciation_schedule(fin, horizon)), horizon)
+
+def price_year1_multiplier(data: Dict[str, Any]) -> float:
+    ru = data.get("rampup", {}) or {}
+    price_pct = ru.get("price_pct", [100]*12) or [100]*12
+    if len(price_pct) < 12:
+        price_pct = list(price_pct) + [price_pct[-1]]*(12-len(price_pct))
+    return (sum(float(x) for x in price_pct[:12]) / 12.0) / 100.0
+
 def project_financials(data: Dict[str, Any]) -> Dict[str, Any]:
+    with span("project_financials"):
+        return cached("financials", data, lambda: _project_financials(data))
+
+def _project_financials(data: Dict[str, Any]) -> Dict[str, Any]:
     cur = data.get("project", {}).get("currency", "MAD")
     fin = data.get("finance", {})
     horizon = int(fnum(fin.get("horizon_years", 10)))
@@ -341,27 +495,19 @@ def project_financials(data: Dict[str, Any]) -> Dict[str, Any]:
     tax_rate = fnum(data.get("settings", {}).get("taxPct", 0.0)) / 100.0
     disc = fnum(data.get("project", {}).get("discountRatePct", 10.0)) / 100.0
     totals_now = compute_totals(data)
-    base_opex = totals_now["subtotal"] + totals_now["overhead"] + totals_now["tax"]
     tpy = totals_now["tpy"]
     years = list(range(0, horizon+1))
-    capex_curve = capex_spend_by_year(fin)
-
-    ru = data.get("rampup", {}) or {}
-    price_pct = ru.get("price_pct", [100]*12) or [100]*12
-    if len(price_pct) < 12:
-        price_pct = list(price_pct) + [price_pct[-1]]*(12-len(price_pct))
-    price_year1_mult = (sum(float(x) for x in price_pct[:12]) / 12.0) / 100.0
-
-    def _depreciation_schedule(fin: Dict[str, Any], horizon: int) -> Dict[int, float]:
-        dep = {y: 0.0 for y in range(0, horizon+1)}
-        for it in fin.get("capex_items", []) or []:
-            amt = fnum(it.get("amount", 0.0))
-            years_it = max(1, int(fnum(it.get("depr_years", 10))))
-            annual = amt / years_it
-            for y in range(0, min(horizon, years_it)):
-                dep[y] += annual
-        return dep
-    depreciation = _depreciation_schedule(fin, horizon)
+    # base-year OPEX by escalation series (category / row rates) grown over the horizon in one step
+    from .escalation import opex_series
+    series = opex_series(data)
+    if ENGINE == "numpy" and len(series["cost"]) > 1:  # a single series keeps Python's pow, as before category rates
+        from .financials import yearly_opex
+        opex_years = yearly_opex(series, years).tolist()
+    else:
+        opex_years = [sum(c * ((1.0 + r) ** y) for c, r in zip(series["cost"], series["rate"])) for y in years]
+
+    price_year1_mult = price_year1_multiplier(data)
+    capex_curve, depreciation = finance_schedules(fin, horizon)
 
     annuals = []
     for y in years:
@@ -369,7 +515,7 @@ def project_financials(data: Dict[str, Any]) -> Dict[str, Any]:
         for off, val in capex_curve.items():
             if y == max(0, off):
                 capex_spend += val
-        opex_y = base_opex * ((1.0 + esc) ** y)
+        opex_y = opex_years[y]
 
         if price > 0 and tpy > 0:
             if y == 0:
@@ -387,40 +533,34 @@ def project_financials(data: Dict[str, Any]) -> Dict[str, Any]:
         pv = fcf_y / ((1.0 + disc) ** y)
         annuals.append({"Year": y,"CAPEX": -capex_spend,"Revenue": revenue_y,"OPEX": -opex_y,"Depreciation": -dep_y,"Tax": -tax_y,"OCF": ocf_y,"FCF": fcf_y,"PV_FCF": pv})
 
-    df = pd.DataFrame(annuals)
-    npv = df["PV_FCF"].sum()
-
-    irr = None
-    if price > 0 and df["FCF"].abs().sum() > 0:
-        def npv_rate(r):
-            return sum(df.loc[i, "FCF"] / ((1+r)**int(df.loc[i,"Year"])) for i in df.index)
-        try:
-            low, high = -0.9, 1.0
-            for _ in range(80):
-                mid = (low + high)/2
-                val = npv_rate(mid)
-                if abs(val) < 1e-7: break
-                if val > 0: low = mid
-                else: high = mid
-            irr = (low + high)/2
-        except Exception:
-            irr = None
-
-    df["Cum_FCF"] = df["FCF"].cumsum()
+    fcf = [a["FCF"] for a in annuals]
+    npv = sum(a["PV_FCF"] for a in annuals)
+
+    irr, irr_status = None, "none"
+    if price > 0 and sum(abs(v) for v in fcf) > 0:
+        from .irr import solve_irr
+        with span("irr", len(fcf)):
+            irr, irr_status = solve_irr(fcf)
+
     payback_year = None
-    for _, row in df.iterrows():
-        if row["Cum_FCF"] >= 0:
-            payback_year = int(row["Year"])
-            break
+    for a, cum in zip(annuals, accumulate(fcf)):
+        a["Cum_FCF"] = cum
+        if payback_year is None and cum >= 0:
+            payback_year = int(a["Year"])
 
     y0_capex = 0.0
-    curve = capex_spend_by_year(fin)
-    for off, val in curve.items():
+    for off, val in capex_curve.items():
         if max(0, off) == 0:
             y0_capex += val
 
-    peak_opex = float((-df["OPEX"]).max()) if not df.empty else 0.0
-    peak_revenue = float((df["Revenue"]).max()) if not df.empty else 0.0
+    peak_opex = float(max(-a["OPEX"] for a in annuals)) if annuals else 0.0
+    peak_revenue = float(max(a["Revenue"] for a in annuals)) if annuals else 0.0
+
+    return {"currency": cur, "years_df": frame(annuals), "npv": npv, "irr": irr, "tpy": tpy, "price": price,
+            "irr_status": irr_status, "payback_year": payback_year, "year0_capex": y0_capex, "peak_opex": peak_opex, "peak_revenue": peak_revenue,
+            "opex_series": series}
 
-    return {"currency": cur, "years_df": df, "npv": npv, "irr": irr, "tpy": tpy, "price": price,
-            "payback_year": payback_year, "year0_capex": y0_capex, "peak_opex": peak_opex, "peak_revenue": peak_revenue}
+if __name__ == "__main__":
+    # python -m utils.costing_core ... : headless batch run, see utils/cli.py
+    from .cli import main
+    raise SystemExit(main())
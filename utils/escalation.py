@@ -0,0 +1,153 @@
+# utils/escalation.py
+# Per-category OPEX escalation. settings.escalationByCategory ({category: % per year}) overrides the general
+# settings.escalationPctPerYear for a cost category, and an "escalation_pct" cell overrides both for one row.
+# The base-year OPEX (subtotal + overhead + tax) is split into series by escalation rate; project_financials grows
+# them with one series × year multiplier matrix (utils/financials.py), the batch tools carry the series with their
+# own rate through every point they evaluate. Revenue keeps the general rate.
+# Pure Python (no NumPy), like the loop engine in utils/costing_core.py.
+from typing import Dict, Any, List, Optional, Tuple
+
+from .cache import cached, section_cached
+from .costing_core import compute_totals, current_scenario, fnum, section_items
+
+ROW_FIELD = "escalation_pct"
+# sections whose costed rows (compute_totals' process / extra / rubrics rows) follow the input rows one to one
+ROW_SECTIONS: List[Tuple[str, List[str]]] = [
+    ("process", ["recipe", "materials", "utilities", "byproducts"]),
+    ("extra", ["packaging", "logistics", "waste"]),
+    ("rubrics", ["rubrics"]),
+]
+
+def _rate(v: Any) -> Optional[float]:
+    """"4.5" / 4.5 -> 0.045; empty or unreadable cells -> None (no override)."""
+    if v is None or (isinstance(v, str) and not v.strip()):
+        return None
+    try:
+        x = float(v)
+    except (TypeError, ValueError):
+        return None
+    return None if x != x else x / 100.0
+
+def category_rates(data: Dict[str, Any]) -> Dict[str, float]:
+    """Yearly escalation (fraction) of every category that has its own rate."""
+    out: Dict[str, float] = {}
+    for cat, v in ((data.get("settings", {}) or {}).get("escalationByCategory") or {}).items():
+        r = _rate(v)
+        if r is not None:
+            out[str(cat)] = r
+    return out
+
+def row_rates(items: List[Dict[str, Any]], name: str) -> List[Tuple[int, float]]:
+    """(row index, rate) of the rows of a section with their own escalation (cached per section content)."""
+    def scan():
+        out = []
+        for i, v in enumerate([r.get(ROW_FIELD) for r in items]):
+            if v is not None:
+                rate = _rate(v)
+                if rate is not None:
+                    out.append((i, rate))
+        return out
+    return section_cached(name, items, scan, ROW_FIELD)
+
+def _overrides(data: Dict[str, Any]) -> Dict[str, List[Tuple[int, float]]]:
+    return {name: row_rates(section_items(data, name), name) for name in ["lineItems"] + [n for _, names in ROW_SECTIONS for n in names]}
+
+def has_own_rates(data: Dict[str, Any]) -> bool:
+    """Whether any category or row escalates at its own rate."""
+    return bool(category_rates(data)) or any(_overrides(data).values())
+
+def opex_series(data: Dict[str, Any]) -> Dict[str, List[Any]]:
+    """Base-year OPEX of the active scenario split into escalation series.
+
+    Returns {"label", "cost", "rate", "default"} lists: one series per cost category (carrying its overhead and tax),
+    then one per row with its own rate; "default" marks the series that follow settings.escalationPctPerYear.
+    Without category or row rates this is a single series, so the yearly OPEX is exactly base * (1 + esc) ** year.
+    """
+    return cached("escalation", data, lambda: _opex_series(data))
+
+def _opex_series(data: Dict[str, Any]) -> Dict[str, List[Any]]:
+    if not has_own_rates(data):
+        totals = compute_totals(data)
+        esc = fnum((data.get("settings", {}) or {}).get("escalationPctPerYear", 0.0)) / 100.0
+        return {"label": ["All categories"], "cost": [totals["subtotal"] + totals["overhead"] + totals["tax"]], "rate": [esc], "default": [True]}
+    sc = series_components(data)
+    scen = current_scenario(data)
+    cm = fnum(scen.get("costMultiplier", 1.0))
+    q = fnum(scen.get("quantityMultiplier", 1.0)) * cm
+    return {
+        "label": sc["label"],
+        "cost": [q * (p + m) + cm * f for p, m, f in zip(sc["per_t"], sc["manual"], sc["fixed"])],
+        "rate": sc["rate"],
+        "default": sc["default"],
+    }
+
+def series_components(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Neutral-scenario base-year OPEX of every escalation series, split by how it scales (see
+    scenarios.linear_components): "per_t" with throughput × quantity × cost multipliers, "manual" (line items) with
+    quantity × cost multipliers, "fixed" (per_year / fixed_project rubrics) with the cost multiplier only.
+
+    Also "label", "rate", "default" as in opex_series, and the series each costed row belongs to: "category"
+    {category: series} and "row" {section: {row: series}} for the rows with their own rate.
+    """
+    return cached("escalation_components", data, lambda: _series_components(data))
+
+def _series_components(data: Dict[str, Any]) -> Dict[str, Any]:
+    settings = data.get("settings", {}) or {}
+    esc = fnum(settings.get("escalationPctPerYear", 0.0)) / 100.0
+    rates = category_rates(data)
+    overrides = _overrides(data)
+    oh = fnum(settings.get("overheadPct", 0.0)) / 100.0
+    overhead_base = set(settings.get("overheadBase", ["Labor", "Logistics"]))
+    tax = fnum(settings.get("taxPct", 0.0)) / 100.0
+    base = compute_totals(dict(data, scenarios=[]))
+    cats = list(base["byCategory"])
+    # [per_t, manual, fixed] cost of each series, with the overhead and tax it causes
+    parts: List[List[float]] = [[0.0, 0.0, 0.0] for _ in cats]
+    series = {c: s for s, c in enumerate(cats)}
+    labels: List[str] = []
+    row_rate: List[float] = []
+    row_series: Dict[str, Dict[int, int]] = {}
+    def own_series(name: str, i: int, rate: float, label: str, group: int, x: float) -> None:
+        row_series.setdefault(name, {})[i] = len(parts)
+        parts.append([0.0, 0.0, 0.0])
+        parts[-1][group] = x
+        labels.append(label)
+        row_rate.append(rate)
+
+    # each row's cost plus the overhead and tax it causes, into its category's series or its own
+    loaded_oh = 1.0 + oh
+    own = dict(overrides["lineItems"])
+    for i, li in enumerate(section_items(data, "lineItems")):
+        cat = li.get("category", "Other")
+        c = fnum(li.get("quantity", 0.0)) * fnum(li.get("unitCost", 0.0))
+        x = c * (loaded_oh if cat in overhead_base else 1.0) + (c * tax if li.get("taxable", False) else 0.0)
+        if i in own:
+            own_series("lineItems", i, own[i], f"{li.get('description') or li.get('id') or 'line item'} (lineItems)", 1, x)
+        else:
+            parts[series[cat]][1] += x
+    for key, names in ROW_SECTIONS:
+        rows = (base.get(key) or {}).get("rows", [])
+        start = 0
+        for name in names:
+            n = len(section_items(data, name))
+            own = dict(overrides[name])
+            rubrics = name == "rubrics"
+            for i, r in enumerate(rows[start:start + n]):
+                c, cat = r["annual_cost"], r["category"]
+                x = c * (loaded_oh if cat in overhead_base else 1.0) + (c * tax if r["taxable"] else 0.0)
+                group = 2 if rubrics and r["basis"] != "per_t" else 0
+                if i in own:
+                    own_series(name, i, own[i], f"{r['name'] or 'row ' + str(i + 1)} ({name})", group, x)
+                else:
+                    parts[series[cat]][group] += x
+            start += n
+    return {
+        "label": cats + labels,
+        "per_t": [p[0] for p in parts],
+        "manual": [p[1] for p in parts],
+        "fixed": [p[2] for p in parts],
+        "rate": [rates.get(c, esc) for c in cats] + row_rate,
+        "default": [c not in rates for c in cats] + [False] * len(labels),
+        "category": series,
+        "row": row_series,
+    }
@@ -0,0 +1,108 @@
+# utils/financials.py
+# project_financials' yearly cash-flow model broadcast over many (opex, throughput, price, escalation,
+# discount) points at once. Used by the simulation, sensitivity, sweep and goal-seek tools.
+from typing import Dict, Any, Optional
+import numpy as np
+
+from .costing_core import fnum, finance_schedules, price_year1_multiplier
+from .escalation import has_own_rates, series_components
+
+# ---------- Escalation ----------
+def escalation_matrix(rates: Any, t: Any) -> np.ndarray:
+    """(series, periods) OPEX multipliers (1 + rate) ** t for yearly rates and times t in years."""
+    return (1.0 + np.asarray(rates, dtype=float))[:, None] ** np.ravel(np.asarray(t, dtype=float))[None, :]
+
+def yearly_opex(series: Dict[str, Any], years: Any) -> np.ndarray:
+    """OPEX of each year: the base-year series costs (utils/escalation.py) through the escalation matrix."""
+    return np.asarray(series["cost"], dtype=float) @ escalation_matrix(series["rate"], years)
+
+def own_rate_series(data: Dict[str, Any]) -> Dict[str, Any]:
+    """The OPEX escalating at its own rate, for the batch tools: one column per distinct rate (series sharing a rate grow
+    alike), with "rate" and the neutral-scenario base-year OPEX "per_t" / "manual" / "fixed" (utils/escalation.py) as
+    (K,) arrays and "category" / "row" maps to the columns. The rest of each point's OPEX follows the general rate."""
+    if not has_own_rates(data):
+        empty = np.zeros(0)
+        return {"rate": empty, "per_t": empty, "manual": empty, "fixed": empty, "category": {}, "row": {}}
+    sc = series_components(data)
+    rates: Dict[float, int] = {}
+    col = {s: rates.setdefault(r, len(rates)) for s, (r, d) in enumerate(zip(sc["rate"], sc["default"])) if not d}
+    per_t, manual, fixed = np.zeros(len(rates)), np.zeros(len(rates)), np.zeros(len(rates))
+    for s, k in col.items():
+        per_t[k] += sc["per_t"][s]
+        manual[k] += sc["manual"][s]
+        fixed[k] += sc["fixed"][s]
+    return {
+        "rate": np.array(list(rates), dtype=float),
+        "per_t": per_t,
+        "manual": manual,
+        "fixed": fixed,
+        "category": {c: col[s] for c, s in sc["category"].items() if s in col},
+        "row": {name: {i: col[s] for i, s in rows.items()} for name, rows in sc["row"].items()},
+    }
+
+def own_column(own: Dict[str, Any], section: str, row: int, category: Any) -> Optional[int]:
+    """Column of a costed row in own_rate_series: its own rate, else its category's; None if it follows the general rate."""
+    col = own["row"].get(section, {}).get(row)
+    return own["category"].get(category) if col is None else col
+
+def own_opex(own: Dict[str, Any], qm: Any = 1.0, cm: Any = 1.0, tpy_scale: Any = 1.0) -> np.ndarray:
+    """(P, K) base-year OPEX of the own-rate series at P multiplier points, like scenarios.evaluate_components."""
+    qm, cm, ts = np.broadcast_arrays(*(np.atleast_1d(np.asarray(x, dtype=float)) for x in (qm, cm, tpy_scale)))
+    q = qm * cm
+    return np.outer(q * ts, own["per_t"]) + np.outer(q, own["manual"]) + np.outer(cm, own["fixed"])
+
+def own_escalation(own: Dict[str, Any], opex: Optional[Any], t: Any, growth: np.ndarray) -> Optional[np.ndarray]:
+    """What the own-rate series add to OPEX grown at the general rate (`growth`, (P, T)) at times t (years);
+    None if there are none."""
+    if not own["rate"].size:
+        return None
+    if opex is None:
+        raise ValueError("The project has OPEX with its own escalation rate: pass its base-year OPEX per series (own_opex)")
+    opex = np.atleast_2d(np.asarray(opex, dtype=float))
+    return opex @ escalation_matrix(own["rate"], t) - opex.sum(axis=1, keepdims=True) * growth
+
+# ---------- Yearly cash flows ----------
+def financial_inputs(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Everything project_financials needs besides the base-year OPEX and throughput, as plain floats/arrays (picklable)."""
+    fin = data.get("finance", {})
+    horizon = int(fnum(fin.get("horizon_years", 10)))
+    years = np.arange(horizon + 1)
+    capex_curve, depreciation = finance_schedules(fin, horizon)
+    capex = np.zeros(horizon + 1)
+    for off, val in capex_curve.items():
+        if max(0, off) <= horizon:
+            capex[max(0, off)] += val
+    dep = np.array([depreciation.get(int(y), 0.0) for y in years]) if fin.get("include_depreciation", True) else np.zeros(horizon + 1)
+    return {
+        "years": years,
+        "capex": capex,
+        "dep": dep,
+        "price": fnum(fin.get("selling_price_per_t", 0.0)),
+        "esc": fnum(data.get("settings", {}).get("escalationPctPerYear", 0.0)) / 100.0,
+        "tax_rate": fnum(data.get("settings", {}).get("taxPct", 0.0)) / 100.0,
+        "disc": fnum(data.get("project", {}).get("discountRatePct", 10.0)) / 100.0,
+        "price_year1_mult": price_year1_multiplier(data),
+        "own": own_rate_series(data),
+    }
+
+def evaluate_financials(fi: Dict[str, Any], base_opex: Any, tpy: Any, price: Optional[Any] = None, esc: Optional[Any] = None, disc: Optional[Any] = None,
+                        opex_own: Optional[Any] = None) -> Dict[str, np.ndarray]:
+    """Yearly cash flows for P points; every argument broadcasts to shape (P,), results are (P, years).
+
+    base_opex is each point's total base-year OPEX; opex_own ((P, K) or (K,), see own_opex) the part of it in the
+    series with their own escalation rate (fi["own"]), required when there are any. The rest grows at esc.
+    """
+    args = [base_opex, tpy, fi["price"] if price is None else price, fi["esc"] if esc is None else esc, fi["disc"] if disc is None else disc]
+    bo, tpy, price, esc, disc = (a[:, None] for a in np.broadcast_arrays(*(np.atleast_1d(np.asarray(a, dtype=float)) for a in args)))
+    y = fi["years"][None, :]
+    growth = (1.0 + esc) ** y
+    opex = bo * growth
+    own = own_escalation(fi["own"], opex_own, fi["years"], growth)
+    if own is not None:
+        opex = opex + own
+    revenue = np.where((price > 0) & (tpy > 0), price * tpy * np.where(y == 0, fi["price_year1_mult"], growth), 0.0)
+    dep = fi["dep"][None, :]
+    tax = np.maximum(0.0, (revenue - opex - dep) * fi["tax_rate"])
+    fcf = (revenue - opex) - tax + dep - fi["capex"][None, :]
+    pv = fcf / (1.0 + disc) ** y
+    return {"revenue": revenue, "opex": opex, "tax": tax, "fcf": fcf, "pv": pv, "npv": pv.sum(axis=1)}
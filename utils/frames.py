@@ -0,0 +1,11 @@
+# utils/frames.py
+# Thin pandas adapter: the costing core builds plain rows and only turns them into DataFrames here,
+# so importing the core (state, assistant, batch workers) does not pay for importing pandas.
+from typing import Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+def frame(rows: Any, **kwargs: Any) -> "pd.DataFrame":
+    import pandas as pd  # first call pays the import; later calls hit sys.modules
+    return pd.DataFrame(rows, **kwargs)
@@ -0,0 +1,72 @@
+# utils/frozen.py
+# Copy-on-write state: row tables (and everything inside them) are frozen and shared between state versions,
+# the small dicts above them (project, settings, finance, ...) are copied. Pages already replace a section by
+# assignment (data["recipe"] = df.to_dict(...)) and never mutate a list in place, so assignment is the "write".
+from typing import Dict, Any, Optional
+
+def _readonly(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} is shared between state snapshots; assign a new value instead of mutating it")
+
+class FrozenList(list):
+    """Read-only list: copy/deepcopy return it as-is, pickles as its content; `_fp` memoizes its fingerprint."""
+    __slots__ = ("_fp",)
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+class FrozenDict(dict):
+    """Read-only dict (a row of a frozen table); same sharing rules as FrozenList."""
+    __slots__ = ("_fp",)
+    update = pop = popitem = clear = setdefault = _readonly
+    __setitem__ = __delitem__ = __ior__ = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+def freeze(obj: Any) -> Any:
+    if isinstance(obj, (FrozenList, FrozenDict)):
+        return obj
+    if isinstance(obj, (list, tuple)):
+        return FrozenList(freeze(v) for v in obj)
+    if isinstance(obj, dict):
+        return FrozenDict((k, freeze(v)) for k, v in obj.items())
+    return obj
+
+def snapshot(data: Dict[str, Any], prev: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Cheap immutable-in-its-tables copy of `data`.
+
+    Every list is frozen and written back into `data`, so the live state and the snapshot share it; a list equal
+    to the one at the same place in `prev` (an earlier snapshot) is replaced by that one, so unchanged sections
+    keep being shared (and keep their memoized fingerprints) even after a page re-assigned them.
+    """
+    def walk(node: Dict[str, Any], old: Any) -> Dict[str, Any]:
+        old = old if isinstance(old, dict) else {}
+        out = {}
+        for k, v in node.items():
+            if isinstance(v, FrozenDict) or not isinstance(v, (dict, list)):
+                out[k] = v
+                continue
+            if isinstance(v, dict):
+                out[k] = walk(v, old.get(k))
+                continue
+            o = old.get(k)
+            nv = v if isinstance(v, FrozenList) else o if isinstance(o, FrozenList) and o == v else freeze(v)
+            if nv is not v:
+                node[k] = nv
+            out[k] = nv
+        return out
+    return walk(data, prev)
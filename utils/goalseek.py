@@ -0,0 +1,237 @@
+# utils/goalseek.py
+# Goal seek / breakeven: the value of one input (selling price, throughput, a row's price, discount rate) that puts
+# NPV, IRR or unit total cost on a target, solved for every scenario at once. Totals are affine in each of these
+# inputs, so unit-cost targets are solved in closed form; NPV/IRR (piecewise linear through the tax floor) use a
+# secant guess refined by bracketed false position, all scenarios moving together as one array.
+from typing import Dict, Any, List, Optional, Callable, Tuple
+import numpy as np
+
+from .costing_core import compute_totals, current_scenario, section_items, section_kernels, fnum
+from .financials import financial_inputs, evaluate_financials, own_column, own_opex
+from .irr import irr_batch
+from .scenarios import linear_components, evaluate_components, scenario_multipliers
+from .sensitivity import ROW_DRIVERS
+
+GOAL_VARIABLES: Dict[str, str] = {
+    "price": "Selling price (per t)",
+    "throughput": "Throughput (t/y)",
+    "row": "Row unit price",
+    "discount": "Discount rate (%)",
+}
+GOAL_METRICS: Dict[str, str] = {"npv": "NPV", "irr": "IRR (%)", "unit": "Unit total cost (per t)"}
+
+# section -> price field solved for when the variable is "row" (fixed_project rubrics use "quantity", their amount)
+ROW_PRICE_FIELDS: Dict[str, str] = {section: fields[0] for section, fields in ROW_DRIVERS.values()}
+ROW_PRICE_FIELDS["lineItems"] = "unitCost"
+
+# ---------- Row choices ----------
+def row_choices(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Rows whose price can be solved for: {label, section, row, field, value}."""
+    out: List[Dict[str, Any]] = []
+    for section, field in ROW_PRICE_FIELDS.items():
+        for i, r in enumerate(section_items(data, section)):
+            f = "quantity" if section == "rubrics" and (r.get("basis") or "per_t").strip().lower() == "fixed_project" else field
+            name = r.get("description" if section == "lineItems" else "name") or f"#{i + 1}"
+            out.append({"label": f"{section} · {name} · {f}", "section": section, "row": i, "field": f, "value": fnum(r.get(f, 0.0))})
+    return out
+
+def _row_slope(data: Dict[str, Any], section: str, row: int, field: str) -> Tuple[float, str, bool, bool]:
+    """(neutral-scenario cost per unit of the field, category, taxable, scales with quantity multiplier)."""
+    r = section_items(data, section)[row]
+    if section == "lineItems":
+        return fnum(r.get("quantity", 0.0)), r.get("category", "Other"), bool(r.get("taxable", False)), True
+    kernel = section_kernels()[section]
+    tpy = fnum((data.get("process", {}) or {}).get("throughput_tpy", 0.0))
+    cur = data.get("project", {}).get("currency", "MAD")
+    rows1, cost1, _ = kernel([dict(r, **{field: 1.0})], tpy, 1.0, cur)
+    _, cost0, _ = kernel([dict(r, **{field: 0.0})], tpy, 1.0, cur)
+    per_t = section != "rubrics" or rows1[0]["basis"] == "per_t"
+    return cost1 - cost0, rows1[0]["category"], bool(rows1[0]["taxable"]), per_t
+
+# ---------- Model: x (one value per scenario) -> opex, own-rate opex, total, throughput, price, discount ----------
+def _model(data: Dict[str, Any], comp: Dict[str, Any], mult: Dict[str, Any], variable: str, row: Optional[Dict[str, Any]]):
+    fi = financial_inputs(data)
+    qm, cm, dc = mult["qm"], mult["cm"], mult["dc"]
+    base = evaluate_components(comp, qm, cm, dc)
+    opex0 = base["subtotal"] + base["overhead"] + base["tax"]
+    own0 = own_opex(fi["own"], qm, cm)
+    n = len(qm)
+    price0 = np.full(n, fi["price"])
+    disc0 = np.full(n, fi["disc"])
+    lower, upper = 0.0, np.inf
+    if variable == "price":
+        x0, scale = price0, np.abs(base["unit"])
+        def model(x):
+            return opex0, own0, base["total"], base["tpy"], x, disc0
+    elif variable == "throughput":
+        tp0 = comp["tpy"]
+        x0, scale = np.full(n, tp0), np.full(n, abs(tp0))
+        def model(x):
+            ts = x / tp0 if tp0 else np.zeros(n)
+            e = evaluate_components(comp, qm, cm, dc, ts)
+            return e["subtotal"] + e["overhead"] + e["tax"], own_opex(fi["own"], qm, cm, ts), e["total"], e["tpy"], price0, disc0
+    elif variable == "row":
+        slope, category, taxable, per_t = _row_slope(data, row["section"], row["row"], row["field"])
+        d_cost = slope * (qm * cm if per_t else cm)
+        in_overhead = category in set(data.get("settings", {}).get("overheadBase", ["Labor", "Logistics"]))
+        pre = d_cost * (1.0 + comp["overheadPct"] / 100.0 * in_overhead)
+        tax = d_cost * comp["taxPct"] / 100.0 * taxable
+        d_opex = pre + tax
+        d_total = pre * (1.0 + base["contingencyPct"] / 100.0) + tax
+        col = own_column(fi["own"], row["section"], row["row"], category)
+        x0, scale = np.full(n, row["value"]), np.full(n, abs(row["value"]))
+        def model(x):
+            own = own0.copy()
+            if col is not None:
+                own[:, col] += d_opex * (x - x0)
+            return opex0 + d_opex * (x - x0), own, base["total"] + d_total * (x - x0), base["tpy"], price0, disc0
+    elif variable == "discount":
+        x0, scale = disc0 * 100.0, np.full(n, 10.0)
+        lower = -99.0
+        def model(x):
+            return opex0, own0, base["total"], base["tpy"], price0, x / 100.0
+    else:
+        raise ValueError(f"Unknown goal-seek variable {variable!r}")
+    return fi, model, x0, 0.1 * np.maximum(np.maximum(np.abs(x0), scale), 1e-6), lower, upper
+
+def _unit(total: np.ndarray, tpy: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(tpy != 0, total / np.where(tpy != 0, tpy, 1.0), np.nan)
+
+# ---------- Root finding ----------
+def bracketed_root(f: Callable[[np.ndarray], np.ndarray], x0: np.ndarray, step: np.ndarray, lower: float = -np.inf, upper: float = np.inf,
+                   xtol: float = 1e-12, maxiter: int = 100) -> Tuple[np.ndarray, np.ndarray]:
+    """Root of an elementwise function for each element: secant guess from (x0, x0 + step) (exact when f is linear),
+    bracket expansion towards it, then Illinois false position. Returns (x, found); x is NaN where no sign change
+    exists in [lower, upper]."""
+    a = np.clip(np.asarray(x0, dtype=float), lower, upper)
+    fa = f(a)
+    b = np.clip(a + step, lower, upper)
+    b = np.where(b == a, np.clip(a - step, lower, upper), b)
+    fb = f(b)
+    with np.errstate(all="ignore"):
+        guess = b - fb * (b - a) / (fb - fa)
+    hi = np.clip(np.where(np.isfinite(guess), guess, b), lower, upper)
+    fhi = f(hi)
+    lo, flo = a, fa
+    d = hi - lo
+    failed = d == 0
+    # expand (doubling) past the guess until the sign changes or a bound is hit
+    for _ in range(64):
+        need = (np.sign(flo) == np.sign(fhi)) & (fhi != 0) & ~failed
+        if not need.any():
+            break
+        nxt = np.clip(hi + d, lower, upper)
+        failed |= need & (nxt == hi)
+        move = need & ~failed
+        lo, flo = np.where(move, hi, lo), np.where(move, fhi, flo)
+        hi, d = np.where(move, nxt, hi), np.where(move, 2.0 * d, d)
+        fhi = f(hi)
+    found = ~failed & ((np.sign(flo) != np.sign(fhi)) | (fhi == 0))
+    ftol = 1e-13 * (np.abs(fa) + np.abs(fb))
+    done = ~found | (np.abs(fhi) <= ftol)
+    with np.errstate(all="ignore"):
+        for _ in range(maxiter):
+            if done.all():
+                break
+            x = hi - fhi * (hi - lo) / (fhi - flo)
+            x = np.where(np.isfinite(x), x, 0.5 * (lo + hi))
+            fx = f(x)
+            act = ~done
+            flip = act & (np.sign(fx) != np.sign(fhi))
+            keep = act & ~flip
+            lo, flo = np.where(flip, hi, lo), np.where(flip, fhi, np.where(keep, 0.5 * flo, flo))
+            hi, fhi = np.where(act, x, hi), np.where(act, fx, fhi)
+            done |= act & ((np.abs(fx) <= ftol) | (np.abs(hi - lo) <= xtol * (1.0 + np.abs(x))))
+    return np.where(found, hi, np.nan), found
+
+# ---------- Goal seek ----------
+def goal_seek(data: Dict[str, Any], variable: str, metric: str, target: float, row: Optional[Dict[str, Any]] = None,
+              scenario_ids: Optional[List[Any]] = None) -> Dict[str, List[Any]]:
+    """Value of `variable` that brings `metric` to `target` in each scenario.
+
+    variable: "price", "throughput", "row" (a row_choices() entry in `row`) or "discount" (in %); metric: "npv",
+    "irr" (target in %) or "unit". Columns: id, name, current, solution, change, achieved, status; status is
+    "ok", "multiple" (several discount rates give the target NPV), "no effect" (the metric does not depend on the
+    variable) or "out of range" (no solution with price / throughput / row price >= 0).
+    """
+    if scenario_ids is None:
+        scenario_ids = [s.get("id") for s in data.get("scenarios", []) or []] or [data.get("activeScenarioId")]
+    mult = scenario_multipliers(data, scenario_ids)
+    comp = linear_components(data)
+    fi, model, x0, step, lower, upper = _model(data, comp, mult, variable, row)
+    n = len(x0)
+    status = np.full(n, "ok", dtype=object)
+
+    def fcf(x, disc=None):
+        opex, own, _, tpy, price, d = model(x)
+        return evaluate_financials(fi, opex, tpy, price=price, disc=d if disc is None else disc, opex_own=own)
+
+    if metric == "unit":
+        # total - target * tpy is affine in every variable: two evaluations give the exact root
+        def g(x):
+            _, _, total, tpy, _, _ = model(x)
+            return total - target * tpy
+        g0, g1 = g(x0), g(x0 + step)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x = x0 - g0 * step / (g1 - g0)
+        flat = g1 == g0
+        x = np.where(flat, np.nan, x)
+        status[flat & (g0 != 0)] = "no effect"
+        status[flat & (g0 == 0)] = "ok"
+        x = np.where(flat & (g0 == 0), x0, x)
+        bad = ~flat & ~((x >= lower) & (x <= upper))
+        status[bad] = "out of range"
+        x = np.where(bad, np.nan, x)
+    elif variable == "discount" and metric == "npv":
+        # NPV(r) = target  <=>  IRR of the cash flows with the target taken out of year 0
+        cf = fcf(x0)["fcf"].copy()
+        cf[:, 0] -= target
+        rates, roots = irr_batch(cf)
+        x = rates * 100.0
+        status[roots == 0] = "out of range"
+        status[roots > 1] = "multiple"
+    elif variable == "discount":
+        x = np.full(n, np.nan)
+        status[:] = "no effect"
+    else:
+        disc = target / 100.0 if metric == "irr" else None
+        shift = 0.0 if metric == "irr" else target
+        def f(v):
+            return fcf(v, disc)["npv"] - shift
+        x, found = bracketed_root(f, x0, step, lower, upper)
+        status[~found] = "out of range"
+        status[~found & (f(x0) == f(x0 + step))] = "no effect"
+
+    ok = np.isfinite(x)
+    xs = np.where(ok, x, x0)
+    if metric == "unit":
+        _, _, total, tpy, _, _ = model(xs)
+        achieved = _unit(total, tpy)
+    elif metric == "npv":
+        achieved = fcf(xs)["npv"]
+    else:
+        achieved = irr_batch(fcf(xs)["fcf"])[0] * 100.0
+    achieved = np.where(ok, achieved, np.nan)
+    return {
+        "id": list(scenario_ids),
+        "name": [nm if nm is not None else "Base" for nm in mult["name"]],
+        "current": x0.tolist(),
+        "solution": x.tolist(),
+        "change": (x - x0).tolist(),
+        "achieved": achieved.tolist(),
+        "status": status.tolist(),
+    }
+
+def current_metric(data: Dict[str, Any], metric: str) -> float:
+    """Metric of the active scenario, for a sensible default target."""
+    totals = compute_totals(data)
+    if metric == "unit":
+        return (totals["total"] / totals["tpy"]) if totals["tpy"] else 0.0
+    fi = financial_inputs(data)
+    scen = current_scenario(data)
+    own = own_opex(fi["own"], fnum(scen.get("quantityMultiplier", 1.0)), fnum(scen.get("costMultiplier", 1.0)))
+    res = evaluate_financials(fi, totals["subtotal"] + totals["overhead"] + totals["tax"], totals["tpy"], opex_own=own)
+    if metric == "npv":
+        return float(res["npv"][0])
+    return float(irr_batch(res["fcf"])[0][0] * 100.0)
@@ -0,0 +1,86 @@
+# utils/irr.py
+# IRR on NumPy cash-flow arrays: grid bracketing + safeguarded Newton, vectorized over many vectors.
+# Cash flow k is discounted by (1 + r)^k (k = 0 is undiscounted).
+from typing import Any, Optional, Tuple
+import numpy as np
+
+# Search grid for sign changes: dense around usual project rates, sparse towards the extremes.
+_GRID = np.unique(np.concatenate([
+    np.linspace(-0.99, -0.5, 8),
+    np.linspace(-0.5, 1.0, 61),
+    np.geomspace(1.0, 10.0, 16),
+]))
+
+def npv(rate: Any, cashflows: Any) -> np.ndarray:
+    """NPV of each cash-flow row at the matching rate (rates broadcast against the leading axes)."""
+    cf = np.asarray(cashflows, dtype=float)
+    r = np.asarray(rate, dtype=float)[..., None]
+    k = np.arange(cf.shape[-1])
+    return (cf / (1.0 + r) ** k).sum(axis=-1)
+
+def _scaled_npv(cf: np.ndarray, r: np.ndarray, with_slope: bool = False):
+    # Same sign as NPV but overflow-free: for r >= 0 use x = 1/(1+r) and sum c_k x^k; for r < 0 multiply
+    # by (1+r)^T and sum c_k y^(T-k) with y = 1+r, so every power has a base in (0, 1].
+    T = cf.shape[1] - 1
+    k = np.arange(T + 1, dtype=float)
+    pos = r >= 0
+    base = np.where(pos, 1.0 / (1.0 + r), 1.0 + r)[:, None]
+    expo = np.where(pos[:, None], k[None, :], T - k[None, :])
+    terms = cf * base ** expo
+    f = terms.sum(axis=1)
+    if not with_slope:
+        return f
+    # d/dr: r >= 0 -> -sum k c_k x^(k+1); r < 0 -> sum (T-k) c_k y^(T-k-1)
+    df = np.where(pos, -(terms * expo * base).sum(axis=1), (terms * expo / base).sum(axis=1))
+    return f, df
+
+def irr_batch(cashflows: Any, tol: float = 1e-12, maxiter: int = 100) -> Tuple[np.ndarray, np.ndarray]:
+    """IRR for each row of a 2-D cash-flow array.
+
+    Returns (rates, roots): rates is NaN where NPV never changes sign on [-99%, 1000%]; roots counts the
+    sign changes found on the search grid, so roots > 1 flags vectors with several IRRs (the one closest
+    to 0% is returned).
+    """
+    cf = np.atleast_2d(np.asarray(cashflows, dtype=float))
+    n = cf.shape[0]
+    k = np.arange(cf.shape[1], dtype=float)
+    T = k[-1]
+    # On the grid the rate is shared by all rows, so the weights are one matrix and g is a single matmul.
+    with np.errstate(all="ignore"):
+        weights = np.where(_GRID[None, :] >= 0, (1.0 / (1.0 + _GRID[None, :])) ** k[:, None], (1.0 + _GRID[None, :]) ** (T - k[:, None]))
+        g = cf @ weights
+    neg = g < 0
+    change = neg[:, :-1] != neg[:, 1:]
+    roots = change.sum(axis=1)
+    mid = np.abs(0.5 * (_GRID[:-1] + _GRID[1:]))
+    pick = np.where(change, mid[None, :], np.inf).argmin(axis=1)
+    found = roots > 0
+    lo, hi = _GRID[pick], _GRID[pick + 1]
+    flo = g[np.arange(n), pick]
+    r = 0.5 * (lo + hi)
+    scale = np.abs(cf).sum(axis=1) + 1e-300
+    done = ~found
+    with np.errstate(all="ignore"):
+        for _ in range(maxiter):
+            f, df = _scaled_npv(cf, r, with_slope=True)
+            done |= (np.abs(f) <= tol * scale) | (hi - lo <= tol * (1.0 + np.abs(r)))
+            if done.all():
+                break
+            same = (f < 0) == (flo < 0)
+            lo = np.where(same, r, lo)
+            flo = np.where(same, f, flo)
+            hi = np.where(same, hi, r)
+            step = r - f / df
+            newton_ok = np.isfinite(step) & (step > lo) & (step < hi)
+            r = np.where(done, r, np.where(newton_ok, step, 0.5 * (lo + hi)))
+    return np.where(found, r, np.nan), roots
+
+def solve_irr(cashflows: Any) -> Tuple[Optional[float], str]:
+    """IRR of one cash-flow vector plus a status: "ok", "none" (no sign change) or "multiple"."""
+    rates, roots = irr_batch(np.asarray(cashflows, dtype=float)[None, :])
+    if not roots[0]:
+        return None, "none"
+    return float(rates[0]), "ok" if roots[0] == 1 else "multiple"
+
+def irr(cashflows: Any) -> Optional[float]:
+    return solve_irr(cashflows)[0]
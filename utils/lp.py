@@ -0,0 +1,147 @@
+# utils/lp.py
+# Linear programs on NumPy: dense two-phase simplex (Dantzig pricing, Bland's rule after a run of degenerate pivots).
+#   minimize c·x  subject to  A_ub x <= b_ub,  A_eq x = b_eq,  lb <= x <= ub
+# Sized for formulation problems (hundreds of variables, dozens of constraints), not for large sparse models.
+from typing import Any, Dict
+import numpy as np
+
+_TOL = 1e-9
+
+def _pivot(T: np.ndarray, r: int, j: int) -> None:
+    T[r] /= T[r, j]
+    col = T[:, j].copy()
+    col[r] = 0.0
+    T -= np.outer(col, T[r])
+
+def _flip(T: np.ndarray, j: int, u: float, flipped: np.ndarray) -> None:
+    # substitute y_j = u_j - y'_j: the variable now sits at its upper bound when y'_j = 0
+    T[:, -1] -= u * T[:, j]
+    T[:, j] *= -1.0
+    flipped[j] = not flipped[j]
+
+def _simplex(T: np.ndarray, basis: np.ndarray, upper: np.ndarray, flipped: np.ndarray, maxiter: int) -> tuple:
+    """Pivot the tableau to optimality (last row: reduced costs, last column: right-hand side).
+
+    Bounded variables: a nonbasic variable sits at 0 or, when flipped, at its upper bound, so upper bounds never
+    become rows. A step either flips the entering variable or pivots out the basic variable that first hits a bound.
+    """
+    degenerate = 0
+    for it in range(maxiter):
+        d = T[-1, :-1]
+        if degenerate > 50:
+            cand = np.flatnonzero(d < -_TOL)  # Bland: lowest index, no cycling
+            if not cand.size:
+                return "optimal", it
+            j = int(cand[0])
+        else:
+            j = int(d.argmin())
+            if d[j] >= -_TOL:
+                return "optimal", it
+        col = T[:-1, j]
+        rhs = T[:-1, -1]
+        ratios = np.full(col.shape, np.inf)
+        pos = col > _TOL
+        ratios[pos] = rhs[pos] / col[pos]
+        neg = (col < -_TOL) & np.isfinite(upper[basis])
+        ratios[neg] = (upper[basis][neg] - rhs[neg]) / -col[neg]
+        best = ratios.min() if ratios.size else np.inf
+        if upper[j] <= best:
+            if not np.isfinite(upper[j]):
+                return "unbounded", it
+            _flip(T, j, upper[j], flipped)
+            degenerate = degenerate + 1 if upper[j] <= _TOL else 0
+            continue
+        ties = np.flatnonzero(ratios <= best + _TOL * (1.0 + abs(best)))
+        r = int(ties[basis[ties].argmin()])
+        to_upper = bool(neg[r])
+        degenerate = degenerate + 1 if best <= _TOL else 0
+        leaving = int(basis[r])
+        _pivot(T, r, j)
+        basis[r] = j
+        if to_upper:
+            _flip(T, leaving, upper[leaving], flipped)
+    return "iteration limit", maxiter
+
+def linprog(c: Any, A_ub: Any = None, b_ub: Any = None, A_eq: Any = None, b_eq: Any = None,
+            lb: Any = None, ub: Any = None, maxiter: int = 10_000) -> Dict[str, Any]:
+    """Solve the LP; returns {"status", "x", "fun", "iterations"}.
+
+    status is "optimal", "infeasible", "unbounded" or "iteration limit"; x and fun are None unless optimal.
+    lb defaults to 0 and must be finite; ub defaults to +inf.
+    """
+    c = np.asarray(c, dtype=float)
+    n = c.size
+    A_ub = np.zeros((0, n)) if A_ub is None else np.atleast_2d(np.asarray(A_ub, dtype=float)).reshape(-1, n)
+    b_ub = np.zeros(0) if b_ub is None else np.asarray(b_ub, dtype=float).ravel()
+    A_eq = np.zeros((0, n)) if A_eq is None else np.atleast_2d(np.asarray(A_eq, dtype=float)).reshape(-1, n)
+    b_eq = np.zeros(0) if b_eq is None else np.asarray(b_eq, dtype=float).ravel()
+    lb = np.zeros(n) if lb is None else np.broadcast_to(np.asarray(lb, dtype=float), (n,)).copy()
+    ub = np.full(n, np.inf) if ub is None else np.broadcast_to(np.asarray(ub, dtype=float), (n,)).copy()
+    if not np.isfinite(lb).all():
+        raise ValueError("linprog: lower bounds must be finite")
+    if (ub < lb - _TOL).any():
+        return {"status": "infeasible", "x": None, "fun": None, "iterations": 0}
+
+    # x = lb + y, 0 <= y <= ub - lb
+    m_le, m_eq = A_ub.shape[0], A_eq.shape[0]
+    m = m_le + m_eq
+    # scale rows for conditioning, then make every right-hand side non-negative
+    A_rows = np.vstack([A_ub, A_eq])
+    scale = np.abs(A_rows).max(axis=1, initial=0.0)
+    scale = np.where(scale > 0, scale, 1.0)
+    A = np.hstack([A_rows / scale[:, None], np.vstack([np.eye(m_le), np.zeros((m_eq, m_le))])])
+    b = (np.concatenate([b_ub, b_eq]) - A_rows @ lb) / scale
+    neg = b < 0
+    A[neg] *= -1.0
+    b[neg] *= -1.0
+    # slack columns already form a basis for non-flipped <= rows; the rest get an artificial variable
+    needs_art = np.concatenate([neg[:m_le], np.ones(m_eq, dtype=bool)])
+    art_rows = np.flatnonzero(needs_art)
+    n_std = n + m_le
+    n_art = art_rows.size
+    T = np.zeros((m + 1, n_std + n_art + 1))
+    T[:m, :n_std] = A
+    T[art_rows, n_std + np.arange(n_art)] = 1.0
+    T[:m, -1] = b
+    basis = n + np.arange(m)
+    basis[art_rows] = n_std + np.arange(n_art)
+    upper = np.concatenate([ub - lb, np.full(m_le + n_art, np.inf)])
+    flipped = np.zeros(n_std + n_art, dtype=bool)
+
+    iterations = 0
+    if n_art:
+        T[-1, :n_std] = -T[art_rows, :n_std].sum(axis=0)
+        T[-1, -1] = -T[art_rows, -1].sum()
+        status, it = _simplex(T, basis, upper, flipped, maxiter)
+        iterations += it
+        if status == "iteration limit":
+            return {"status": status, "x": None, "fun": None, "iterations": iterations}
+        if -T[-1, -1] > _TOL * (1.0 + np.abs(b).sum()):
+            return {"status": "infeasible", "x": None, "fun": None, "iterations": iterations}
+        # drive remaining (zero-level) artificials out of the basis; rows where that is impossible are redundant
+        keep = np.ones(m, dtype=bool)
+        for r in np.flatnonzero(basis >= n_std).tolist():
+            cols = np.flatnonzero(np.abs(T[r, :n_std]) > _TOL)
+            if cols.size:
+                _pivot(T, r, int(cols[0]))
+                basis[r] = cols[0]
+            else:
+                keep[r] = False
+        T = np.vstack([T[:-1][keep], T[-1:]])
+        T = np.delete(T, np.s_[n_std:n_std + n_art], axis=1)
+        basis, upper, flipped = basis[keep], upper[:n_std], flipped[:n_std]
+
+    # phase 2 costs in the flipped variables: a flipped column carries -c_j (its constant goes to the objective)
+    cost = np.concatenate([c, np.zeros(m_le)])
+    T[-1, :] = 0.0
+    T[-1, :n_std] = np.where(flipped, -cost, cost)
+    T[-1] -= T[-1, basis] @ T[:-1]
+    status, it = _simplex(T, basis, upper, flipped, maxiter - iterations)
+    iterations += it
+    if status != "optimal":
+        return {"status": status, "x": None, "fun": None, "iterations": iterations}
+    y = np.where(flipped, upper, 0.0)
+    val = T[:-1, -1]
+    y[basis] = np.where(flipped[basis], upper[basis] - val, val)
+    x = lb + y[:n]
+    return {"status": "optimal", "x": x, "fun": float(c @ x), "iterations": iterations}
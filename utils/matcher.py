@@ -0,0 +1,90 @@
+# utils/matcher.py
+# Whole-word phrase matching in one pass: an Aho–Corasick automaton over every phrase of every rule, built once.
+# A rule is a sequence of phrase groups that must occur in order (one phrase per group, as whole words); the
+# first rule, in declaration order, that is satisfied wins. Per-query cost grows with the query and its hits,
+# not with the number of rules.
+from typing import Dict, List, Optional, Sequence, Tuple
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+class PhraseMatcher:
+    def __init__(self, rules: Sequence[Tuple[str, Sequence[Sequence[str]]]]):
+        self.labels = [label for label, _ in rules]
+        self.groups = [len(groups) for _, groups in rules]
+        self.phrases: List[str] = []
+        # phrase id -> [(rule index, group index)]
+        self.postings: List[List[Tuple[int, int]]] = []
+        ids: Dict[str, int] = {}
+        for r, (_, groups) in enumerate(rules):
+            for g, phrases in enumerate(groups):
+                for p in phrases:
+                    p = p.lower()
+                    if p not in ids:
+                        ids[p] = len(self.phrases)
+                        self.phrases.append(p)
+                        self.postings.append([])
+                    self.postings[ids[p]].append((r, g))
+        self._build()
+
+    def _build(self) -> None:
+        # trie: goto[node] = {char: node}; out[node] = phrase ids ending here (own + via failure links)
+        goto: List[Dict[str, int]] = [{}]
+        out: List[List[int]] = [[]]
+        for pid, p in enumerate(self.phrases):
+            node = 0
+            for ch in p:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    out.append([])
+                node = nxt
+            out[node].append(pid)
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for node in queue:  # breadth-first: a node's failure target is always finished before it
+            for ch, nxt in goto[node].items():
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] = out[nxt] + out[fail[nxt]]
+                queue.append(nxt)
+        self._goto, self._fail, self._out = goto, fail, out
+
+    def hits(self, text: str) -> List[Tuple[int, int, int]]:
+        """(start, end, phrase id) of every whole-word phrase occurrence in the lower-cased text."""
+        text = text.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        found: List[Tuple[int, int, int]] = []
+        node = 0
+        n = len(text)
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node] and (i + 1 == n or not _is_word(text[i + 1])):
+                for pid in out[node]:
+                    start = i + 1 - len(self.phrases[pid])
+                    if start == 0 or not _is_word(text[start - 1]):
+                        found.append((start, i + 1, pid))
+        return found
+
+    def match(self, text: str) -> Optional[str]:
+        """Label of the first rule whose groups all occur, in order; None when no rule matches."""
+        by_rule: Dict[int, List[List[Tuple[int, int]]]] = {}
+        for start, end, pid in self.hits(text):
+            for r, g in self.postings[pid]:
+                by_rule.setdefault(r, [[] for _ in range(self.groups[r])])[g].append((start, end))
+        for r in sorted(by_rule):
+            pos = 0
+            for spans in by_rule[r]:
+                ends = [e for s, e in spans if s >= pos]
+                if not ends:
+                    break
+                pos = min(ends)  # earliest-ending occurrence leaves the most room for the next group
+            else:
+                return self.labels[r]
+        return None
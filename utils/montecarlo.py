@@ -0,0 +1,119 @@
+# utils/montecarlo.py
+# Monte Carlo on the costed rows: triangular cost/quantity uncertainty per row, Bernoulli risk events,
+# vectorized per chunk of iterations and optionally spread over a process pool.
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
+import numpy as np
+
+from .costing_core import compute_totals, current_scenario, section_items, fnum, ACCURACY_BANDS
+from .escalation import ROW_SECTIONS
+from .financials import financial_inputs, evaluate_financials, own_column
+
+# Share of the stage accuracy band a row's price can move, by how firm the price is.
+PRICE_SOURCE_SPREAD: Dict[str, float] = {"Contract": 0.1, "Firm": 0.25, "Budgetary": 0.6, "Estimate": 0.8, "Benchmark": 1.0}
+PERCENTILES = (10, 50, 90)
+_CELLS_PER_CHUNK = 4_000_000  # iterations x rows drawn at once (~32 MB per float array)
+
+def build_model(data: Dict[str, Any], quantity_spread: float = 0.5) -> Dict[str, Any]:
+    """Flatten the active-scenario totals into per-row arrays the sampler works on."""
+    totals = compute_totals(data)
+    rows = totals["process"]["rows"] + totals["extra"]["rows"] + totals["rubrics"]["rows"]
+    scen = current_scenario(data)
+    qm = fnum(scen.get("quantityMultiplier", 1.0))
+    cm = fnum(scen.get("costMultiplier", 1.0))
+    rows = rows + [{"annual_cost": fnum(li.get("quantity", 0.0)) * qm * fnum(li.get("unitCost", 0.0)) * cm, "category": li.get("category", "Other"), "taxable": bool(li.get("taxable", False)), "price_source": "Estimate"}
+                   for li in section_items(data, "lineItems")]
+    settings = data.get("settings", {})
+    overhead_base = set(settings.get("overheadBase", ["Labor", "Logistics"]))
+    low, high = ACCURACY_BANDS.get(data.get("project", {}).get("stage"), (0, 0))
+    spread = np.array([PRICE_SOURCE_SPREAD.get(r.get("price_source"), 1.0) for r in rows])
+    risks = section_items(data, "risks")
+    cost = np.array([r["annual_cost"] for r in rows], dtype=float)
+    taxable = np.array([bool(r.get("taxable")) for r in rows], dtype=bool)
+    in_overhead = np.array([r.get("category") in overhead_base for r in rows], dtype=bool)
+    finance = financial_inputs(data)
+    # loaded cost (with its overhead and tax) of the rows in each escalation series with its own rate, one column each
+    own = finance["own"]
+    own_weights = np.zeros((len(rows), own["rate"].size))
+    if own["rate"].size:
+        where = [(name, i) for _, names in ROW_SECTIONS for name in names for i in range(len(section_items(data, name)))]
+        where += [("lineItems", i) for i in range(len(rows) - len(where))]
+        col = np.array([-1 if k is None else k for k in (own_column(own, s, i, r.get("category")) for (s, i), r in zip(where, rows))], dtype=int)
+        hit = np.flatnonzero(col >= 0)
+        loaded = cost * (1.0 + fnum(settings.get("overheadPct", 0.0)) / 100.0 * in_overhead) + cost * fnum(settings.get("taxPct", 0.0)) / 100.0 * taxable
+        own_weights[hit, col[hit]] = loaded[hit]
+    return {
+        "cost": cost,
+        "weights": np.hstack([np.stack([cost, cost * in_overhead, cost * taxable], axis=1).reshape(len(rows), 3), own_weights]),
+        "cost_low": 1.0 + low / 100.0 * spread,
+        "cost_high": 1.0 + high / 100.0 * spread,
+        "qty_low": np.full(len(rows), 1.0 + low / 100.0 * quantity_spread),
+        "qty_high": np.full(len(rows), 1.0 + high / 100.0 * quantity_spread),
+        "risk_p": np.clip(np.array([fnum(r.get("probability", 0.0)) for r in risks], dtype=float), 0.0, 1.0),
+        "risk_impact": np.array([fnum(r.get("impactCost", 0.0)) for r in risks], dtype=float),
+        "overheadPct": fnum(settings.get("overheadPct", 0.0)),
+        "contingencyPct": totals["contingencyPct"],
+        "taxPct": fnum(settings.get("taxPct", 0.0)),
+        "tpy": totals["tpy"],
+        "finance": finance,
+    }
+
+def _triangular(rng: np.random.Generator, low: np.ndarray, high: np.ndarray, n: int) -> np.ndarray:
+    # Triangular(low, 1, high) as low + w*((1-c)*min(U,V) + c*max(U,V)), with c the relative mode. Cheaper than
+    # the inverse CDF (no sqrt/where), accepts zero-width ranges, and runs in float32 to halve the memory traffic.
+    width = (high - low).astype(np.float32)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        c = np.where(width > 0, (1.0 - low) / width, 0.0).astype(np.float32)
+    u = rng.random((n, low.shape[0]), dtype=np.float32)
+    v = rng.random((n, low.shape[0]), dtype=np.float32)
+    lo = np.minimum(u, v)
+    np.maximum(u, v, out=u)
+    u -= lo
+    u *= width * c
+    lo *= width
+    u += lo
+    u += low.astype(np.float32)
+    return u
+
+def _run_chunk(model: Dict[str, Any], n: int, seed: np.random.SeedSequence) -> Dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    mult = _triangular(rng, model["cost_low"], model["cost_high"], n)
+    mult *= _triangular(rng, model["qty_low"], model["qty_high"], n)
+    # One matmul gives subtotal, overhead base, taxable base and the own-rate OPEX series for every iteration.
+    sums = mult @ model["weights"]
+    subtotal = sums[:, 0]
+    overhead = sums[:, 1] * model["overheadPct"] / 100.0
+    tax = sums[:, 2] * model["taxPct"] / 100.0
+    pre_tax = subtotal + overhead
+    risk = (rng.random((n, model["risk_p"].shape[0])) < model["risk_p"]) @ model["risk_impact"]
+    total = pre_tax * (1.0 + model["contingencyPct"] / 100.0) + tax + risk
+    tpy = model["tpy"]
+    unit = total / tpy if tpy else np.zeros(n)
+    npv = evaluate_financials(model["finance"], subtotal + overhead + tax, tpy, opex_own=sums[:, 3:])["npv"]
+    return {"total": total, "unit": unit, "npv": npv}
+
+def simulate(data: Dict[str, Any], iterations: int = 10_000, seed: Optional[int] = None, n_jobs: int = 1, quantity_spread: float = 0.5, keep_samples: bool = False) -> Dict[str, Any]:
+    """P10/P50/P90 (and mean) of total cost, unit cost and NPV.
+
+    Results depend only on seed and iterations, not on n_jobs: the chunking is fixed and each chunk
+    draws from its own child of SeedSequence(seed). Risk events add to the cost total but, like the
+    deterministic EMV, stay out of the OPEX that feeds NPV.
+    """
+    model = build_model(data, quantity_spread)
+    chunk = max(1, _CELLS_PER_CHUNK // max(1, model["cost"].shape[0]))
+    sizes = [min(chunk, iterations - i) for i in range(0, iterations, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if n_jobs > 1 and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            parts: List[Dict[str, np.ndarray]] = list(pool.map(_run_chunk, [model] * len(sizes), sizes, seeds))
+    else:
+        parts = [_run_chunk(model, n, s) for n, s in zip(sizes, seeds)]
+    out: Dict[str, Any] = {"iterations": iterations, "seed": seed}
+    for metric in ("total", "unit", "npv"):
+        samples = np.concatenate([p[metric] for p in parts]) if parts else np.zeros(0)
+        stats = {f"p{q}": float(v) for q, v in zip(PERCENTILES, np.percentile(samples, PERCENTILES))} if samples.size else {}
+        stats["mean"] = float(samples.mean()) if samples.size else 0.0
+        out[metric] = stats
+        if keep_samples:
+            out[metric + "_samples"] = samples
+    return out
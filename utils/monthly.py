@@ -0,0 +1,159 @@
+# utils/monthly.py
+# Month-granular cash-flow engine: construction phasing (project.durationMonths), 12-month ramp-up profiles,
+# monthly escalation, working capital build-up/recovery and monthly discounting, as NumPy arrays over
+# all periods and broadcast over many (opex, throughput, price, ...) points. Rolls up to project_financials' years_df.
+from typing import Dict, Any, List, Optional, TYPE_CHECKING
+import numpy as np
+
+from .cache import cached
+from .frames import frame
+from .costing_core import compute_totals, current_scenario, fnum, finance_schedules
+from .irr import irr_batch
+from .financials import own_escalation, own_opex, own_rate_series
+from .scenarios import linear_components, evaluate_components, scenario_multipliers
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+RAMP_KEYS = ["utilities_pct", "logistics_packaging_pct", "logistics_transport_pct", "other_pct"]
+
+def _pct12(arr: Any) -> np.ndarray:
+    arr = [fnum(x) for x in (arr or [100] * 12)]
+    if len(arr) < 12: arr = arr + [arr[-1]] * (12 - len(arr))
+    return np.array(arr[:12], dtype=float) / 100.0
+
+def monthly_inputs(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Timeline and schedules shared by every point: D construction months (< 0), then 12 × (horizon + 1) operating months."""
+    fin = data.get("finance", {})
+    ru = data.get("rampup", {}) or {}
+    horizon = int(fnum(fin.get("horizon_years", 10)))
+    build = max(0, int(fnum(data.get("project", {}).get("durationMonths", 12))))
+    months = np.arange(-build, 12 * (horizon + 1))
+    year = np.maximum(months, 0) // 12
+    capex_curve, depreciation = finance_schedules(fin, horizon)
+    # Pre-operation offsets are spread over the construction months (month 0 if there are none); offset y >= 0 over year y.
+    capex = np.zeros(months.shape[0])
+    pre = sum(v for off, v in capex_curve.items() if off < 0)
+    if build: capex[:build] += pre / build
+    else: capex[0] += pre
+    for off, val in capex_curve.items():
+        if 0 <= off <= horizon:
+            capex[build + 12 * off: build + 12 * off + 12] += val / 12.0
+    dep = np.array([depreciation.get(y, 0.0) for y in range(horizon + 1)]) if fin.get("include_depreciation", True) else np.zeros(horizon + 1)
+    return {
+        "months": months,
+        "year": year,
+        "to_year": (year[:, None] == np.arange(horizon + 1)[None, :]).astype(float),  # (months, years) roll-up matrix
+        "build": build,
+        "operating": months >= 0,
+        "capex": capex,
+        "dep": dep,
+        "ramp": np.stack([_pct12(ru.get(k)) for k in RAMP_KEYS]),
+        "price_ramp": _pct12(ru.get("price_pct")),
+        "startup_extra_per_t": fnum(ru.get("startup_extra_cost_per_t", 0.0)),
+        "price": fnum(fin.get("selling_price_per_t", 0.0)),
+        "esc": fnum(data.get("settings", {}).get("escalationPctPerYear", 0.0)) / 100.0,
+        "own": own_rate_series(data),
+        "tax_rate": fnum(data.get("settings", {}).get("taxPct", 0.0)) / 100.0,
+        "disc": fnum(data.get("project", {}).get("discountRatePct", 10.0)) / 100.0,
+        "wc_pct": fnum(fin.get("working_capital_pct_of_opex", 0.0)) / 100.0,
+        "wc_recovery_end": bool(fin.get("wc_recovery_end", True)),
+    }
+
+def ramp_weights(by_category: Any, categories: List[str], packaging_share: float) -> np.ndarray:
+    """(P, 4) cost in each ramp group (utilities, logistics-packaging, logistics-transport, other) from category totals."""
+    bc = np.atleast_2d(np.asarray(by_category, dtype=float))
+    util = bc[:, [i for i, c in enumerate(categories) if c == "Utilities"]].sum(axis=1)
+    logi = bc[:, [i for i, c in enumerate(categories) if c == "Logistics"]].sum(axis=1)
+    other = bc.sum(axis=1) - util - logi
+    return np.stack([util, logi * packaging_share, logi * (1.0 - packaging_share), other], axis=1)
+
+def evaluate_monthly(mi: Dict[str, Any], base_opex: Any, tpy: Any, weights: Optional[Any] = None, price: Optional[Any] = None, esc: Optional[Any] = None, disc: Optional[Any] = None,
+                     opex_own: Optional[Any] = None) -> Dict[str, np.ndarray]:
+    """Monthly cash flows for P points, shape (P, months); `weights` (P, 4) sets how the OPEX ramp-up is mixed and
+    `opex_own` is the OPEX in series with their own escalation rate (as in financials.evaluate_financials)."""
+    args = [base_opex, tpy, mi["price"] if price is None else price, mi["esc"] if esc is None else esc, mi["disc"] if disc is None else disc]
+    bo, tpy, price, esc, disc = (a[:, None] for a in np.broadcast_arrays(*(np.atleast_1d(np.asarray(a, dtype=float)) for a in args)))
+    P, M, b = bo.shape[0], mi["months"].shape[0], mi["build"]
+    t = mi["months"][None, :] / 12.0
+    op = mi["operating"][None, :]
+    # OPEX ramp factor per month: ramp curves mixed by each point's cost weights, 1.0 after month 12.
+    w = np.ones((P, 4)) if weights is None else np.broadcast_to(np.asarray(weights, dtype=float), (P, 4))
+    wsum = w.sum(axis=1, keepdims=True)
+    ramp12 = np.where(wsum > 0, (w @ mi["ramp"]) / np.where(wsum > 0, wsum, 1.0), 1.0)
+    opex_ramp = np.ones((P, M))
+    opex_ramp[:, b:b + 12] = ramp12[:, :min(12, M - b)]
+    price_ramp = np.ones(M)
+    price_ramp[b:b + 12] = mi["price_ramp"][:min(12, M - b)]
+    growth = (1.0 + esc) ** np.maximum(t, 0.0)
+    own = own_escalation(mi["own"], opex_own, np.maximum(mi["months"], 0) / 12.0, growth)
+    opex = np.where(op, bo / 12.0 * opex_ramp * growth if own is None else (bo * growth + own) / 12.0 * opex_ramp, 0.0)
+    opex[:, b:b + 12] += mi["startup_extra_per_t"] * tpy / 12.0
+    revenue = np.where(op & (price > 0) & (tpy > 0), price * tpy / 12.0 * price_ramp[None, :] * growth, 0.0)
+    dep = np.where(op, mi["dep"][mi["year"]][None, :] / 12.0, 0.0)
+    # Tax is assessed on each year's EBIT (loss years pay nothing) and paid in equal monthly instalments.
+    ebit_y = (revenue - opex - dep) @ mi["to_year"]
+    tax = np.where(op, np.maximum(0.0, ebit_y * mi["tax_rate"])[:, mi["year"]] / 12.0, 0.0)
+    # Working capital tracks annualised OPEX; its build-up is a cash outflow, optionally released in the last month.
+    wc = mi["wc_pct"] * opex * 12.0
+    if mi["wc_recovery_end"]:
+        wc[:, -1] = 0.0
+    wc_change = np.diff(wc, axis=1, prepend=0.0)
+    ocf = (revenue - opex) - tax - wc_change
+    fcf = ocf - mi["capex"][None, :]
+    pv = fcf / (1.0 + disc) ** t
+    return {"revenue": revenue, "opex": opex, "dep": dep, "tax": tax, "wc": wc, "wc_change": wc_change, "ocf": ocf, "fcf": fcf, "pv": pv, "npv": pv.sum(axis=1)}
+
+def roll_up(mi: Dict[str, Any], res: Dict[str, np.ndarray], point: int = 0) -> "pd.DataFrame":
+    """Annual years_df (same columns as project_financials) for one point; construction months fold into Year 0."""
+    def annual(x):
+        return x[point] @ mi["to_year"]
+    df = frame({"Year": np.arange(mi["dep"].shape[0]), "CAPEX": -(mi["capex"] @ mi["to_year"]), "Revenue": annual(res["revenue"]), "OPEX": -annual(res["opex"]), "Depreciation": -annual(res["dep"]),
+                       "Tax": -annual(res["tax"]), "OCF": annual(res["ocf"]), "FCF": annual(res["fcf"]), "PV_FCF": annual(res["pv"])})
+    return df
+
+def _irr_payback(mi: Dict[str, Any], fcf: np.ndarray):
+    rates, roots = irr_batch(fcf)
+    irr = np.where(np.isfinite(rates), (1.0 + rates) ** 12 - 1.0, np.nan)
+    cum = np.cumsum(fcf, axis=1) >= 0
+    payback = np.where(cum.any(axis=1), mi["months"][cum.argmax(axis=1)], -1)
+    return irr, roots, payback
+
+def monthly_projection(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Monthly counterpart of project_financials for the active scenario (depreciation is non-cash: tax effect only)."""
+    return cached("monthly", data, lambda: _monthly_projection(data))
+
+def _monthly_projection(data: Dict[str, Any]) -> Dict[str, Any]:
+    mi = monthly_inputs(data)
+    totals = compute_totals(data)
+    b = totals["breakdown"]
+    logi = b.get("log_packaging_total", 0.0) + b.get("log_transport_total", 0.0)
+    cats = list(totals["byCategory"])
+    w = ramp_weights([totals["byCategory"][c] for c in cats], cats, b.get("log_packaging_total", 0.0) / logi if logi else 0.5)
+    scen = current_scenario(data)
+    own = own_opex(mi["own"], fnum(scen.get("quantityMultiplier", 1.0)), fnum(scen.get("costMultiplier", 1.0)))
+    res = evaluate_monthly(mi, totals["subtotal"] + totals["overhead"] + totals["tax"], totals["tpy"], weights=w, opex_own=own)
+    irr, roots, payback = _irr_payback(mi, res["fcf"])
+    months_df = frame({"Month": mi["months"], "Year": mi["year"], "CAPEX": -mi["capex"], "Revenue": res["revenue"][0], "OPEX": -res["opex"][0],
+                              "Tax": -res["tax"][0], "WC_change": -res["wc_change"][0], "FCF": res["fcf"][0], "PV_FCF": res["pv"][0]})
+    return {"months_df": months_df, "years_df": roll_up(mi, res), "npv": float(res["npv"][0]),
+            "irr": None if np.isnan(irr[0]) or not (mi["price"] > 0) else float(irr[0]),
+            "irr_status": "none" if np.isnan(irr[0]) else ("ok" if roots[0] == 1 else "multiple"),
+            "payback_month": None if payback[0] < 0 else int(payback[0])}
+
+def monthly_scenarios(data: Dict[str, Any], scenario_ids: Optional[List[Any]] = None) -> Dict[str, List[Any]]:
+    """NPV / IRR / payback month of every scenario in one broadcasted monthly pass."""
+    if scenario_ids is None:
+        scenario_ids = [s.get("id") for s in data.get("scenarios", []) or []]
+    mi = monthly_inputs(data)
+    comp = linear_components(data)
+    mult = scenario_multipliers(data, scenario_ids)
+    res = evaluate_components(comp, mult["qm"], mult["cm"], mult["dc"])
+    b = compute_totals(dict(data, scenarios=[]))["breakdown"]
+    logi = b.get("log_packaging_total", 0.0) + b.get("log_transport_total", 0.0)
+    w = ramp_weights(res["byCategory"], comp["categories"], b.get("log_packaging_total", 0.0) / logi if logi else 0.5)
+    out = evaluate_monthly(mi, res["subtotal"] + res["overhead"] + res["tax"], res["tpy"], weights=w, opex_own=own_opex(mi["own"], mult["qm"], mult["cm"]))
+    irr, roots, payback = _irr_payback(mi, out["fcf"])
+    return {"id": list(scenario_ids), "name": mult["name"], "npv": out["npv"].tolist(),
+            "irr": [None if np.isnan(r) or not (mi["price"] > 0) else float(r) for r in irr],
+            "payback_month": [None if p < 0 else int(p) for p in payback]}
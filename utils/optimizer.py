@@ -0,0 +1,154 @@
+# utils/optimizer.py
+# Least-cost formulation: pick quantities of candidate raw materials / supplier offers (data["formulation"]) that
+# meet composition and mass-balance constraints at minimum cost per t of product, solved as one LP (utils/lp.py),
+# then write the chosen rows into the recipe and process.materials tables.
+from typing import Dict, Any, List, Tuple
+import re
+import time
+import numpy as np
+
+from .costing_core import fnum
+from .lp import linprog
+from .units import INCOMPATIBLE, mismatch, unit_factor, tonnes_per_unit
+
+SENSES = [">=", "<=", "="]
+CONSTRAINT_BASES = ["per_t", "pct_of_blend"]  # t of component per t of product / % of the blend's mass
+TARGET_SECTIONS = ["recipe", "materials"]
+_QTY_FIELD = {"recipe": ("t_per_t", "unit", "t/t"), "materials": ("spec_per_t", "unit_spec", "kg/t")}
+_ITEM = re.compile(r"^\s*([^:=]+?)\s*[:=]\s*([-+0-9.eE]+)\s*(%?)\s*$")
+
+def parse_composition(text: Any) -> Tuple[Dict[str, float], List[str]]:
+    """"CaO: 52%; SiO2: 0.03" -> ({"CaO": 0.52, "SiO2": 0.03}, unreadable parts). Values are mass fractions
+    (a "%" suffix divides by 100); items are separated by ";" or ",". """
+    out: Dict[str, float] = {}
+    bad: List[str] = []
+    for part in re.split(r"[;,]", text if isinstance(text, str) else ""):
+        if not part.strip():
+            continue
+        m = _ITEM.match(part)
+        if m is None:
+            bad.append(part.strip())
+            continue
+        try:
+            v = float(m.group(2))
+        except ValueError:
+            bad.append(part.strip())
+            continue
+        out[m.group(1)] = out.get(m.group(1), 0.0) + (v / 100.0 if m.group(3) else v)
+    return out, bad
+
+def _bound(v: Any, default: float) -> float:
+    if v is None or (isinstance(v, str) and not v.strip()):
+        return default
+    x = fnum(v)
+    return default if x != x else x  # NaN (empty cell from the editor) -> default
+
+# ---------- LP ----------
+def build_problem(data: Dict[str, Any]) -> Dict[str, Any]:
+    """LP arrays for data["formulation"]: variables are candidate quantities in their own unit per t of product."""
+    form = data.get("formulation", {}) or {}
+    cands = [c for c in form.get("candidates", []) or [] if (c.get("name") or "").strip()]
+    cons = form.get("constraints", []) or []
+    cur = data.get("project", {}).get("currency", "MAD")
+    issues: List[str] = []
+    n = len(cands)
+    section = [c.get("section") if c.get("section") in TARGET_SECTIONS else "recipe" for c in cands]
+    unit = [c.get("unit") or _QTY_FIELD[s][2] for c, s in zip(cands, section)]
+    cost_unit = [c.get("cost_unit", f"{cur}/t") for c in cands]
+    factor = [unit_factor(u, cu) for u, cu in zip(unit, cost_unit)]
+    # a candidate whose cost unit does not match its quantity unit has no price per t of product: left out (ub = 0)
+    price = np.array([fnum(c.get("unit_cost", 0.0)) * (0.0 if f is INCOMPATIBLE else f) for c, f in zip(cands, factor)])
+    mass = np.array([tonnes_per_unit(u) or 0.0 for u in unit])
+    comps: List[Dict[str, float]] = []
+    for c, u in zip(cands, unit):
+        comp, bad = parse_composition(c.get("composition", ""))
+        if bad:
+            issues.append(f"{c['name']}: unreadable composition {', '.join(bad)}")
+        if comp and tonnes_per_unit(u) is None:
+            issues.append(f"{c['name']}: quantity unit {u!r} is not a mass, so it adds nothing to composition constraints")
+        comps.append(comp)
+    for c, u, cu, f in zip(cands, unit, cost_unit, factor):
+        if f is INCOMPATIBLE:
+            issues.append(f"{c['name']}: cost unit {cu!r} does not match quantity unit {u!r} ({mismatch(u, cu)}), so it is left out")
+    lb = np.array([0.0 if f is INCOMPATIBLE else max(0.0, _bound(c.get("min_qty"), 0.0)) for c, f in zip(cands, factor)])
+    ub = np.array([0.0 if f is INCOMPATIBLE else _bound(c.get("max_qty"), np.inf) for c, f in zip(cands, factor)])
+
+    A_ub: List[np.ndarray] = []
+    b_ub: List[float] = []
+    A_eq: List[np.ndarray] = []
+    b_eq: List[float] = []
+    rows: List[Dict[str, Any]] = []
+    for k in cons:
+        comp = (k.get("component") or "total").strip()
+        scope = k.get("section") or "all"
+        in_scope = np.array([scope == "all" or s == scope for s in section], dtype=bool)
+        share = np.ones(n) if comp.lower() == "total" else np.array([cm.get(comp, 0.0) for cm in comps])
+        if comp.lower() != "total" and not share.any():
+            issues.append(f"Constraint {k.get('name') or comp}: no candidate contains {comp!r}")
+        value = fnum(k.get("value", 0.0))
+        if k.get("basis") == "pct_of_blend":
+            a, rhs = mass * (share - value / 100.0) * in_scope, 0.0
+        else:
+            a, rhs = mass * share * in_scope, value
+        sense = k.get("sense") if k.get("sense") in SENSES else ">="
+        if sense == "=":
+            A_eq.append(a); b_eq.append(rhs)
+        elif sense == "<=":
+            A_ub.append(a); b_ub.append(rhs)
+        else:
+            A_ub.append(-a); b_ub.append(-rhs)
+        rows.append({"name": k.get("name") or comp, "a": a, "rhs": rhs, "sense": sense, "value": value, "basis": k.get("basis") or "per_t",
+                     "part": mass * share * in_scope, "whole": mass * in_scope})
+    return {
+        "candidates": cands, "section": section, "unit": unit, "c": price, "lb": lb, "ub": ub,
+        "A_ub": np.array(A_ub, dtype=float).reshape(len(A_ub), n), "b_ub": np.array(b_ub), "A_eq": np.array(A_eq, dtype=float).reshape(len(A_eq), n), "b_eq": np.array(b_eq),
+        "constraints": rows, "issues": issues,
+    }
+
+def optimize(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Least-cost quantities for the candidates.
+
+    Returns {"status", "cost_per_t", "annual_cost", "rows" (chosen candidates with qty and cost per t),
+    "constraints" (achieved value vs. limit, binding flag), "issues", "iterations", "seconds"}.
+    """
+    t0 = time.perf_counter()
+    p = build_problem(data)
+    out: Dict[str, Any] = {"status": "empty", "cost_per_t": None, "annual_cost": None, "rows": [], "constraints": [], "issues": p["issues"], "iterations": 0}
+    if p["candidates"]:
+        res = linprog(p["c"], p["A_ub"], p["b_ub"], p["A_eq"], p["b_eq"], p["lb"], p["ub"])
+        out["status"], out["iterations"] = res["status"], res["iterations"]
+        if res["status"] == "optimal":
+            x = res["x"]
+            tpy = fnum((data.get("process", {}) or {}).get("throughput_tpy", 0.0))
+            out["cost_per_t"] = res["fun"]
+            out["annual_cost"] = res["fun"] * tpy
+            for i in np.flatnonzero(x > 1e-9).tolist():
+                c = p["candidates"][i]
+                out["rows"].append({"name": c["name"], "section": p["section"][i], "qty": float(x[i]), "unit": p["unit"][i], "unit_cost": fnum(c.get("unit_cost", 0.0)),
+                                    "cost_unit": c.get("cost_unit"), "price_source": c.get("price_source", "Benchmark"), "cost_per_t": float(p["c"][i] * x[i]),
+                                    "taxable": bool(c.get("taxable", p["section"][i] == "recipe"))})
+            for k in p["constraints"]:
+                slack = float(k["a"] @ x) - k["rhs"]
+                part, whole = float(k["part"] @ x), float(k["whole"] @ x)
+                achieved = (part / whole * 100.0 if whole else 0.0) if k["basis"] == "pct_of_blend" else part
+                out["constraints"].append({"name": k["name"], "sense": k["sense"], "value": k["value"], "basis": k["basis"], "achieved": achieved,
+                                           "binding": abs(slack) <= 1e-7 * (1.0 + abs(k["rhs"]) + float(np.abs(k["a"]).max(initial=0.0)))})
+    out["seconds"] = time.perf_counter() - t0
+    return out
+
+# ---------- Write-back ----------
+def write_back(data: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, int]:
+    """Replace the recipe / process.materials rows named like a candidate with the chosen quantities (other named rows
+    are kept). Sections are reassigned, never edited in place (copy-on-write state). Returns rows written per section."""
+    names = {(c.get("name") or "").strip() for c in (data.get("formulation", {}) or {}).get("candidates", []) or []} | {""}  # "" drops blank placeholder rows
+    chosen = {s: [r for r in result["rows"] if r["section"] == s] for s in TARGET_SECTIONS}
+    cur = data.get("project", {}).get("currency", "MAD")
+    recipe = [r for r in data.get("recipe", []) or [] if (r.get("name") or "").strip() not in names]
+    recipe += [{"name": r["name"], "t_per_t": r["qty"], "unit": r["unit"], "unit_cost": r["unit_cost"], "cost_unit": r["cost_unit"] or f"{cur}/t",
+                "price_source": r["price_source"], "taxable": r["taxable"], "note": "least-cost formulation"} for r in chosen["recipe"]]
+    materials = [r for r in (data.get("process", {}) or {}).get("materials", []) or [] if (r.get("name") or "").strip() not in names]
+    materials += [{"name": r["name"], "spec_per_t": r["qty"], "unit_spec": r["unit"], "unit_cost": r["unit_cost"], "cost_unit": r["cost_unit"] or f"{cur}/unit",
+                   "price_source": r["price_source"], "category": "Materials", "taxable": r["taxable"], "note": "least-cost formulation"} for r in chosen["materials"]]
+    data["recipe"] = recipe
+    data["process"] = dict(data.get("process", {}) or {}, materials=materials)
+    return {s: len(v) for s, v in chosen.items()}
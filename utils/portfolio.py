@@ -0,0 +1,104 @@
+# utils/portfolio.py
+# Portfolio runner: load a directory of project files (.csnap) / xlsx snapshots from Details, cost every project × scenario
+# in a process pool and return one ranked table (NPV, IRR, unit cost) plus throughput in projects/second.
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Union
+import os
+import time
+import pandas as pd
+
+from .costing_core import DEFAULT_STATE, compute_totals, project_financials
+from .workbook import read_workbook, apply_import
+from .frozen import snapshot
+from .snapshot import SNAPSHOT_EXT, is_snapshot, read_snapshot
+
+RESULT_COLUMNS = ["project", "scenario_id", "scenario", "total", "unit_cost", "npv", "irr", "payback_year", "status"]
+
+def load_snapshot(src: Union[str, Path, bytes]) -> Dict[str, Any]:
+    """Project file (.csnap, missing top-level keys from DEFAULT_STATE), or default state overlaid with every known sheet of an xlsx."""
+    data = snapshot(DEFAULT_STATE)
+    src = src if isinstance(src, bytes) else str(src)
+    if is_snapshot(src):
+        return dict(data, **read_snapshot(src))
+    return apply_import(data, read_workbook(src, data["project"]["currency"])["sections"])
+
+def evaluate_project(name: str, src: Union[str, Path, bytes]) -> List[Dict[str, Any]]:
+    """One result row per scenario; a snapshot that fails to load or cost yields a single row with the error."""
+    try:
+        data = load_snapshot(src)
+        rows = []
+        for s in data.get("scenarios", []) or [{"id": data.get("activeScenarioId"), "name": "Base"}]:
+            scen = dict(data, activeScenarioId=s.get("id"))
+            totals = compute_totals(scen)
+            fin = project_financials(scen)
+            rows.append({"project": name, "scenario_id": s.get("id"), "scenario": s.get("name", s.get("id")), "total": totals["total"],
+                         "unit_cost": totals["total"] / totals["tpy"] if totals["tpy"] else 0.0, "npv": float(fin["npv"]), "irr": fin["irr"],
+                         "payback_year": fin["payback_year"], "status": "ok"})
+        return rows
+    except Exception as e:
+        return [{"project": name, "scenario_id": None, "scenario": None, "total": None, "unit_cost": None, "npv": None, "irr": None, "payback_year": None, "status": f"error: {e}"}]
+
+def project_files(directory: Union[str, Path], root: Optional[Union[str, Path]] = None) -> List[Tuple[str, str]]:
+    """(file name, path) of the *.csnap / *.xlsx files of a directory; with `root`, files resolving outside it (symlinks) are skipped."""
+    root = Path(root).resolve() if root is not None else None
+    return [(p.name, str(p)) for p in sorted(Path(directory).iterdir())
+            if p.suffix.lower() in (".xlsx", SNAPSHOT_EXT) and not p.name.startswith("~$") and p.is_file() and (root is None or p.resolve().is_relative_to(root))]
+
+def within_root(root: Union[str, Path], path: str) -> Optional[Path]:
+    """`path` (relative to `root`, or absolute) resolved, or None when it points outside `root` ("..", symlinks)."""
+    base = Path(root).resolve()
+    target = (base / path).resolve()
+    return target if target.is_relative_to(base) else None
+
+def unique_names(names: List[str]) -> List[str]:
+    """Project names for the ranking: repeated names get " (2)", " (3)", ... so every row stays attributable."""
+    seen: Dict[str, int] = {}
+    out = []
+    for n in names:
+        seen[n] = seen.get(n, 0) + 1
+        out.append(n if seen[n] == 1 else f"{n} ({seen[n]})")
+    return out
+
+def _evaluate_many(items: List[Tuple[str, Union[str, bytes]]]) -> List[Dict[str, Any]]:
+    return [row for name, src in items for row in evaluate_project(name, src)]
+
+def run_portfolio(sources: Union[str, Path, List[Tuple[str, Union[str, bytes]]]], n_jobs: Optional[int] = None, out: Optional[Union[str, Path]] = None) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """Evaluate a directory of *.csnap / *.xlsx snapshots (or (name, path|bytes) pairs), ranked by NPV.
+
+    Projects are named by file name, extension included (p.csnap and p.xlsx are two projects); repeated names are
+    numbered. Projects are sent to the pool in batches so each worker pays the process/IPC overhead once per batch,
+    not once per file. Writes the table to `out` (.csv, or .json) when given.
+    """
+    if isinstance(sources, (str, Path)):
+        sources = project_files(sources)
+    sources = list(zip(unique_names([name for name, _ in sources]), [src for _, src in sources]))
+    n_jobs = n_jobs or os.cpu_count() or 1
+    t0 = time.perf_counter()
+    if n_jobs > 1 and len(sources) > 1:
+        size = max(1, -(-len(sources) // (n_jobs * 4)))
+        batches = [sources[i:i + size] for i in range(0, len(sources), size)]
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            rows = [row for part in pool.map(_evaluate_many, batches) for row in part]
+    else:
+        rows = _evaluate_many(sources)
+    elapsed = time.perf_counter() - t0
+    df = pd.DataFrame(rows, columns=RESULT_COLUMNS).sort_values("npv", ascending=False, na_position="last", kind="stable").reset_index(drop=True)
+    if out is not None:
+        if str(out).endswith(".json"):
+            df.to_json(out, orient="records", indent=2)
+        else:
+            df.to_csv(out, index=False)
+    stats = {"projects": len(sources), "rows": len(df), "errors": int((df["status"] != "ok").sum()), "n_jobs": n_jobs,
+             "seconds": elapsed, "projects_per_sec": len(sources) / elapsed if elapsed > 0 else 0.0}
+    return df, stats
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Rank a directory of costing snapshots by NPV, IRR and unit cost.")
+    ap.add_argument("directory")
+    ap.add_argument("--out", default="portfolio_results.csv")
+    ap.add_argument("--jobs", type=int, default=None)
+    args = ap.parse_args()
+    _, st = run_portfolio(args.directory, n_jobs=args.jobs, out=args.out)
+    print(f"{st['projects']} projects ({st['errors']} errors) in {st['seconds']:.2f}s — {st['projects_per_sec']:.1f} projects/s — written to {args.out}")
@@ -0,0 +1,110 @@
+# utils/profiling.py
+# Timing spans for the hot paths (costing sections, compute functions, imports/exports, chart building), recorded per
+# Streamlit session into a ring buffer of reruns and shown on pages/5_Performance.py.
+# Recording is off unless the session turns it on: a span is then one ContextVar lookup returning a shared no-op.
+from collections import deque
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional
+import time
+
+MAX_RUNS = 50
+ENABLED_KEY = "perf_enabled"
+RUNS_KEY = "perf_runs"
+
+# the rerun being recorded in this thread (Streamlit runs each session's script in its own thread); None = off
+_RUN: ContextVar[Optional[Dict[str, Any]]] = ContextVar("perf_run", default=None)
+
+class _Off:
+    __slots__ = ()
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+    def rows(self, n: int) -> None: pass
+
+_OFF = _Off()
+
+class _Span:
+    __slots__ = ("run", "stage", "detail", "n", "depth", "t0")
+
+    def __init__(self, run: Dict[str, Any], stage: str, rows: Optional[int], detail: Optional[str]):
+        self.run, self.stage, self.n, self.detail = run, stage, rows, detail
+
+    def __enter__(self):
+        self.depth = self.run["depth"]
+        self.run["depth"] += 1
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        t = time.perf_counter()
+        run = self.run
+        run["depth"] -= 1
+        run["spans"].append({"stage": f"{self.stage}:{self.detail}" if self.detail else self.stage, "start_ms": (self.t0 - run["t0"]) * 1000.0,
+                             "ms": (t - self.t0) * 1000.0, "rows": self.n, "depth": self.depth, "error": exc[0].__name__ if exc[0] else None})
+        run["ms"] = max(run["ms"], (t - run["t0"]) * 1000.0)
+        return False
+
+    def rows(self, n: int) -> None:
+        """Row count known only inside the span (e.g. after parsing an upload)."""
+        self.n = n
+
+def span(stage: str, rows: Optional[int] = None, detail: Optional[str] = None):
+    """with span("compute_totals"): ... — times the block into the session's current rerun, if recording."""
+    run = _RUN.get()
+    if run is None:
+        return _OFF
+    return _Span(run, stage, rows, detail)
+
+# ---------- Session ----------
+def begin_run(st, page: str, record: bool = True) -> Optional[Dict[str, Any]]:
+    """Start a rerun record for this page. Call it at the top of every page: a rerun requested mid-script reuses the
+    script thread, which must not keep recording into the interrupted page's record. Returns the record, or None
+    when the session is not recording."""
+    if not (record and st.session_state.get(ENABLED_KEY)):
+        _RUN.set(None)
+        return None
+    runs = st.session_state.get(RUNS_KEY)
+    if runs is None:
+        runs = st.session_state[RUNS_KEY] = deque(maxlen=MAX_RUNS)
+    run = {"page": page, "started": time.time(), "t0": time.perf_counter(), "ms": 0.0, "depth": 0, "spans": []}
+    runs.append(run)
+    _RUN.set(run)
+    return run
+
+def end_run() -> None:
+    """Close the current rerun (its time runs to here); reruns cut short by st.stop()/st.rerun() end at their last span."""
+    run = _RUN.get()
+    if run is not None:
+        run["ms"] = (time.perf_counter() - run["t0"]) * 1000.0
+        _RUN.set(None)
+
+def recorded_runs(st) -> List[Dict[str, Any]]:
+    return list(st.session_state.get(RUNS_KEY) or [])
+
+def clear_runs(st) -> None:
+    st.session_state[RUNS_KEY] = deque(maxlen=MAX_RUNS)
+
+# ---------- Reports ----------
+def run_table(runs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """One row per rerun: page, start time, total ms, span count and its slowest top-level stage."""
+    out = []
+    for i, r in enumerate(runs):
+        top = [s for s in r["spans"] if s["depth"] == 0]
+        slow = max(top, key=lambda s: s["ms"], default=None)
+        out.append({"run": i + 1, "page": r["page"], "started": time.strftime("%H:%M:%S", time.localtime(r["started"])), "ms": r["ms"],
+                    "spans": len(r["spans"]), "slowest": slow["stage"] if slow else "", "slowest_ms": slow["ms"] if slow else 0.0})
+    return out
+
+def stage_table(runs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per stage over all reruns: calls, total / mean / max ms and the largest row count, slowest total first."""
+    agg: Dict[str, Dict[str, Any]] = {}
+    for r in runs:
+        for s in r["spans"]:
+            a = agg.setdefault(s["stage"], {"stage": s["stage"], "calls": 0, "total_ms": 0.0, "max_ms": 0.0, "max_rows": None})
+            a["calls"] += 1
+            a["total_ms"] += s["ms"]
+            a["max_ms"] = max(a["max_ms"], s["ms"])
+            if s["rows"] is not None:
+                a["max_rows"] = max(a["max_rows"] or 0, s["rows"])
+    for a in agg.values():
+        a["mean_ms"] = a["total_ms"] / a["calls"]
+    return sorted(agg.values(), key=lambda a: -a["total_ms"])
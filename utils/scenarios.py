@@ -0,0 +1,87 @@
+# utils/scenarios.py
+# Multiplier-independent cost base + broadcasted scenario evaluation (no activeScenarioId mutation).
+from typing import Dict, Any, List, Optional
+import numpy as np
+
+from .costing_core import compute_totals, section_items, section_kernels, fnum
+
+SCENARIO_METRICS = ["subtotal", "overhead", "contingency", "tax", "riskEMV", "total", "contingencyPct", "tpy", "unit"]
+
+def linear_components(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Split the neutral-scenario totals by how they scale.
+
+    per_t rows scale with throughput × quantityMultiplier × costMultiplier, manual line items with
+    quantityMultiplier × costMultiplier, and per_year / fixed_project rubrics with costMultiplier only.
+    """
+    base = compute_totals(dict(data, scenarios=[]))
+    cats = list(base["byCategory"])
+    pos = {c: i for i, c in enumerate(cats)}
+    fixed = np.zeros(len(cats))
+    fixed_taxable = 0.0
+    for r in base["rubrics"]["rows"]:
+        if r["basis"] != "per_t":
+            fixed[pos[r["category"]]] += r["annual_cost"]
+            if r["taxable"]:
+                fixed_taxable += r["annual_cost"]
+    manual_by_cat, _, manual_taxable = section_kernels()["lineItems"](section_items(data, "lineItems"), 1.0, 1.0)
+    manual = np.zeros(len(cats))
+    for c, v in manual_by_cat.items():
+        manual[pos[c]] += v
+    taxable = base["process"]["totals"]["TaxableBase"] + base["extra"]["totals"]["TaxableBase"] + base["rubrics"]["totals"]["TaxableBase"]
+    settings = data.get("settings", {})
+    overhead_base = set(settings.get("overheadBase", ["Labor", "Logistics"]))
+    return {
+        "categories": cats,
+        "per_t": np.array([base["byCategory"][c] for c in cats]) - manual - fixed,
+        "manual": manual,
+        "fixed": fixed,
+        "taxable_per_t": taxable - fixed_taxable,
+        "taxable_manual": manual_taxable,
+        "taxable_fixed": fixed_taxable,
+        "overhead_mask": np.array([c in overhead_base for c in cats], dtype=bool),
+        "overheadPct": fnum(settings.get("overheadPct", 0.0)),
+        "contingencyPct": fnum(settings.get("contingencyPct", 0.0)),
+        "taxPct": fnum(settings.get("taxPct", 0.0)),
+        "riskEMV": base["riskEMV"],
+        "tpy": base["tpy"],
+    }
+
+def evaluate_components(comp: Dict[str, Any], qm: Any = 1.0, cm: Any = 1.0, contingency_delta: Any = 0.0, tpy_scale: Any = 1.0) -> Dict[str, np.ndarray]:
+    """Broadcast compute_totals' arithmetic over arrays of multipliers; returns one array per metric."""
+    qm, cm, dc, ts = np.broadcast_arrays(*(np.atleast_1d(np.asarray(x, dtype=float)) for x in (qm, cm, contingency_delta, tpy_scale)))
+    q = qm * cm
+    by_cat = np.outer(q * ts, comp["per_t"]) + np.outer(q, comp["manual"]) + np.outer(cm, comp["fixed"])
+    subtotal = by_cat.sum(axis=1)
+    overhead = by_cat[:, comp["overhead_mask"]].sum(axis=1) * comp["overheadPct"] / 100.0
+    pre_tax = subtotal + overhead
+    contingency_pct = comp["contingencyPct"] + dc
+    contingency = pre_tax * contingency_pct / 100.0
+    tax = (q * ts * comp["taxable_per_t"] + q * comp["taxable_manual"] + cm * comp["taxable_fixed"]) * comp["taxPct"] / 100.0
+    risk = np.full(q.shape, comp["riskEMV"])
+    total = pre_tax + contingency + tax + risk
+    tpy = comp["tpy"] * qm * ts
+    with np.errstate(divide="ignore", invalid="ignore"):
+        unit = np.where(tpy != 0, total / np.where(tpy != 0, tpy, 1.0), 0.0)
+    return {"byCategory": by_cat, "subtotal": subtotal, "overhead": overhead, "contingency": contingency, "tax": tax, "riskEMV": risk, "total": total, "contingencyPct": contingency_pct, "tpy": tpy, "unit": unit}
+
+def scenario_multipliers(data: Dict[str, Any], scenario_ids: List[Any]) -> Dict[str, Any]:
+    by_id: Dict[Any, Dict[str, Any]] = {}
+    for s in data.get("scenarios", []) or []:
+        by_id.setdefault(s.get("id"), s)
+    scen = [by_id.get(sid, {}) for sid in scenario_ids]
+    return {
+        "name": [s.get("name", sid) for s, sid in zip(scen, scenario_ids)],
+        "qm": np.array([fnum(s.get("quantityMultiplier", 1.0)) for s in scen]),
+        "cm": np.array([fnum(s.get("costMultiplier", 1.0)) for s in scen]),
+        "dc": np.array([fnum(s.get("contingencyPctDelta", 0.0)) for s in scen]),
+    }
+
+def scenario_table(data: Dict[str, Any], scenario_ids: Optional[List[Any]] = None) -> Dict[str, List[Any]]:
+    if scenario_ids is None:
+        scenario_ids = [s.get("id") for s in data.get("scenarios", []) or []]
+    mult = scenario_multipliers(data, scenario_ids)
+    res = evaluate_components(linear_components(data), mult["qm"], mult["cm"], mult["dc"])
+    table: Dict[str, List[Any]] = {"id": list(scenario_ids), "name": mult["name"]}
+    for m in SCENARIO_METRICS:
+        table[m] = res[m].tolist()
+    return table
@@ -0,0 +1,112 @@
+# utils/sensitivity.py
+# One-at-a-time (tornado) sensitivity of unit cost and NPV to every numeric driver.
+# Row costs are linear in their price/quantity fields, so every ±X% case is a closed-form delta on the
+# base totals; all cases are then pushed through the financial model in one batched evaluation.
+from typing import Dict, Any, List
+import numpy as np
+
+from .costing_core import compute_totals, current_scenario, section_items, fnum
+from .financials import financial_inputs, evaluate_financials, own_column, own_opex
+from .scenarios import linear_components, evaluate_components
+
+# module label of a costed row -> (section, perturbed fields)
+ROW_DRIVERS: Dict[str, tuple] = {
+    "Formulation (t/t)": ("recipe", ["unit_cost", "t_per_t"]),
+    "Process Consumable": ("materials", ["unit_cost", "spec_per_t"]),
+    "Utility": ("utilities", ["tariff_per_unit", "intensity_per_t"]),
+    "Byproduct": ("byproducts", ["credit_per_t"]),
+    "Packaging": ("packaging", ["unit_cost", "units_per_t"]),
+    "Transport": ("logistics", ["tariff_per_tkm", "distance_km"]),
+    "Waste": ("waste", ["disposal_cost_per_kg", "kg_per_t"]),
+    "Rubric": ("rubrics", ["unit_cost", "quantity"]),
+}
+
+def _row_drivers(data: Dict[str, Any], totals: Dict[str, Any]) -> List[Dict[str, Any]]:
+    drivers: List[Dict[str, Any]] = []
+    seen: Dict[str, int] = {}
+    for r in totals["process"]["rows"] + totals["extra"]["rows"] + totals["rubrics"]["rows"]:
+        section, fields = ROW_DRIVERS[r["module"]]
+        idx = seen.get(section, 0)
+        seen[section] = idx + 1
+        if r.get("basis") == "fixed_project":
+            fields = ["quantity"]
+        for field in fields:
+            drivers.append({"driver": f"{r['name'] or section + ' #' + str(idx + 1)} · {field}", "section": section, "row": idx, "field": field,
+                            "cost": r["annual_cost"], "category": r["category"], "taxable": bool(r["taxable"])})
+    scen = current_scenario(data)
+    q = fnum(scen.get("quantityMultiplier", 1.0)) * fnum(scen.get("costMultiplier", 1.0))
+    for idx, li in enumerate(section_items(data, "lineItems")):
+        cost = fnum(li.get("quantity", 0.0)) * fnum(li.get("unitCost", 0.0)) * q
+        drivers.append({"driver": f"{li.get('description') or 'Line item #' + str(idx + 1)} · unitCost", "section": "lineItems", "row": idx, "field": "unitCost",
+                        "cost": cost, "category": li.get("category", "Other"), "taxable": bool(li.get("taxable", False))})
+    return [d for d in drivers if d["cost"]]
+
+def tornado(data: Dict[str, Any], pct: float = 10.0, metric: str = "unit") -> Dict[str, Any]:
+    """±pct% on each driver; rows ranked by swing of `metric` ("unit" or "npv")."""
+    x = pct / 100.0
+    totals = compute_totals(data)
+    scen = current_scenario(data)
+    qm = fnum(scen.get("quantityMultiplier", 1.0))
+    cm = fnum(scen.get("costMultiplier", 1.0))
+    dc = fnum(scen.get("contingencyPctDelta", 0.0))
+    settings = data.get("settings", {})
+    overhead_base = set(settings.get("overheadBase", ["Labor", "Logistics"]))
+    oh = fnum(settings.get("overheadPct", 0.0)) / 100.0
+    tax_pct = fnum(settings.get("taxPct", 0.0)) / 100.0
+    cont = totals["contingencyPct"] / 100.0
+    fi = financial_inputs(data)
+
+    rows = _row_drivers(data, totals)
+    cost = np.array([d["cost"] for d in rows], dtype=float)
+    pre = cost * (1.0 + oh * np.array([d["category"] in overhead_base for d in rows], dtype=bool))
+    tax = cost * tax_pct * np.array([d["taxable"] for d in rows], dtype=bool)
+    d_total = (pre * (1.0 + cont) + tax) * x
+    d_opex = (pre + tax) * x
+    # each row moves the escalation series it belongs to (its own rate, its category's, or the general rate)
+    own = fi["own"]
+    col = np.array([-1 if k is None else k for k in (own_column(own, d["section"], d["row"], d["category"]) for d in rows)], dtype=int)
+
+    # Throughput only moves the per-t part of the cost base (line items and fixed rubrics stay put).
+    tp = evaluate_components(linear_components(data), qm, cm, dc, tpy_scale=[1.0 - x, 1.0 + x])
+    base_total = totals["total"]
+    base_opex = totals["subtotal"] + totals["overhead"] + totals["tax"]
+    tpy0 = totals["tpy"]
+    n = len(rows)
+    sign = np.array([-1.0, 1.0])
+    # Points: row drivers (2n), throughput (2), price (2), discount rate (2), escalation (2).
+    total = np.concatenate([(base_total + np.outer(d_total, sign)).ravel(), tp["total"], np.full(6, base_total)])
+    opex = np.concatenate([(base_opex + np.outer(d_opex, sign)).ravel(), tp["subtotal"] + tp["overhead"] + tp["tax"], np.full(6, base_opex)])
+    base_own = own_opex(own, qm, cm)
+    opex_own = np.concatenate([np.repeat(base_own, 2 * n, axis=0), own_opex(own, qm, cm, [1.0 - x, 1.0 + x]), np.repeat(base_own, 6, axis=0)])
+    hit = np.flatnonzero(col >= 0)
+    opex_own[2 * hit, col[hit]] -= d_opex[hit]
+    opex_own[2 * hit + 1, col[hit]] += d_opex[hit]
+    tpy = np.concatenate([np.full(2 * n, tpy0), tp["tpy"], np.full(6, tpy0)])
+    price = np.full(total.shape, fi["price"])
+    disc = np.full(total.shape, fi["disc"])
+    esc = np.full(total.shape, fi["esc"])
+    k = 2 * n + 2
+    price[k:k + 2] *= 1.0 + x * sign
+    disc[k + 2:k + 4] *= 1.0 + x * sign
+    esc[k + 4:k + 6] *= 1.0 + x * sign
+    npv = evaluate_financials(fi, opex, tpy, price=price, esc=esc, disc=disc, opex_own=opex_own)["npv"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        unit = np.where(tpy != 0, total / np.where(tpy != 0, tpy, 1.0), 0.0)
+    base_npv = float(evaluate_financials(fi, base_opex, tpy0, opex_own=base_own)["npv"][0])
+    base_unit = (base_total / tpy0) if tpy0 else 0.0
+
+    labels = rows + [
+        {"driver": "Throughput (t/y)", "section": "process", "row": None, "field": "throughput_tpy"},
+        {"driver": "Selling price (per t)", "section": "finance", "row": None, "field": "selling_price_per_t"},
+        {"driver": "Discount rate", "section": "project", "row": None, "field": "discountRatePct"},
+        {"driver": "Escalation", "section": "settings", "row": None, "field": "escalationPctPerYear"},
+    ]
+    unit = unit.reshape(-1, 2)
+    npv = npv.reshape(-1, 2)
+    table = []
+    for i, d in enumerate(labels):
+        table.append({"driver": d["driver"], "section": d["section"], "row": d["row"], "field": d["field"],
+                      "unit_low": float(unit[i, 0]), "unit_high": float(unit[i, 1]), "npv_low": float(npv[i, 0]), "npv_high": float(npv[i, 1]),
+                      "unit_swing": float(abs(unit[i, 1] - unit[i, 0])), "npv_swing": float(abs(npv[i, 1] - npv[i, 0]))})
+    table.sort(key=lambda r: r[metric + "_swing"], reverse=True)
+    return {"pct": pct, "metric": metric, "base_unit": base_unit, "base_npv": base_npv, "rows": table}
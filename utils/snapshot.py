@@ -0,0 +1,144 @@
+# utils/snapshot.py
+# Native project snapshot: a zip holding manifest.json (the whole state as JSON, schema-versioned) with large
+# row tables moved out to columnar blocks (.npy for numbers/booleans, JSON arrays for text). Lossless round-trip
+# of every section; Excel stays an export format (utils/workbook.py reads it back, but only the table sections).
+from typing import Dict, Any, List, Callable, Tuple, Union
+import io
+import json
+import zipfile
+import numpy as np
+
+FORMAT = "costing-snapshot"
+SCHEMA_VERSION = 1
+SNAPSHOT_EXT = ".csnap"
+BLOCK_MIN_ROWS = 256  # smaller tables stay inline in the manifest
+
+# schema_version -> function upgrading a state saved with that version to version + 1
+MIGRATIONS: Dict[int, Callable[[Dict[str, Any]], Dict[str, Any]]] = {}
+
+_FIXED_TIME = (1980, 1, 1, 0, 0, 0)  # constant zip timestamps: equal states give byte-identical snapshots
+
+def _json_default(o: Any) -> Any:
+    if isinstance(o, np.generic):
+        return o.item()
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+    raise TypeError(f"{type(o).__name__} is not serializable in a snapshot")
+
+def _dumps(obj: Any) -> bytes:
+    # key order is kept (it drives display order in the pages), so output is deterministic for a given state
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+def _npy(arr: np.ndarray) -> bytes:
+    buf = io.BytesIO()
+    np.save(buf, arr, allow_pickle=False)
+    return buf.getvalue()
+
+def _column_kind(values: List[Any]) -> str:
+    types = set(map(type, values))
+    if types == {float}: return "f8"
+    if types <= {float, type(None)} and float in types: return "f8?"
+    if types == {bool}: return "b1"
+    if types == {int} and -2**63 <= min(values) and max(values) < 2**63: return "i8"
+    if types == {str}: return "str"
+    return "json"
+
+def _as_block(rows: List[Any]) -> Union[Tuple[List[str], List[str], List[List[Any]]], None]:
+    """(keys, kinds, columns) when rows are dicts sharing one key sequence, else None (stored inline)."""
+    if len(rows) < BLOCK_MIN_ROWS or not isinstance(rows[0], dict):
+        return None
+    keys = tuple(rows[0])
+    if any(not isinstance(r, dict) or tuple(r) != keys for r in rows):
+        return None
+    cols = [list(c) for c in zip(*(r.values() for r in rows))] if keys else []
+    return list(keys), [_column_kind(c) for c in cols], cols
+
+def write_snapshot(data: Dict[str, Any]) -> bytes:
+    """Serialize the whole state to snapshot bytes."""
+    files: List[Tuple[str, bytes]] = []
+    blocks: Dict[str, Any] = {}
+
+    def walk(obj: Any) -> Any:
+        if isinstance(obj, dict):
+            return {k: walk(v) for k, v in obj.items()}
+        if isinstance(obj, (list, tuple)):
+            block = _as_block(obj) if isinstance(obj, list) and obj else None
+            if block is None:
+                return [walk(v) for v in obj]
+            bid = f"b{len(blocks)}"
+            keys, kinds, cols = block
+            for i, (kind, col) in enumerate(zip(kinds, cols)):
+                name = f"{bid}/{i}"
+                if kind == "f8?":
+                    files.append((name + ".npy", _npy(np.array([np.nan if v is None else v for v in col], dtype=np.float64))))
+                    files.append((name + ".null.npy", _npy(np.array([v is None for v in col], dtype=np.bool_))))
+                elif kind in ("f8", "b1", "i8"):
+                    files.append((name + ".npy", _npy(np.array(col, dtype={"f8": np.float64, "b1": np.bool_, "i8": np.int64}[kind]))))
+                else:
+                    files.append((name + ".json", _dumps(col)))
+            blocks[bid] = {"rows": len(obj), "keys": keys, "kinds": kinds}
+            return {"$block": bid}
+        return obj
+
+    state = walk(data)
+    manifest = {"format": FORMAT, "schema_version": SCHEMA_VERSION, "blocks": blocks, "state": state}
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6) as z:
+        for name, raw in [("manifest.json", _dumps(manifest))] + files:
+            z.writestr(zipfile.ZipInfo(name, _FIXED_TIME), raw, compress_type=zipfile.ZIP_DEFLATED)
+    return buf.getvalue()
+
+def is_snapshot(src: Union[str, bytes]) -> bool:
+    try:
+        with zipfile.ZipFile(io.BytesIO(src) if isinstance(src, bytes) else src) as z:
+            return "manifest.json" in z.namelist()
+    except (zipfile.BadZipFile, OSError):
+        return False
+
+def read_snapshot(src: Union[str, bytes, Any]) -> Dict[str, Any]:
+    """State from snapshot bytes / path / file object, migrated to the current schema version."""
+    try:
+        z = zipfile.ZipFile(io.BytesIO(src) if isinstance(src, bytes) else src)
+    except zipfile.BadZipFile as e:
+        raise ValueError("Not a costing snapshot (not a zip archive)") from e
+    with z:
+        try:
+            manifest = json.loads(z.read("manifest.json"))
+        except KeyError as e:
+            raise ValueError("Not a costing snapshot (no manifest.json)") from e
+        if manifest.get("format") != FORMAT:
+            raise ValueError(f"Not a costing snapshot (format {manifest.get('format')!r})")
+        version = int(manifest.get("schema_version", 0))
+        if version > SCHEMA_VERSION:
+            raise ValueError(f"Snapshot schema v{version} is newer than this tool (v{SCHEMA_VERSION}); please update")
+
+        def load_block(bid: str) -> List[Dict[str, Any]]:
+            meta = manifest["blocks"][bid]
+            cols = []
+            for i, kind in enumerate(meta["kinds"]):
+                name = f"{bid}/{i}"
+                if kind in ("str", "json"):
+                    cols.append(json.loads(z.read(name + ".json")))
+                    continue
+                col = np.load(io.BytesIO(z.read(name + ".npy")), allow_pickle=False).tolist()
+                if kind == "f8?":
+                    for j in np.flatnonzero(np.load(io.BytesIO(z.read(name + ".null.npy")), allow_pickle=False)).tolist():
+                        col[j] = None
+                cols.append(col)
+            keys = meta["keys"]
+            return [dict(zip(keys, vals)) for vals in zip(*cols)] if keys else [{} for _ in range(meta["rows"])]
+
+        def walk(obj: Any) -> Any:
+            if isinstance(obj, dict):
+                if len(obj) == 1 and "$block" in obj:
+                    return load_block(obj["$block"])
+                return {k: walk(v) for k, v in obj.items()}
+            if isinstance(obj, list):
+                return [walk(v) for v in obj]
+            return obj
+
+        state = walk(manifest["state"])
+    while version < SCHEMA_VERSION:
+        state = MIGRATIONS[version](state)
+        version += 1
+    return state
@@ -1,11 +1,21 @@
-import copy
-from .costing_core import DEFAULT_STATE, STAGE_PROFILE
+from .costing_core import STAGE_PROFILE
+from .frozen import snapshot
 
 def ensure_state(st):
     if "data" not in st.session_state:
-        st.session_state["data"] = copy.deepcopy(DEFAULT_STATE)
+        from .costing_core import DEFAULT_STATE
+        st.session_state["data"] = snapshot(DEFAULT_STATE)
     return st.session_state["data"]
 
+def commit_state(st):
+    """Freeze the session state after a page edited it: sections equal to the last commit keep sharing its tables.
+
+    The returned snapshot is immutable in its tables and cheap (only the small dicts above them are copied), so it
+    can be kept for undo or comparisons.
+    """
+    st.session_state["data_committed"] = snapshot(ensure_state(st), st.session_state.get("data_committed"))
+    return st.session_state["data_committed"]
+
 def stage_sections(stage: str):
     prof = STAGE_PROFILE.get(stage, STAGE_PROFILE["Feasibility"])
     return prof.get("sections", {})
@@ -0,0 +1,85 @@
+# utils/sweep.py
+# Grid sweep over cost/quantity multipliers, selling price, discount rate and escalation: the costing is evaluated
+# once per (cost, quantity) pair through the linear components, the cash-flow model broadcast over the full grid.
+# The escalation axis moves the general rate; categories and rows with their own rate keep it.
+from typing import Dict, Any, List, Optional, Sequence
+import time
+import numpy as np
+
+from .costing_core import current_scenario, fnum
+from .scenarios import linear_components, evaluate_components
+from .financials import financial_inputs, evaluate_financials, own_opex
+
+# axis -> label; price in currency per t, rates in % (as entered in Details)
+SWEEP_AXES: Dict[str, str] = {
+    "costMultiplier": "Cost multiplier",
+    "quantityMultiplier": "Quantity multiplier",
+    "price": "Selling price (per t)",
+    "discountPct": "Discount rate (%)",
+    "escalationPct": "Escalation (%/y)",
+}
+_POINTS_PER_CHUNK = 100_000  # grid points x years per float array stays in the tens of MB
+
+def base_values(data: Dict[str, Any]) -> Dict[str, float]:
+    """Current value of each axis (active scenario and finance settings)."""
+    scen = current_scenario(data)
+    return {
+        "costMultiplier": fnum(scen.get("costMultiplier", 1.0)),
+        "quantityMultiplier": fnum(scen.get("quantityMultiplier", 1.0)),
+        "price": fnum(data.get("finance", {}).get("selling_price_per_t", 0.0)),
+        "discountPct": fnum(data.get("project", {}).get("discountRatePct", 10.0)),
+        "escalationPct": fnum(data.get("settings", {}).get("escalationPctPerYear", 0.0)),
+    }
+
+def grid_sweep(data: Dict[str, Any], axes: Dict[str, Sequence[float]]) -> Dict[str, Any]:
+    """Evaluate every combination of the given axis values (axes left out stay at their current value).
+
+    Returns {"axes": {name: values}, "npv": array shaped by the axes in SWEEP_AXES order, "unit"/"total":
+    arrays over (costMultiplier, quantityMultiplier), "points", "seconds"}.
+    """
+    t0 = time.perf_counter()
+    base = base_values(data)
+    values = {k: np.asarray(axes.get(k, [base[k]]), dtype=float).ravel() for k in SWEEP_AXES}
+    dc = fnum(current_scenario(data).get("contingencyPctDelta", 0.0))
+    cm, qm = np.meshgrid(values["costMultiplier"], values["quantityMultiplier"], indexing="ij")
+    costs = evaluate_components(linear_components(data), qm.ravel(), cm.ravel(), dc)
+    opex = costs["subtotal"] + costs["overhead"] + costs["tax"]
+    shape = tuple(len(values[k]) for k in SWEEP_AXES)
+    n_cost = shape[0] * shape[1]
+    n_fin = shape[2] * shape[3] * shape[4]
+    price, disc, esc = (g.ravel() for g in np.meshgrid(values["price"], values["discountPct"] / 100.0, values["escalationPct"] / 100.0, indexing="ij"))
+
+    fi = financial_inputs(data)
+    opex_own = own_opex(fi["own"], qm.ravel(), cm.ravel())
+    npv = np.empty(n_cost * n_fin)
+    step = max(1, _POINTS_PER_CHUNK // max(1, len(fi["years"])) // n_fin) * n_fin
+    for start in range(0, n_cost * n_fin, step):
+        idx = np.arange(start, min(start + step, n_cost * n_fin))
+        c, f = idx // n_fin, idx % n_fin
+        npv[idx] = evaluate_financials(fi, opex[c], costs["tpy"][c], price=price[f], esc=esc[f], disc=disc[f], opex_own=opex_own[c])["npv"]
+    return {
+        "axes": values,
+        "base": base,
+        "npv": npv.reshape(shape),
+        "unit": costs["unit"].reshape(shape[:2]),
+        "total": costs["total"].reshape(shape[:2]),
+        "points": int(npv.size),
+        "seconds": time.perf_counter() - t0,
+    }
+
+def surface(result: Dict[str, Any], x: str, y: str, metric: str = "npv", at: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+    """Long-form rows (x, y, value) of a 2-D slice; the other axes are held at index `at[axis]` (default: nearest to base)."""
+    names = list(SWEEP_AXES)
+    at = dict(at or {})
+    for k in names:
+        if k not in at:
+            at[k] = int(np.abs(result["axes"][k] - result["base"][k]).argmin())
+    grid = result[metric]
+    if grid.ndim == 2:  # unit / total only vary with the multipliers: broadcast over the other axes
+        grid = np.broadcast_to(grid[:, :, None, None, None], result["npv"].shape)
+    index = tuple(slice(None) if k in (x, y) else at[k] for k in names)
+    sl = grid[index]
+    if names.index(x) > names.index(y):
+        sl = sl.T
+    xs, ys = result["axes"][x].tolist(), result["axes"][y].tolist()
+    return [{"x": xv, "y": yv, "value": float(sl[i, j])} for i, xv in enumerate(xs) for j, yv in enumerate(ys)]
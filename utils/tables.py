@@ -0,0 +1,99 @@
+# utils/tables.py
+# Typed section tables: the numeric and flag columns of a section parsed once into NumPy arrays, with unreadable
+# cells and incompatible units reported (section, row, field, value, problem) instead of silently costed as 0. Tables are memoized by section
+# content (utils/cache.py), so frozen, unchanged sections are parsed once and then reused at no cost.
+from typing import Dict, Any, List, Optional
+import numpy as np
+
+from .cache import section_cached
+from .units import INCOMPATIBLE, UNIT_FIELDS, factor_codes, mismatch
+
+# section -> numeric field -> default when the key is absent (a present-but-empty cell reads as 0.0)
+NUMERIC_FIELDS: Dict[str, Dict[str, Any]] = {
+    "recipe": {"t_per_t": None, "kg_per_t": 0.0, "unit_cost": 0.0},
+    "materials": {"spec_per_t": 0.0, "unit_cost": 0.0},
+    "utilities": {"intensity_per_t": 0.0, "tariff_per_unit": 0.0},
+    "byproducts": {"credit_per_t": 0.0},
+    "packaging": {"units_per_t": 0.0, "unit_cost": 0.0},
+    "logistics": {"wet_t_per_t": 1.0, "distance_km": 0.0, "tariff_per_tkm": 0.0},
+    "waste": {"kg_per_t": 0.0, "disposal_cost_per_kg": 0.0},
+    "rubrics": {"quantity": 0.0, "unit_cost": 0.0},
+    "lineItems": {"quantity": 0.0, "unitCost": 0.0},
+}
+
+# section -> boolean field -> default
+FLAG_FIELDS: Dict[str, Dict[str, bool]] = {
+    "recipe": {"taxable": True},
+    "materials": {"taxable": False},
+    "utilities": {"taxable": False},
+    "byproducts": {},
+    "packaging": {"taxable": True},
+    "logistics": {"taxable": True},
+    "waste": {"taxable": False},
+    "rubrics": {"taxable": False},
+    "lineItems": {"taxable": False},
+}
+
+class SectionTable:
+    """num[field]: float64 array; missing[field]: cell absent or None; flags[field]: bool array; issues: unreadable cells;
+    factor: unit-conversion factor per row (utils/units.py), None for sections without unit conversion."""
+    __slots__ = ("name", "n", "num", "missing", "flags", "issues", "factor")
+
+    def __init__(self, name: str, n: int):
+        self.name = name
+        self.n = n
+        self.num: Dict[str, np.ndarray] = {}
+        self.missing: Dict[str, np.ndarray] = {}
+        self.flags: Dict[str, np.ndarray] = {}
+        self.issues: List[Dict[str, Any]] = []
+        self.factor: Optional[np.ndarray] = None
+
+    def nbytes(self) -> int:
+        return sum(a.nbytes for d in (self.num, self.missing, self.flags) for a in d.values()) + (self.factor.nbytes if self.factor is not None else 0)
+
+def _numeric(name: str, field: str, vals: List[Any], issues: List[Dict[str, Any]]) -> np.ndarray:
+    try:
+        arr = np.array(vals, dtype=float)
+    except (TypeError, ValueError, OverflowError):
+        arr = np.zeros(len(vals))
+        for i, v in enumerate(vals):
+            try:
+                arr[i] = float(v)
+            except (TypeError, ValueError, OverflowError):  # OverflowError: an int too large for a float (10**400)
+                if v is not None and not (isinstance(v, str) and not v.strip()):
+                    issues.append({"section": name, "row": i, "field": field, "value": v, "problem": "not a number"})
+        return arr
+    # None becomes NaN in np.array but reads as 0.0; genuine NaN cells stay NaN.
+    for i in np.flatnonzero(np.isnan(arr)).tolist():
+        if vals[i] is None:
+            arr[i] = 0.0
+    return arr
+
+def build_table(name: str, items: List[Dict[str, Any]]) -> SectionTable:
+    t = SectionTable(name, len(items))
+    for field, default in NUMERIC_FIELDS[name].items():
+        vals = [r.get(field, default) for r in items]
+        t.num[field] = _numeric(name, field, vals, t.issues)
+        t.missing[field] = np.array([v is None for v in vals], dtype=bool)
+    for field, default in FLAG_FIELDS[name].items():
+        t.flags[field] = np.array([bool(r.get(field, default)) for r in items], dtype=bool)
+    if name in UNIT_FIELDS:
+        codes, pairs, factors = factor_codes(name, items)
+        bad = {k for k, f in enumerate(factors) if f is INCOMPATIBLE}
+        if bad:
+            c_field = UNIT_FIELDS[name][2]
+            t.issues.extend({"section": name, "row": i, "field": c_field, "value": pairs[k][1], "problem": "unit mismatch (" + mismatch(*pairs[k]) + ")"}
+                            for i, k in enumerate(codes) if k in bad)
+        t.factor = np.array([0.0 if f is INCOMPATIBLE else f for f in factors], dtype=float)[np.array(codes, dtype=np.intp)] if items else np.ones(0)
+    for arr in (*t.num.values(), *t.missing.values(), *t.flags.values(), *([t.factor] if t.factor is not None else [])):
+        arr.flags.writeable = False  # shared through the cache
+    return t
+
+def section_table(name: str, items: List[Dict[str, Any]]) -> SectionTable:
+    """Typed table for a section's rows, built once per distinct content (shared and read-only)."""
+    return section_cached(name + ":table", items, lambda: build_table(name, items))
+
+def table_issues(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Unreadable numeric cells and quantity / cost unit mismatches across all costed sections (costed as 0 until fixed)."""
+    from .costing_core import section_items
+    return [i for name in NUMERIC_FIELDS for i in section_table(name, section_items(data, name)).issues]
@@ -0,0 +1,94 @@
+# utils/units.py
+# Unit registry: reconciles a row's quantity unit (numerator of "kg/t", "kWh/t", ...) with its cost unit
+# (denominator of "MAD/t", "MAD/MWh", ...) as one multiplicative factor. Factors are cached per distinct
+# (quantity unit, cost unit) pair, so a large table costs one lookup per pair, not a parse per row.
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple, Optional
+
+# unit -> (dimension, size in the dimension's base unit)
+UNITS: Dict[str, Tuple[str, float]] = {
+    "g": ("mass", 1e-3), "kg": ("mass", 1.0), "t": ("mass", 1000.0),
+    "L": ("volume", 1e-3), "l": ("volume", 1e-3), "m3": ("volume", 1.0),
+    "Nm3": ("gas volume", 1.0),
+    "kWh": ("energy", 1.0), "MWh": ("energy", 1000.0), "MJ": ("energy", 1.0 / 3.6), "GJ": ("energy", 1000.0 / 3.6),
+    "bag": ("bag", 1.0), "pallet": ("pallet", 1.0), "drum": ("drum", 1.0),
+}
+# generic count: matches any unit one-for-one (e.g. "MAD/unit" against "kg/t" keeps the entered price per item)
+WILDCARDS = {"unit", "units"}
+
+# cost-unit choices offered in Details, per section ("{cur}" is the project currency)
+COST_UNITS: Dict[str, List[str]] = {
+    "recipe": ["{cur}/t"],
+    "materials": ["{cur}/kg", "{cur}/t", "{cur}/L", "{cur}/m3", "{cur}/unit"],
+    "utilities": ["{cur}/kWh", "{cur}/MWh", "{cur}/Nm3", "{cur}/m3", "{cur}/GJ", "{cur}/t", "{cur}/unit"],
+    "packaging": ["{cur}/unit", "{cur}/bag", "{cur}/pallet", "{cur}/drum"],
+    "logistics": ["{cur}/(t*km)", "{cur}/t"],
+    "waste": ["{cur}/kg", "{cur}/t"],
+    "byproducts": ["{cur}/t"],
+    "rubrics": ["{cur}/unit", "{cur}/t", "{cur}/y"],
+}
+
+# section -> (quantity-unit field, or None for a fixed unit; its default; cost-unit field; its default).
+# Not converted: packaging (counts of items, no pack sizes to convert bag/pallet/drum), logistics (t*km against a
+# per-t tariff is a different formula, not a factor), byproducts (credit per t of product), rubrics (basis-dependent).
+UNIT_FIELDS: Dict[str, Tuple[Optional[str], str, str, str]] = {
+    "recipe": ("unit", "t/t", "cost_unit", "{cur}/t"),
+    "materials": ("unit_spec", "kg/t", "cost_unit", "{cur}/unit"),
+    "utilities": ("unit_intensity", "unit/t", "tariff_unit", "{cur}/unit"),
+    "waste": (None, "kg/t", "cost_unit", "{cur}/kg"),
+}
+
+def cost_unit_options(cur: str) -> Dict[str, List[str]]:
+    return {k: [u.replace("{cur}", cur) for u in v] for k, v in COST_UNITS.items()}
+
+def _base(unit: str) -> str:
+    return unit.strip().strip("()").replace("³", "3")
+
+# unit_factor result for a quantity unit and a cost unit of different dimensions ("kg/t" with "MAD/kWh"): no factor
+# turns one into the other, so the row is flagged (utils/tables.py:table_issues) and costed as 0 until fixed.
+INCOMPATIBLE = None
+
+@lru_cache(maxsize=1024)
+def unit_factor(qty_unit: Any, cost_unit: Any) -> Optional[float]:
+    """Factor turning (quantity in the numerator of qty_unit) × (price per denominator of cost_unit) into money.
+
+    "kg/t" with "MAD/t" -> 0.001, "kWh/t" with "MAD/MWh" -> 0.001. Unknown or generic units -> 1.0 (the row is
+    costed as entered); known units of different dimensions ("kg/t" with "MAD/kWh") -> INCOMPATIBLE.
+    """
+    if not isinstance(qty_unit, str) or not isinstance(cost_unit, str):
+        return 1.0
+    q = _base(qty_unit.split("/")[0])
+    c = _base(cost_unit.split("/", 1)[1]) if "/" in cost_unit else ""
+    if q in WILDCARDS or c in WILDCARDS or q not in UNITS or c not in UNITS:
+        return 1.0
+    (qd, qs), (cd, cs) = UNITS[q], UNITS[c]
+    return qs / cs if qd == cd else INCOMPATIBLE
+
+def mismatch(qty_unit: Any, cost_unit: Any) -> str:
+    """Issue text for an INCOMPATIBLE pair: "kg vs kWh"."""
+    return f"{_base(qty_unit.split('/')[0])} vs {_base(cost_unit.split('/', 1)[1])}"
+
+def tonnes_per_unit(qty_unit: Any) -> Optional[float]:
+    """Tonnes per unit of a mass quantity unit ("kg/t" -> 0.001, "t/t" -> 1.0); None when it is not a mass."""
+    if not isinstance(qty_unit, str):
+        return None
+    dim, size = UNITS.get(_base(qty_unit.split("/")[0]), (None, 0.0))
+    return size / 1000.0 if dim == "mass" else None
+
+def factor_codes(section: str, items: List[Dict[str, Any]]) -> Tuple[List[int], List[Tuple[Any, Any]], List[Optional[float]]]:
+    """(per-row index into the distinct (quantity unit, cost unit) pairs, the pairs, factor per pair) for a section's rows."""
+    q_field, q_default, c_field, c_default = UNIT_FIELDS[section]
+    pairs: Dict[Tuple[Any, Any], int] = {}
+    if q_field is None:
+        codes = [pairs.setdefault((q_default, r.get(c_field, c_default)), len(pairs)) for r in items]
+    else:
+        codes = [pairs.setdefault(((r.get(q_field, q_default) or q_default), r.get(c_field, c_default)), len(pairs)) for r in items]
+    return codes, list(pairs), [unit_factor(q, c) for q, c in pairs]
+
+def row_factor(section: str, r: Dict[str, Any]) -> float:
+    """Factor for one row (per-row kernels); 0.0 for an INCOMPATIBLE pair, like the typed tables."""
+    if section not in UNIT_FIELDS:
+        return 1.0
+    q_field, q_default, c_field, c_default = UNIT_FIELDS[section]
+    f = unit_factor((r.get(q_field, q_default) or q_default) if q_field else q_default, r.get(c_field, c_default))
+    return 0.0 if f is INCOMPATIBLE else f
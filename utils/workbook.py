@@ -0,0 +1,327 @@
+# utils/workbook.py
+# Workbook / CSV import: one streaming pass over the upload, sheets mapped to state sections,
+# column types coerced and defaults filled at ingestion, with per-sheet row counts and timings.
+# Also the xlsx export / import template, written straight with xlsxwriter (no DataFrames).
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple, Union, Iterable, Iterator
+from xml.etree.ElementTree import iterparse, ParseError
+import csv
+import io
+import posixpath
+import time
+import zipfile
+
+# import section -> path in the state
+IMPORT_TARGETS: Dict[str, Tuple[str, ...]] = {
+    "recipe": ("recipe",),
+    "materials": ("process", "materials"),
+    "utilities": ("process", "utilities"),
+    "byproducts": ("process", "byproducts"),
+    "packaging": ("packaging",),
+    "logistics": ("logistics",),
+    "waste": ("waste",),
+    "rubrics": ("rubrics",),
+    "scenarios": ("scenarios",),
+    "capex": ("finance", "capex_items"),
+    "rampup": ("rampup",),
+}
+IMPORT_SECTIONS = list(IMPORT_TARGETS)
+
+# column -> (kind, default); kind is "num", "text" or "bool". A None default leaves empty cells empty
+# (recipe t_per_t: the kernel falls back to kg_per_t when it is None). "{cur}" is replaced by the project currency.
+SCHEMAS: Dict[str, Dict[str, Tuple[str, Any]]] = {
+    "recipe": {"name": ("text", ""), "t_per_t": ("num", None), "kg_per_t": ("num", None), "unit": ("text", "t/t"), "unit_cost": ("num", 0.0), "cost_unit": ("text", "{cur}/t"), "price_source": ("text", "Benchmark"), "taxable": ("bool", True), "note": ("text", ""), "escalation_pct": ("num", None)},
+    "materials": {"name": ("text", ""), "spec_per_t": ("num", 0.0), "unit_spec": ("text", "kg/t"), "unit_cost": ("num", 0.0), "cost_unit": ("text", "{cur}/kg"), "price_source": ("text", "Benchmark"), "taxable": ("bool", False), "note": ("text", ""), "escalation_pct": ("num", None)},
+    "utilities": {"name": ("text", ""), "intensity_per_t": ("num", 0.0), "unit_intensity": ("text", "kWh/t"), "tariff_per_unit": ("num", 0.0), "tariff_unit": ("text", "{cur}/kWh"), "price_source": ("text", "Benchmark"), "taxable": ("bool", False), "note": ("text", ""), "escalation_pct": ("num", None)},
+    "byproducts": {"name": ("text", ""), "credit_per_t": ("num", 0.0), "unit": ("text", "{cur}/t"), "note": ("text", ""), "escalation_pct": ("num", None)},
+    "packaging": {"name": ("text", ""), "units_per_t": ("num", 0.0), "unit_cost": ("num", 0.0), "cost_unit": ("text", "{cur}/unit"), "price_source": ("text", "Benchmark"), "taxable": ("bool", True), "note": ("text", ""), "escalation_pct": ("num", None)},
+    "logistics": {"name": ("text", ""), "wet_t_per_t": ("num", 1.0), "distance_km": ("num", 0.0), "tariff_per_tkm": ("num", 0.0), "cost_unit": ("text", "{cur}/(t*km)"), "price_source": ("text", "Benchmark"), "taxable": ("bool", True), "note": ("text", ""), "escalation_pct": ("num", None)},
+    "waste": {"name": ("text", ""), "kg_per_t": ("num", 0.0), "disposal_cost_per_kg": ("num", 0.0), "cost_unit": ("text", "{cur}/kg"), "price_source": ("text", "Benchmark"), "taxable": ("bool", False), "note": ("text", ""), "escalation_pct": ("num", None)},
+    "rubrics": {"name": ("text", ""), "basis": ("text", "per_t"), "quantity": ("num", 0.0), "unit_cost": ("num", 0.0), "cost_unit": ("text", "{cur}/unit"), "map_to_category": ("text", "Other"), "price_source": ("text", "Benchmark"), "taxable": ("bool", False), "note": ("text", ""), "escalation_pct": ("num", None)},
+    "scenarios": {"id": ("text", ""), "name": ("text", ""), "costMultiplier": ("num", 1.0), "quantityMultiplier": ("num", 1.0), "contingencyPctDelta": ("num", 0.0)},
+    "capex": {"name": ("text", ""), "amount": ("num", 0.0), "year": ("num", 0.0), "depr_years": ("num", 10.0), "category": ("text", "Equipment")},
+    "rampup": {"utilities_pct": ("num", 100.0), "logistics_packaging_pct": ("num", 100.0), "logistics_transport_pct": ("num", 100.0), "other_pct": ("num", 100.0), "price_pct": ("num", 100.0), "startup_extra_cost_per_t": ("num", 0.0)},
+}
+
+_TRUE = {"true", "yes", "y", "1", "x", "vrai", "oui"}
+_FALSE = {"false", "no", "n", "0", "", "faux", "non"}
+
+def _empty(v: Any) -> bool:
+    return v is None or (isinstance(v, str) and not v.strip()) or (isinstance(v, float) and v != v)
+
+def _comma_number(t: str) -> Tuple[str, str]:
+    """(text float() can read, comma style): "thousands" (1,234.5 / 1,234,567), "decimal" (1234,5 / 0,2500),
+    "ambiguous" (a single comma before exactly three digits, read as thousands here) or "" (no comma)."""
+    if "," not in t:
+        return t, ""
+    if "." in t:
+        return t.replace(",", ""), "thousands"
+    head, *tails = t.split(",")
+    if all(len(x) == 3 and x.isdigit() for x in tails) and head.lstrip("+-").isdigit() and head.lstrip("+-")[:1] != "0":
+        return t.replace(",", ""), "thousands" if len(tails) > 1 else "ambiguous"
+    return t.replace(",", "."), "decimal"
+
+def _coerce(v: Any, kind: str, default: Any) -> Tuple[Any, bool]:
+    """(value, ok): ok is False when a non-empty cell could not be read as `kind` and the default was used."""
+    if _empty(v):
+        return default, True
+    if kind == "num":
+        if isinstance(v, bool):
+            return float(v), True
+        if isinstance(v, (int, float)):
+            return float(v), True
+        t = str(v).strip().replace(" ", "").replace("\u00a0", "")
+        t = _comma_number(t)[0]
+        try:
+            return float(t), True
+        except ValueError:
+            return default, False
+    if kind == "bool":
+        if isinstance(v, (bool, int, float)):
+            return bool(v), True
+        s = str(v).strip().lower()
+        if s in _TRUE: return True, True
+        if s in _FALSE: return False, True
+        return default, False
+    return (v.strip() if isinstance(v, str) else str(v)), True
+
+def coerce_rows(section: str, header: List[Any], rows: Iterable[Iterable[Any]], currency: str = "MAD", fill_missing: bool = True) -> Tuple[List[Dict[str, Any]], int]:
+    """Records with schema columns typed and defaulted (extra columns kept as read); returns (records, bad cells).
+
+    fill_missing adds schema columns absent from the sheet with their defaults. A "1,234" cell is read as 1234
+    unless other cells of its column use a decimal comma (1234,5) and none a thousands separator (1,234.5).
+    """
+    schema = SCHEMAS.get(section, {})
+    cols = [str(h).strip() if h is not None else "" for h in header]
+    keep = [i for i, c in enumerate(cols) if c]
+    spec = [(cols[i], i, schema.get(cols[i])) for i in keep]
+    missing = [(c, (d.format(cur=currency) if isinstance(d, str) else d)) for c, (k, d) in schema.items() if c not in cols] if fill_missing else []
+    defaults = {c: (d.format(cur=currency) if isinstance(d, str) else d) for c, (k, d) in schema.items()}
+    out: List[Dict[str, Any]] = []
+    bad = 0
+    styles: Dict[str, set] = {}
+    ambiguous: List[Tuple[Dict[str, Any], str, str]] = []
+    for row in rows:
+        row = list(row)
+        if all(_empty(v) for v in row):
+            continue
+        rec: Dict[str, Any] = {}
+        for c, i, sch in spec:
+            v = row[i] if i < len(row) else None
+            if sch is None:
+                rec[c] = None if _empty(v) else v
+            else:
+                rec[c], ok = _coerce(v, sch[0], defaults[c])
+                bad += not ok
+                if ok and sch[0] == "num" and isinstance(v, str) and "," in v:
+                    t = v.strip().replace(" ", "").replace("\u00a0", "")
+                    style = _comma_number(t)[1]
+                    styles.setdefault(c, set()).add(style)
+                    if style == "ambiguous":
+                        ambiguous.append((rec, c, t))
+        for c, d in missing:
+            rec[c] = d
+        out.append(rec)
+    for rec, c, t in ambiguous:
+        if styles[c] == {"ambiguous", "decimal"}:
+            rec[c] = float(t.replace(",", "."))
+    return out, bad
+
+def _to_section_value(section: str, records: List[Dict[str, Any]]) -> Any:
+    if section != "rampup":
+        return records
+    # rampup is column-oriented (12 monthly values per profile) and merged into the existing settings;
+    # the scalar startup cost takes the first value.
+    cols = {c: [r[c] for r in records] for c in (records[0] if records else {})}
+    if "startup_extra_cost_per_t" in cols:
+        cols["startup_extra_cost_per_t"] = cols["startup_extra_cost_per_t"][0] if cols["startup_extra_cost_per_t"] else 0.0
+    return cols
+
+# ---------- xlsx streaming reader ----------
+# Reads sheet XML straight from the zip with iterparse, one <row> at a time (cleared once read), which is
+# ~2x faster than openpyxl's read-only mode and never holds a whole sheet. Cell values come back raw:
+# numbers, shared/inline strings, booleans; date-formatted cells stay serial numbers (no import section has dates).
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+_PKG_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+def _col_index(ref: str) -> int:
+    n = 0
+    for ch in ref:
+        if ch <= "9":
+            break
+        n = n * 26 + (ord(ch) - 64)
+    return n - 1
+
+def _sheet_rows(z: zipfile.ZipFile, path: str, ns: str, shared: List[str]) -> Iterator[List[Any]]:
+    ROW, V, T = ns + "row", ns + "v", ns + "t"
+    for _, el in iterparse(z.open(path), events=("end",)):
+        if el.tag != ROW:
+            continue
+        row: List[Any] = []
+        for c in el:
+            t = c.get("t")
+            if t == "inlineStr":
+                val: Any = "".join(x.text or "" for x in c.iter(T))
+            else:
+                v = c.find(V)
+                x = None if v is None else v.text
+                if x is None: val = None
+                elif t == "s": val = shared[int(x)]
+                elif t == "b": val = x == "1"
+                elif t in ("str", "e"): val = x
+                else: val = int(x) if x.lstrip("-").isdigit() else float(x)
+            r = c.get("r")
+            i = _col_index(r) if r else len(row)
+            if i > len(row):
+                row.extend([None] * (i - len(row)))
+            if i == len(row): row.append(val)
+            else: row[i] = val
+        el.clear()
+        yield row
+
+def iter_sheets(src: Union[str, bytes, Any]) -> Iterator[Tuple[str, Iterator[List[Any]]]]:
+    """(sheet title, row iterator) in workbook order; consume each sheet's rows before moving to the next."""
+    with zipfile.ZipFile(io.BytesIO(src) if isinstance(src, bytes) else src) as z:
+        root = next(iterparse(z.open("xl/workbook.xml"), events=("start",)))[1]
+        ns = root.tag[:root.tag.index("}") + 1] if root.tag.startswith("{") else ""
+        rels = {}
+        for _, el in iterparse(z.open("xl/_rels/workbook.xml.rels")):
+            if el.tag == _PKG_NS + "Relationship":
+                target = el.get("Target", "")
+                rels[el.get("Id")] = (target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target)), el.get("Type", ""))
+        sheets = [(el.get("name"), el.get(_REL_NS) or el.get("{http://purl.oclc.org/ooxml/officeDocument/relationships}id"))
+                  for _, el in iterparse(z.open("xl/workbook.xml")) if el.tag == ns + "sheet"]
+        shared: List[str] = []
+        sst = next((p for p, typ in rels.values() if typ.endswith("/sharedStrings")), None)
+        if sst and sst in z.namelist():
+            for _, el in iterparse(z.open(sst)):
+                if el.tag == ns + "si":
+                    shared.append("".join(x.text or "" for x in el.iter(ns + "t")))
+                    el.clear()
+        for title, rid in sheets:
+            path = rels.get(rid, ("", ""))[0]
+            if path in z.namelist():
+                yield title, _sheet_rows(z, path, ns, shared)
+
+def read_workbook(src: Union[str, bytes, Any], currency: str = "MAD", sections: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Parse an xlsx in one streaming pass; returns {"sections": {name: value}, "report": [...], "ignored": [...], "seconds": s}."""
+    t0 = time.perf_counter()
+    wanted = set(sections or IMPORT_SECTIONS)
+    result: Dict[str, Any] = {"sections": {}, "report": [], "ignored": []}
+    try:
+        for title, it in iter_sheets(src):
+            name = title.strip().lower()
+            if name not in wanted:
+                result["ignored"].append(title)
+                continue
+            ts = time.perf_counter()
+            header = next(it, None) or []
+            records, bad = coerce_rows(name, list(header), it, currency, fill_missing=name != "rampup")
+            result["sections"][name] = _to_section_value(name, records)
+            result["report"].append({"sheet": title, "section": name, "rows": len(records), "coerced_errors": bad, "seconds": time.perf_counter() - ts})
+    except (zipfile.BadZipFile, KeyError, ParseError) as e:
+        raise ValueError(f"Not a readable .xlsx workbook ({e})") from e
+    result["seconds"] = time.perf_counter() - t0
+    return result
+
+def read_csv(src: Union[str, bytes], section: str, currency: str = "MAD") -> Dict[str, Any]:
+    """Single-section CSV import with the same coercion (streamed with the csv module)."""
+    t0 = time.perf_counter()
+    text = io.StringIO(src.decode("utf-8-sig")) if isinstance(src, bytes) else open(src, "r", encoding="utf-8-sig", newline="")
+    with text as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        it = csv.reader(f, dialect)
+        header = next(it, [])
+        records, bad = coerce_rows(section, header, it, currency, fill_missing=section != "rampup")
+    seconds = time.perf_counter() - t0
+    return {"sections": {section: _to_section_value(section, records)}, "ignored": [], "seconds": seconds,
+            "report": [{"sheet": "csv", "section": section, "rows": len(records), "coerced_errors": bad, "seconds": seconds}]}
+
+def read_upload(name: str, content: bytes, section: Optional[str] = None, currency: str = "MAD") -> Dict[str, Any]:
+    """Dispatch on the file name: .csv goes to `section`, anything else is read as a workbook."""
+    if name.lower().endswith(".csv"):
+        return read_csv(content, section or "recipe", currency)
+    return read_workbook(content, currency)
+
+def apply_import(data: Dict[str, Any], sections: Dict[str, Any]) -> Dict[str, Any]:
+    """Write imported sections into the state (each section replaced as a whole)."""
+    for name, value in sections.items():
+        path = IMPORT_TARGETS[name]
+        node = data
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        if name == "rampup":
+            value = dict(node.get("rampup", {}) or {}, **value)
+        node[path[-1]] = value
+    return data
+
+# ---------- xlsx export ----------
+EXPORT_SECTIONS = [s for s in IMPORT_SECTIONS if s not in ("scenarios", "rampup")]
+
+# one example row per sheet of the import template ("{cur}" is replaced by the currency); rampup is column-wise
+TEMPLATE_ROWS: Dict[str, Any] = {
+    "recipe": [{"name": "", "t_per_t": 0.0, "unit": "t/t", "unit_cost": 0.0, "cost_unit": "{cur}/t", "price_source": "Benchmark", "taxable": True, "note": ""}],
+    "materials": [{"name": "", "spec_per_t": 0.0, "unit_spec": "kg/t", "unit_cost": 0.0, "cost_unit": "{cur}/kg", "price_source": "Benchmark", "taxable": False, "note": ""}],
+    "utilities": [{"name": "Electricity", "intensity_per_t": 0.0, "unit_intensity": "kWh/t", "tariff_per_unit": 0.0, "tariff_unit": "{cur}/kWh", "price_source": "Benchmark", "taxable": False, "note": ""}],
+    "byproducts": [{"name": "", "credit_per_t": 0.0, "unit": "{cur}/t", "note": ""}],
+    "packaging": [{"name": "", "units_per_t": 0.0, "unit_cost": 0.0, "cost_unit": "{cur}/unit", "price_source": "Benchmark", "taxable": True, "note": ""}],
+    "logistics": [{"name": "", "wet_t_per_t": 1.0, "distance_km": 0.0, "tariff_per_tkm": 0.0, "cost_unit": "{cur}/(t*km)", "price_source": "Benchmark", "taxable": True, "note": ""}],
+    "waste": [{"name": "", "kg_per_t": 0.0, "disposal_cost_per_kg": 0.0, "cost_unit": "{cur}/kg", "price_source": "Benchmark", "taxable": False, "note": ""}],
+    "rubrics": [{"name": "", "basis": "per_t", "quantity": 0.0, "unit_cost": 0.0, "cost_unit": "{cur}/unit", "map_to_category": "Other", "price_source": "Benchmark", "taxable": False, "note": ""}],
+    "scenarios": [{"id": "base", "name": "Base", "costMultiplier": 1.0, "quantityMultiplier": 1.0, "contingencyPctDelta": 0.0}],
+    "capex": [{"name": "Equipment", "amount": 0.0, "year": 0, "depr_years": 10, "category": "Equipment"}],
+    "rampup": {"utilities_pct": [60, 70, 80, 85, 90, 95, 95, 97, 98, 99, 100, 100], "logistics_packaging_pct": [40, 55, 70, 80, 85, 90, 95, 97, 98, 99, 100, 100],
+               "logistics_transport_pct": [30, 45, 65, 75, 85, 90, 95, 97, 98, 99, 100, 100], "other_pct": [40, 50, 60, 70, 80, 90, 95, 97, 98, 99, 100, 100], "price_pct": [100] * 12},
+}
+
+def _cell(v: Any) -> Any:
+    if v is None or isinstance(v, (bool, int, float, str)):
+        return v
+    if hasattr(v, "item"):  # numpy scalars
+        return v.item()
+    return str(v)
+
+def write_sheets(sheets: List[Tuple[str, List[Dict[str, Any]]]]) -> bytes:
+    """xlsx bytes with one sheet per (name, records); columns in first-seen key order, None left blank."""
+    import xlsxwriter
+    bio = io.BytesIO()
+    wb = xlsxwriter.Workbook(bio, {"in_memory": True, "nan_inf_to_errors": True})
+    bold = wb.add_format({"bold": True})
+    for name, records in sheets:
+        ws = wb.add_worksheet(name[:31])
+        cols = list(dict.fromkeys(k for r in records for k in r))
+        ws.write_row(0, 0, cols, bold)
+        for i, r in enumerate(records, start=1):
+            for j, c in enumerate(cols):
+                v = _cell(r.get(c))
+                if v is not None:
+                    ws.write(i, j, v)
+    wb.close()
+    return bio.getvalue()
+
+def export_workbook(data: Dict[str, Any]) -> bytes:
+    """The table sections of the state as an xlsx (one sheet per section, readable back by read_workbook)."""
+    sheets = []
+    for name in EXPORT_SECTIONS:
+        node: Any = data
+        for key in IMPORT_TARGETS[name]:
+            node = (node or {}).get(key, [])
+        sheets.append((name, list(node or [])))
+    return write_sheets(sheets)
+
+@lru_cache(maxsize=8)
+def template_workbook(currency: str = "MAD") -> bytes:
+    """Import template for a currency (built once per currency per process)."""
+    def fill(v: Any) -> Any:
+        return v.replace("{cur}", currency) if isinstance(v, str) else v
+    sheets = []
+    for name, rows in TEMPLATE_ROWS.items():
+        if isinstance(rows, dict):
+            rows = [dict(zip(rows, vals)) for vals in zip(*rows.values())]
+        sheets.append((name, [{k: fill(v) for k, v in r.items()} for r in rows]))
+    return write_sheets(sheets)